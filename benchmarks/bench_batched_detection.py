@@ -0,0 +1,73 @@
+"""Throughput benchmark for batched multi-camera detection.
+
+Runs ``--sources`` synthetic cameras through :func:`run_batched` with a
+:class:`FakeDetector` whose cost is ``--call-ms`` per call plus
+``--frame-ms`` per frame, the shape of a batched accelerator, and reports
+frames per second for every ``--batch-size``. No GPU is needed::
+
+    python benchmarks/bench_batched_detection.py --sources 1 4 --batch-size 1 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Iterator, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carspeed.core.detector import FakeDetector  # noqa: E402
+from carspeed.core.processor import FrameProcessor  # noqa: E402
+from carspeed.core.tracker_wrapper import create_tracker  # noqa: E402
+from carspeed.io.capture import run_batched  # noqa: E402
+
+
+def camera(idx: int, frames: int, fps: float) -> Iterator[Tuple[float, np.ndarray]]:
+    for i in range(frames):
+        frame = np.zeros((72, 128, 3), dtype=np.uint8)
+        frame[0, 0] = (idx, i % 256, i // 256)
+        yield i / fps, frame
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--frames", type=int, default=300, help="frames per source")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--call-ms", type=float, default=8.0)
+    parser.add_argument("--frame-ms", type=float, default=1.0)
+    parser.add_argument("--max-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'sources':>7} {'batch':>5} {'calls':>6} {'per batch':>9} {'frames/s':>9}")
+    for sources in args.sources:
+        for batch_size in args.batch_size:
+            detector = FakeDetector(
+                boxes=4, call_cost=args.call_ms / 1e3, frame_cost=args.frame_ms / 1e3
+            )
+            processors = [
+                FrameProcessor(create_tracker("iou"), ppm=20.0) for _ in range(sources)
+            ]
+            start = time.perf_counter()
+            collector, _ = run_batched(
+                [camera(i, args.frames, args.fps) for i in range(sources)],
+                detector,
+                processors,
+                lambda idx, rows: None,
+                batch_size=batch_size,
+                max_latency=args.max_latency,
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{sources:>7} {batch_size:>5} {detector.calls:>6} "
+                f"{collector.frames / max(1, collector.batches):>9.1f} "
+                f"{collector.frames / elapsed:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
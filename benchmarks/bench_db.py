@@ -0,0 +1,72 @@
+"""Benchmark SQLite insert throughput: per-row commits versus BatchWriter.
+
+Runs against a tmpfs directory (``/dev/shm`` by default) and a directory on
+regular storage, since the per-commit fsync is what dominates on disk::
+
+    python benchmarks/bench_db.py --rows 2000 --disk-dir /var/tmp
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carspeed.io.db import INSERT_VEHICLE, BatchWriter, init_db  # noqa: E402
+
+
+def row(i: int):
+    return (i / 30.0, i % 50, "car", 12.5, 10, 20, 110, 80, 0.87)
+
+
+def per_row(path: str, rows: int) -> float:
+    """The previous ``run_capture`` pattern: new cursor and commit per row."""
+    conn = init_db(path)
+    start = time.perf_counter()
+    for i in range(rows):
+        cur = conn.cursor()
+        cur.execute(INSERT_VEHICLE, row(i))
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return rows / elapsed
+
+
+def batched(path: str, rows: int, synchronous: str) -> float:
+    start = time.perf_counter()
+    with BatchWriter(
+        init_db(path, wal=True, synchronous=synchronous), close_connection=True
+    ) as writer:
+        for i in range(rows):
+            writer.write(row(i))
+    return rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--tmpfs-dir", default="/dev/shm")
+    parser.add_argument("--disk-dir", default=".")
+    args = parser.parse_args()
+
+    print(f"{'storage':>8} {'per-row':>12} {'batch FULL':>12} {'batch NORMAL':>13}  rows/s")
+    for name, base in (("tmpfs", args.tmpfs_dir), ("disk", args.disk_dir)):
+        if not os.path.isdir(base):
+            print(f"{name:>8} skipped, {base} does not exist")
+            continue
+        results = []
+        for run in (
+            lambda p: per_row(p, args.rows),
+            lambda p: batched(p, args.rows, "FULL"),
+            lambda p: batched(p, args.rows, "NORMAL"),
+        ):
+            with tempfile.TemporaryDirectory(dir=base) as tmp:
+                results.append(run(os.path.join(tmp, "bench.db")))
+        print(f"{name:>8} {results[0]:>12.0f} {results[1]:>12.0f} {results[2]:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark for replaying tracking and speeds from a detection cache.
+
+Writes a synthetic cache of ``--minutes`` of footage and times opening it
+and replaying every frame through the tracker and speed estimator, which is
+what re-tuning ``--iou-threshold``, ``--decay-time`` or ``--window`` costs
+once detections are cached::
+
+    python benchmarks/bench_detection_cache.py --minutes 60 --fps 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carspeed.core.processor import FrameProcessor  # noqa: E402
+from carspeed.core.tracker_wrapper import create_tracker  # noqa: E402
+from carspeed.io.capture import run_stream  # noqa: E402
+from carspeed.io.detection_cache import DetectionCache, DetectionCacheWriter  # noqa: E402
+
+
+def build(path: str, minutes: float, fps: float, rate: float, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    writer = DetectionCacheWriter(path)
+    cars = []  # x, y, px/frame
+    for frame in range(int(minutes * 60 * fps)):
+        if rng.random() < rate:
+            cars.append([-120.0, rng.uniform(300, 800), rng.uniform(8, 30) * 20 / fps])
+        cars = [c for c in cars if c[0] < 1920]
+        dets = []
+        for car in cars:
+            car[0] += car[2]
+            x, y = int(car[0]), int(car[1])
+            dets.append((x, y, x + 120, y + 60, 0.9, "car"))
+        writer.append(frame / fps, dets)
+    writer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--rate", type=float, default=0.01, help="vehicles per frame")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache")
+        start = time.perf_counter()
+        build(path, args.minutes, args.fps, args.rate)
+        print(f"write: {time.perf_counter() - start:.2f} s")
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+        start = time.perf_counter()
+        cache = DetectionCache(path)
+        opened = time.perf_counter() - start
+        print(
+            f"open:  {opened * 1e3:.2f} ms for {len(cache)} frames, "
+            f"{cache.detections} detections, {size / 1e6:.1f} MB"
+        )
+
+        rows = []
+        tracker = create_tracker("iou", iou_threshold=0.3, decay_time=1.0)
+        start = time.perf_counter()
+        run_stream(cache, lambda d: d, FrameProcessor(tracker, ppm=20.0), rows.extend)
+        elapsed = time.perf_counter() - start
+        print(
+            f"replay: {elapsed:.2f} s for {len(rows)} rows "
+            f"({args.minutes * 60 / elapsed:.0f}x realtime)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark homography projection at 1080p.
+
+Compares the per-point scalar formula used before, the batched
+:meth:`Homography.project` and the precomputed lookup table::
+
+    python benchmarks/bench_projection.py --points 200 --frames 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carspeed.core.projection import Homography  # noqa: E402
+
+H = [0.9, 0.05, 12.0, 0.02, 1.1, -4.0, 0.0001, 0.0002, 1.0]
+
+
+def scalar(points):
+    out = []
+    for cx, cy in points:
+        tx = H[0] * cx + H[1] * cy + H[2]
+        ty = H[3] * cx + H[4] * cy + H[5]
+        tz = H[6] * cx + H[7] * cy + H[8]
+        if tz != 0:
+            cx = tx / tz
+            cy = ty / tz
+        out.append((cx, cy))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = rng.uniform([0, 0], [1919, 1079], size=(args.frames, args.points, 2))
+    frame_lists = [[tuple(p) for p in f] for f in frames.tolist()]
+    h = Homography(H)
+
+    start = time.perf_counter()
+    for pts in frame_lists:
+        scalar(pts)
+    t_scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for pts in frames:
+        h.project(pts)
+    t_batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    h.build_lut(1920, 1080)
+    t_build = time.perf_counter() - start
+    start = time.perf_counter()
+    for pts in frames:
+        h.project(pts)
+    t_lut = time.perf_counter() - start
+
+    per = 1e6 / args.frames
+    print(f"{args.points} points/frame, {args.frames} frames at 1920x1080")
+    print(f"scalar loop : {t_scalar * per:8.1f} us/frame")
+    print(f"batched     : {t_batch * per:8.1f} us/frame")
+    print(f"lookup table: {t_lut * per:8.1f} us/frame (built in {t_build * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark grid-pruned candidate search against the dense IoU matrix.
+
+Boxes are scattered over a scene whose area grows with the box count, as in a
+wide-angle highway view, so the number of truly overlapping pairs grows
+linearly while the dense matrix grows quadratically::
+
+    python benchmarks/bench_spatial_grid.py --boxes 1000 2000 4000 8000 16000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carspeed.core.association import candidates  # noqa: E402
+
+
+def scene(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    side = math.sqrt(n) * 80
+    xy = rng.uniform(0, side, size=(n, 2))
+    wh = rng.uniform(30, 60, size=(n, 2))
+    return np.hstack([xy, xy + wh]).round()
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+    parser.add_argument("--cell", type=float, default=64.0)
+    parser.add_argument("--dense-max", type=int, default=4000, help="skip dense above this")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'boxes':>7} {'pairs':>8} {'dense ms':>10} {'grid ms':>10} {'grid exp':>9}")
+    prev = None
+    for n in args.boxes:
+        dets = scene(n, 1)
+        tracks = dets + np.random.default_rng(2).integers(-5, 6, size=dets.shape)
+        grid_t = timed(lambda: candidates(dets, tracks, 0.1, args.cell), args.repeat)
+        pairs = len(candidates(dets, tracks, 0.1, args.cell)[0])
+        dense = (
+            f"{timed(lambda: candidates(dets, tracks, 0.1), args.repeat) * 1e3:>10.1f}"
+            if n <= args.dense_max
+            else f"{'-':>10}"
+        )
+        # empirical scaling exponent of the grid path versus the previous size
+        exp = f"{math.log(grid_t / prev[1]) / math.log(n / prev[0]):>9.2f}" if prev else f"{'':>9}"
+        print(f"{n:>7} {pairs:>8} {dense} {grid_t * 1e3:>10.1f} {exp}")
+        prev = (n, grid_t)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+/* Benchmark of the speedtrack per-track history without GStreamer.
+ *
+ * Drives --tracks concurrent tracks for --frames frames, retiring and
+ * replacing a fraction of them every frame, through the legacy layout (two
+ * heap allocations per track, two-pass regression per sample) and the slab
+ * with running sums from speed_history.h. Speeds from both are compared.
+ *
+ *     make bench
+ *     ./benchmarks/bench_speed_history --tracks 10000 --frames 300 --window 30
+ */
+#define _POSIX_C_SOURCE 199309L
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+
+#include "speed_history.h"
+
+/* The original History from speed_plugin.c. */
+typedef struct {
+  double x, y, ts;
+} LegacyPoint;
+
+typedef struct {
+  int cap, count, idx;
+  LegacyPoint *pts;
+} LegacyHistory;
+
+static LegacyHistory *legacy_new(int cap) {
+  LegacyHistory *h = calloc(1, sizeof(LegacyHistory));
+  h->cap = cap;
+  h->pts = calloc(cap, sizeof(LegacyPoint));
+  return h;
+}
+
+static void legacy_free(LegacyHistory *h) {
+  free(h->pts);
+  free(h);
+}
+
+static void legacy_add(LegacyHistory *h, double x, double y, double ts) {
+  h->pts[h->idx] = (LegacyPoint){x, y, ts};
+  h->idx = (h->idx + 1) % h->cap;
+  if (h->count < h->cap)
+    h->count++;
+}
+
+static double legacy_speed(const LegacyHistory *h, double ppm) {
+  if (h->count < 2)
+    return 0.0;
+  double sum_t = 0.0, sum_x = 0.0, sum_y = 0.0;
+  for (int i = 0; i < h->count; i++) {
+    int idx = (h->idx - h->count + i + h->cap) % h->cap;
+    sum_t += h->pts[idx].ts;
+    sum_x += h->pts[idx].x;
+    sum_y += h->pts[idx].y;
+  }
+  double mean_t = sum_t / h->count, mean_x = sum_x / h->count,
+         mean_y = sum_y / h->count;
+  double num_x = 0.0, num_y = 0.0, den = 0.0;
+  for (int i = 0; i < h->count; i++) {
+    int idx = (h->idx - h->count + i + h->cap) % h->cap;
+    double dt = h->pts[idx].ts - mean_t;
+    num_x += dt * (h->pts[idx].x - mean_x);
+    num_y += dt * (h->pts[idx].y - mean_y);
+    den += dt * dt;
+  }
+  if (den == 0.0)
+    return 0.0;
+  double vx = num_x / den, vy = num_y / den;
+  return sqrt(vx * vx + vy * vy) / ppm;
+}
+
+static double now(void) {
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+/* Deterministic position of a track at time t; retired tracks restart. */
+static void position(unsigned seed, double t, double *x, double *y) {
+  double vx = 5.0 + (seed % 37), vy = (double)(seed % 7) - 3.0;
+  *x = (seed % 1920) + vx * t + ((seed * 2654435761u) >> 28) * 0.01;
+  *y = (seed % 1080) + vy * t;
+}
+
+int main(int argc, char **argv) {
+  int tracks = 10000, frames = 300, window = 30;
+  double churn = 0.01, fps = 30.0, ppm = 20.0;
+  for (int i = 1; i + 1 < argc; i += 2) {
+    if (!strcmp(argv[i], "--tracks"))
+      tracks = atoi(argv[i + 1]);
+    else if (!strcmp(argv[i], "--frames"))
+      frames = atoi(argv[i + 1]);
+    else if (!strcmp(argv[i], "--window"))
+      window = atoi(argv[i + 1]);
+    else if (!strcmp(argv[i], "--churn"))
+      churn = atof(argv[i + 1]);
+    else {
+      fprintf(stderr, "unknown option %s\n", argv[i]);
+      return 2;
+    }
+  }
+  int retire = (int)(tracks * churn);
+  unsigned *seeds = malloc(sizeof(unsigned) * tracks);
+  double *start = malloc(sizeof(double) * tracks);
+  double *out_legacy = malloc(sizeof(double) * tracks);
+  double *out_slab = malloc(sizeof(double) * tracks);
+  LegacyHistory **legacy = malloc(sizeof(LegacyHistory *) * tracks);
+  SpeedTrack **slab_tracks = malloc(sizeof(SpeedTrack *) * tracks);
+  SpeedSlab slab;
+  speed_slab_init(&slab, window);
+
+  double t_legacy = 0.0, t_slab = 0.0, max_err = 0.0;
+  for (int i = 0; i < tracks; i++) {
+    seeds[i] = (unsigned)i + 1;
+    start[i] = 0.0;
+    legacy[i] = legacy_new(window);
+    slab_tracks[i] = speed_slab_alloc(&slab, seeds[i]);
+  }
+  unsigned next_seed = (unsigned)tracks + 1;
+  for (int f = 0; f < frames; f++) {
+    double ts = 1000.0 + f / fps;
+    /* retire the oldest `retire` tracks and start new ones in their place */
+    for (int k = 0; k < retire; k++) {
+      int i = (f * retire + k) % tracks;
+      seeds[i] = next_seed++;
+      start[i] = ts;
+      double t0 = now();
+      legacy_free(legacy[i]);
+      legacy[i] = legacy_new(window);
+      double t1 = now();
+      speed_slab_release(&slab, slab_tracks[i]);
+      slab_tracks[i] = speed_slab_alloc(&slab, seeds[i]);
+      double t2 = now();
+      t_legacy += t1 - t0;
+      t_slab += t2 - t1;
+    }
+    double t0 = now();
+    for (int i = 0; i < tracks; i++) {
+      double x, y;
+      position(seeds[i], ts - start[i], &x, &y);
+      legacy_add(legacy[i], x, y, ts);
+      out_legacy[i] = legacy_speed(legacy[i], ppm);
+    }
+    double t1 = now();
+    for (int i = 0; i < tracks; i++) {
+      double x, y;
+      position(seeds[i], ts - start[i], &x, &y);
+      speed_track_push(slab_tracks[i], window, x, y, ts);
+      out_slab[i] = speed_track_speed(slab_tracks[i], ppm);
+    }
+    double t2 = now();
+    t_legacy += t1 - t0;
+    t_slab += t2 - t1;
+    for (int i = 0; i < tracks; i++) {
+      double err = fabs(out_legacy[i] - out_slab[i]) / (fabs(out_legacy[i]) + 1e-9);
+      if (err > max_err)
+        max_err = err;
+    }
+  }
+
+  double samples = (double)tracks * frames;
+  printf("%-8s %10s %12s\n", "layout", "seconds", "ns/sample");
+  printf("%-8s %10.3f %12.1f\n", "legacy", t_legacy, t_legacy / samples * 1e9);
+  printf("%-8s %10.3f %12.1f\n", "slab", t_slab, t_slab / samples * 1e9);
+  printf("tracks=%d frames=%d window=%d slab capacity=%zu max rel err=%.2e\n",
+         tracks, frames, window, slab.capacity, max_err);
+
+  for (int i = 0; i < tracks; i++)
+    legacy_free(legacy[i]);
+  speed_slab_clear(&slab);
+  free(seeds);
+  free(start);
+  free(out_legacy);
+  free(out_slab);
+  free(legacy);
+  free(slab_tracks);
+  return max_err < 1e-6 ? 0 : 1;
+}
@@ -0,0 +1,58 @@
+"""Micro-benchmark of the rolling speed estimators.
+
+Compares the list-based :func:`rolling_speed`, the streaming
+:class:`RollingSpeed` and the cumulative-sum :func:`rolling_speed_array`::
+
+    python benchmarks/bench_speed_math.py --samples 10000 1000000 --window 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carspeed.core.speed_math import (  # noqa: E402
+    RollingSpeed,
+    rolling_speed,
+    rolling_speed_array,
+)
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--window", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'samples':>9} {'list ms':>10} {'stream ms':>10} {'array ms':>10}")
+    for n in args.samples:
+        rng = np.random.default_rng(0)
+        pts = np.cumsum(rng.normal(3, 1, size=(n, 2)), axis=0)
+        ts = np.arange(n) / 30.0
+        pts_list = [tuple(p) for p in pts.tolist()]
+        ts_list = ts.tolist()
+
+        def stream() -> None:
+            est = RollingSpeed(20.0, args.window)
+            for p, t in zip(pts_list, ts_list):
+                est.update(p, t)
+
+        t_list = timed(lambda: rolling_speed(pts_list, ts_list, 20.0, args.window))
+        t_stream = timed(stream)
+        t_array = timed(lambda: rolling_speed_array(pts, ts, 20.0, args.window))
+        print(f"{n:>9} {t_list * 1e3:>10.1f} {t_stream * 1e3:>10.1f} {t_array * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
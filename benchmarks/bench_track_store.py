@@ -0,0 +1,89 @@
+"""Memory and allocation benchmark for the tracker over a long synthetic stream.
+
+Simulates vehicles entering and leaving a scene for ``--hours`` of stream time
+and reports wall time, peak traced memory, live allocated blocks and garbage
+collector activity for the legacy list-of-objects tracker and the array-backed
+:class:`tracker.ByteTracker`::
+
+    python benchmarks/bench_track_store.py --hours 24 --fps 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Iterator, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "tests"))
+from legacy_tracker import LoopTracker  # noqa: E402
+from tracker import ByteTracker  # noqa: E402
+
+Box = Tuple[int, int, int, int]
+
+
+def stream(hours: float, fps: float, seed: int = 0) -> Iterator[Tuple[float, List[Box]]]:
+    """Yield ``(ts, boxes)`` with vehicles crossing a 1920 pixel wide scene."""
+    rng = random.Random(seed)
+    cars: List[List[int]] = []
+    for frame in range(int(hours * 3600 * fps)):
+        ts = frame / fps
+        # traffic density follows a crude day/night cycle
+        rate = 0.05 + 0.25 * (1 + ((frame / fps) % 86400) / 86400)
+        if rng.random() < rate:
+            cars.append([0, rng.randint(300, 800), rng.randint(40, 120)])
+        boxes = []
+        alive = []
+        for car in cars:
+            car[0] += int(car[2] / fps)
+            if car[0] < 1920:
+                alive.append(car)
+                boxes.append((car[0], car[1], car[0] + 120, car[1] + 60))
+        cars = alive
+        yield ts, boxes
+
+
+def run(name: str, tracker: object, hours: float, fps: float, trace: bool) -> None:
+    gc.collect()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    blocks = sys.getallocatedblocks()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    frames = 0
+    for ts, boxes in stream(hours, fps):
+        tracker.update(boxes, ts)  # type: ignore[attr-defined]
+        frames += 1
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    gc_runs = sum(s["collections"] for s in gc.get_stats()) - collections
+    print(
+        f"{name:>8} {frames:>9} {frames / elapsed:>10.0f} {peak / 1024:>10.1f} "
+        f"{sys.getallocatedblocks() - blocks:>8} {gc_runs:>7}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--fps", type=float, default=5.0)
+    parser.add_argument(
+        "--no-trace", action="store_true", help="skip tracemalloc (faster, no peak)"
+    )
+    args = parser.parse_args()
+
+    print(f"{'tracker':>8} {'frames':>9} {'fps':>10} {'peak KiB':>10} {'blocks':>8} {'gc':>7}")
+    run("legacy", LoopTracker(), args.hours, args.fps, not args.no_trace)
+    run("store", ByteTracker(), args.hours, args.fps, not args.no_trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark tracker association throughput versus track count.
+
+Run from the repository root::
+
+    python benchmarks/bench_tracker.py --tracks 10 100 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "tests"))
+from legacy_tracker import LoopTracker  # noqa: E402
+from tracker import ByteTracker  # noqa: E402
+
+Box = Tuple[int, int, int, int]
+
+
+def synthetic_frames(n_tracks: int, n_frames: int, seed: int = 0) -> List[List[Box]]:
+    """Return ``n_frames`` of ``n_tracks`` boxes drifting across a wide scene."""
+    rng = random.Random(seed)
+    side = int((n_tracks ** 0.5) * 60) + 100
+    state = []
+    for _ in range(n_tracks):
+        x, y = rng.randint(0, side), rng.randint(0, side)
+        state.append([x, y, rng.randint(-4, 4), rng.randint(-4, 4)])
+    frames = []
+    for _ in range(n_frames):
+        boxes = []
+        for s in state:
+            s[0] += s[2]
+            s[1] += s[3]
+            boxes.append((s[0], s[1], s[0] + 40, s[1] + 30))
+        rng.shuffle(boxes)
+        frames.append(boxes)
+    return frames
+
+
+def measure(factory: Callable[[], object], frames: List[List[Box]]) -> float:
+    """Return frames per second for ``factory()`` over ``frames``."""
+    tracker = factory()
+    start = time.perf_counter()
+    for i, boxes in enumerate(frames):
+        tracker.update(boxes, i / 30.0)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    variants = {
+        "loop": lambda: LoopTracker(),
+        "greedy": lambda: ByteTracker(matching="greedy"),
+        "global": lambda: ByteTracker(matching="global"),
+    }
+    print(f"{'tracks':>7} " + " ".join(f"{name + ' fps':>12}" for name in variants))
+    for n in args.tracks:
+        # the reference loop is quadratic; keep its run short at high counts
+        frames = synthetic_frames(n, args.frames if n < 1000 else max(3, args.frames // 10))
+        row = [measure(factory, frames) for factory in variants.values()]
+        print(f"{n:>7} " + " ".join(f"{fps:>12.1f}" for fps in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,17 @@
 from __future__ import annotations
 
 import argparse
-import json
 import logging
+import os
 import tempfile
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional
 
-try:
-    import yaml
-except ImportError:  # pragma: no cover - PyYAML is optional
-    yaml = None
+from .core.projection import Homography
+from .core.scheduler import AdaptiveInterval
+from .core.summary import ROW_MODES
+from .pipeline.config import CODECS, TRANSPORTS, PipelineOptions
+from .pipeline.manifest import load_manifest, write_source_config
 
 
 logger = logging.getLogger(__name__)
@@ -23,47 +24,98 @@ def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="DeepStream speed detector")
     src = parser.add_mutually_exclusive_group(required=True)
     src.add_argument("--rtsp", help="RTSP stream URL")
-    src.add_argument("--video", help="Path to H.265 MP4 file")
+    src.add_argument("--video", help="Path to an MP4 file (codec set by --codec)")
+    src.add_argument(
+        "--manifest", help="JSON/YAML list of cameras to batch into one pipeline"
+    )
     parser.add_argument("--config", default="ds_config.txt", help="nvinfer config file")
     parser.add_argument(
         "--engine", default="trafficcamnet.trt", help="TensorRT engine (.trt)"
     )
     parser.add_argument("--db", default="vehicles.db", help="SQLite DB path")
-    parser.add_argument("--ppm", type=float, required=True, help="Pixels per meter")
+    parser.add_argument(
+        "--ppm",
+        type=float,
+        help="Pixels per meter (required unless every manifest source sets ppm)",
+    )
     parser.add_argument("--homography", help="Path to 3x3 homography JSON/YAML")
+    parser.add_argument(
+        "--source-config",
+        help="Key file with per-source ppm/homography in [sourceN] groups",
+    )
     parser.add_argument("--window", type=int, default=3, help="History window size")
     parser.add_argument(
         "--batch-size", type=int, default=1, help="nvstreammux batch size"
     )
     parser.add_argument("--resize", help="Resize as WIDTHxHEIGHT for nvstreammux")
+    parser.add_argument(
+        "--codec",
+        choices=CODECS,
+        default="h265",
+        help="Source codec; 'auto' detects it with parsebin",
+    )
+    parser.add_argument(
+        "--rtsp-transport", choices=TRANSPORTS, help="Force RTSP over TCP or UDP"
+    )
+    parser.add_argument(
+        "--latency", type=int, default=100, help="RTSP jitter buffer latency in ms"
+    )
+    parser.add_argument(
+        "--drop-on-latency",
+        action="store_true",
+        help="Drop RTSP packets that arrive later than --latency",
+    )
+    parser.add_argument(
+        "--drop-frame-interval",
+        type=int,
+        default=0,
+        help="Decode only every Nth frame (0 decodes all)",
+    )
+    parser.add_argument(
+        "--nvbuf-memory-type",
+        type=int,
+        choices=range(4),
+        default=0,
+        help="nvstreammux buffer memory type (0 default, 1 pinned, 2 device, 3 unified)",
+    )
+    parser.add_argument(
+        "--detect-interval-min",
+        type=int,
+        default=1,
+        help="Run nvinfer at least every N batches while vehicles are tracked",
+    )
+    parser.add_argument(
+        "--detect-interval-max",
+        type=int,
+        help="Back nvinfer off to every N batches when no tracks are live (default: min)",
+    )
+    parser.add_argument(
+        "--reconnect-max",
+        type=float,
+        default=60.0,
+        help="Longest delay in seconds between RTSP reconnect attempts",
+    )
+    parser.add_argument(
+        "--rows",
+        default="raw",
+        choices=ROW_MODES,
+        help="Store per-frame rows, one summary row per vehicle, or both",
+    )
     parser.add_argument("--log-level", default="INFO", help="Logging level")
     return parser
 
 
 def load_homography(path: str) -> str:
     """Return a 3x3 homography file as a comma-separated matrix string."""
-    with open(path, "r", encoding="utf-8") as fh:
-        if Path(path).suffix.lower() in {".yml", ".yaml"}:
-            if yaml is None:
-                raise RuntimeError("PyYAML is required to read YAML homography files")
-            data = yaml.safe_load(fh)
-        else:
-            data = json.load(fh)
+    return Homography.from_file(path).to_property()
 
-    if isinstance(data, dict):
-        data = data.get("homography") or data.get("matrix") or data.get("H")
-    if data is None:
-        raise ValueError("homography file must contain a 3x3 matrix")
 
-    flat = []
-    for row in data:
-        if isinstance(row, (list, tuple)):
-            flat.extend(row)
-        else:
-            flat.append(row)
-    if len(flat) != 9:
-        raise ValueError("homography must have 9 values")
-    return ",".join(str(float(value)) for value in flat)
+def adapt_infer_interval(scheduler: AdaptiveInterval, infer: Any, speed: Any) -> None:
+    """Set the nvinfer ``interval`` from the number of tracks speedtrack holds."""
+    period = scheduler.interval
+    if scheduler.update(speed.get_property("tracks")) != period:
+        infer.set_property("interval", scheduler.interval - 1)
+        logger.debug("nvinfer now runs every %d batches", scheduler.interval)
 
 
 def write_engine_config(config_path: str, engine_path: str) -> str:
@@ -118,44 +170,105 @@ def main(argv: Optional[Iterable[str]] = None) -> None:
         w, h = args.resize.split("x", 1)
         width, height = int(w), int(h)
 
-    config = write_engine_config(args.config, args.engine)
-    homography = None if args.homography is None else load_homography(args.homography)
+    if args.latency < 0 or args.drop_frame_interval < 0:
+        parser.error("--latency and --drop-frame-interval must be >= 0")
+    max_interval = args.detect_interval_max or args.detect_interval_min
+    if not 1 <= args.detect_interval_min <= max_interval:
+        parser.error("need 1 <= --detect-interval-min <= --detect-interval-max")
+
+    sources = load_manifest(args.manifest) if args.manifest else []
+    if args.ppm is None and (not sources or any(s.ppm is None for s in sources)):
+        parser.error("--ppm is required")
+    if sources and args.source_config:
+        parser.error("--source-config cannot be combined with --manifest")
+    ppm = args.ppm if args.ppm is not None else sources[0].ppm
+    source_config = write_source_config(sources) if sources else args.source_config
+    try:
+        if sources:
+            logger.info("Batching %d sources", len(sources))
 
-    from gi.repository import Gst  # imported after argument parsing
-    from .pipeline.config import PipelineOptions
-    from .pipeline.deepstream_graph import build_pipeline
+        config = write_engine_config(args.config, args.engine)
+        homography = None if args.homography is None else load_homography(args.homography)
 
-    opts = PipelineOptions(
-        uri=args.rtsp if args.rtsp else args.video,
-        config=config,
-        engine=args.engine,
-        db=args.db,
-        ppm=args.ppm,
-        is_rtsp=args.rtsp is not None,
-        homography=homography,
-        window=args.window,
-        batch_size=args.batch_size,
-        width=width,
-        height=height,
-    )
+        from gi.repository import Gst  # imported after argument parsing
+        from .io.rtsp import latency_source
+        from .pipeline.deepstream_graph import build_pipeline, decode_options
+        from .pipeline.manifest import SourceSpec
+        from .pipeline.supervisor import Backoff, SourceSupervisor
 
-    pipeline = build_pipeline(opts)
-    bus = pipeline.get_bus()
-    pipeline.set_state(Gst.State.PLAYING)
-    logger.info("Pipeline started")
+        opts = PipelineOptions(
+            uri=args.rtsp or args.video or "",
+            config=config,
+            engine=args.engine,
+            db=args.db,
+            ppm=ppm,
+            is_rtsp=args.rtsp is not None,
+            homography=homography,
+            source_config=source_config,
+            window=args.window,
+            batch_size=len(sources) if sources else args.batch_size,
+            sources=sources,
+            codec=args.codec,
+            transport=args.rtsp_transport,
+            latency=args.latency,
+            drop_on_latency=args.drop_on_latency,
+            drop_frame_interval=args.drop_frame_interval,
+            nvbuf_memory_type=args.nvbuf_memory_type,
+            infer_interval=args.detect_interval_min - 1,
+            rows=args.rows,
+            width=width,
+            height=height,
+        )
 
-    try:
-        while True:
-            msg = bus.timed_pop_filtered(
-                100 * Gst.MSECOND, Gst.MessageType.ERROR | Gst.MessageType.EOS
+        pipeline = build_pipeline(opts)
+        bus = pipeline.get_bus()
+        specs = sources or [SourceSpec(uri=opts.uri, is_rtsp=opts.is_rtsp)]
+        supervisor = None
+        if any(s.is_rtsp for s in specs):
+            # RTSP errors reconnect the camera instead of ending the process
+            supervisor = SourceSupervisor(
+                pipeline,
+                specs,
+                backoff=lambda: Backoff(maximum=max(1.0, args.reconnect_max)),
+                make_source=lambda uri, idx: latency_source(
+                    uri, idx, **decode_options(opts, specs[idx])
+                ),
             )
-            if msg:
+        throttle = None
+        if max_interval > args.detect_interval_min:
+            throttle = AdaptiveInterval(args.detect_interval_min, max_interval)
+            infer = pipeline.get_by_name("infer")
+            speed = pipeline.get_by_name("speed")
+        pipeline.set_state(Gst.State.PLAYING)
+        logger.info("Pipeline started")
+
+        try:
+            while True:
+                msg = bus.timed_pop_filtered(
+                    100 * Gst.MSECOND, Gst.MessageType.ERROR | Gst.MessageType.EOS
+                )
+                if supervisor is not None:
+                    supervisor.poll()
+                if throttle is not None:
+                    adapt_infer_interval(throttle, infer, speed)
+                if not msg:
+                    continue
+                if (
+                    supervisor is not None
+                    and msg.type == Gst.MessageType.ERROR
+                    and supervisor.handle_error(msg)
+                ):
+                    continue
                 break
-    except KeyboardInterrupt:
-        pass
+        except KeyboardInterrupt:
+            pass
 
-    pipeline.set_state(Gst.State.NULL)
-    logger.info("Pipeline stopped")
+        pipeline.set_state(Gst.State.NULL)
+        logger.info("Pipeline stopped")
+    finally:
+        if sources and source_config is not None:
+            # speedtrack reads the file on start; it is ours to remove
+            os.unlink(source_config)
 
 
 if __name__ == "__main__":  # pragma: no cover - manual execution
@@ -0,0 +1,120 @@
+"""Two-stage ByteTrack with batched Kalman motion prediction."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .association import as_boxes, candidates, get_matcher
+from .kalman import BoxKalmanFilter, xyxy_to_cxcywh
+from .tracker_wrapper import BaseTracker, Box, Point, register_tracker
+
+
+@register_tracker("bytetrack")
+class ByteTrackTracker(BaseTracker):
+    """ByteTrack association against Kalman-predicted boxes.
+
+    Every update first predicts all tracks forward to ``ts``. Detections with
+    a score of at least ``high_thresh`` are matched to the predictions; the
+    tracks left over get a second chance against the low-confidence
+    detections (``low_thresh <= score < high_thresh``), which rescues
+    vehicles that are briefly occluded or blurred. Unmatched high-confidence
+    detections above ``new_track_thresh`` start new tracks and tracks unseen
+    for more than ``decay_time`` seconds are dropped.
+
+    Because matching uses predicted rather than last-seen boxes, fast
+    vehicles keep their id at low inference rates. Without ``scores`` every
+    detection counts as high confidence.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.2,
+        low_iou_threshold: float = 0.5,
+        high_thresh: float = 0.5,
+        low_thresh: float = 0.1,
+        new_track_thresh: float = 0.6,
+        decay_time: float = 1.0,
+        matching: str = "global",
+        grid_cell: Optional[float] = None,
+    ):
+        super().__init__()
+        self.iou_threshold = iou_threshold
+        self.low_iou_threshold = low_iou_threshold
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.new_track_thresh = new_track_thresh
+        self.decay_time = decay_time
+        self.matching = matching
+        self._match = get_matcher(matching)
+        self.grid_cell = grid_cell
+        self.kf = BoxKalmanFilter()
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.last_ts = np.zeros(0)
+        self.next_id = 0
+        self._ts: Optional[float] = None
+
+    def _associate(
+        self,
+        det_idx: np.ndarray,
+        trk_idx: np.ndarray,
+        boxes: np.ndarray,
+        pred: np.ndarray,
+        threshold: float,
+    ) -> np.ndarray:
+        """Return the matched track index (or -1) for each of ``det_idx``."""
+        if len(det_idx) == 0 or len(trk_idx) == 0:
+            return np.full(len(det_idx), -1, dtype=np.int64)
+        pairs = candidates(boxes[det_idx], pred[trk_idx], threshold, self.grid_cell)
+        cols = self._match(pairs, len(det_idx))
+        return np.where(cols >= 0, trk_idx[np.maximum(cols, 0)], -1)
+
+    def update(
+        self, boxes: List[Box], ts: float, scores: Optional[Sequence[float]] = None
+    ) -> Dict[int, Point]:
+        det = as_boxes(boxes)
+        conf = np.ones(len(det)) if scores is None else np.asarray(scores, dtype=float)
+
+        alive = ts - self.last_ts <= self.decay_time
+        if not alive.all():
+            self.kf.keep(alive)
+            self.ids = self.ids[alive]
+            self.last_ts = self.last_ts[alive]
+        if self._ts is not None:
+            self.kf.predict(ts - self._ts)
+        self._ts = ts
+        pred = self.kf.boxes()
+
+        matched = np.full(len(det), -1, dtype=np.int64)
+        high = np.flatnonzero(conf >= self.high_thresh)
+        low = np.flatnonzero((conf >= self.low_thresh) & (conf < self.high_thresh))
+        all_tracks = np.arange(len(self.ids))
+        matched[high] = self._associate(high, all_tracks, det, pred, self.iou_threshold)
+        remaining = np.setdiff1d(all_tracks, matched[high])
+        matched[low] = self._associate(low, remaining, det, pred, self.low_iou_threshold)
+
+        hit = np.flatnonzero(matched >= 0)
+        self.kf.update(matched[hit], xyxy_to_cxcywh(det[hit]))
+        self.last_ts[matched[hit]] = ts
+
+        fresh = high[(matched[high] < 0) & (conf[high] >= self.new_track_thresh)]
+        if len(fresh):
+            first = len(self.ids)
+            self.kf.initiate(xyxy_to_cxcywh(det[fresh]))
+            self.ids = np.concatenate(
+                [self.ids, np.arange(self.next_id, self.next_id + len(fresh))]
+            )
+            self.next_id += len(fresh)
+            self.last_ts = np.concatenate([self.last_ts, np.full(len(fresh), ts)])
+            matched[fresh] = np.arange(first, first + len(fresh))
+
+        out = np.flatnonzero(matched >= 0)
+        track_ids = np.full(len(det), -1, dtype=np.int64)
+        track_ids[out] = self.ids[matched[out]]
+        self.matches = track_ids.tolist()
+        centers = (det[out, 0:2] + det[out, 2:4]) / 2
+        return {
+            tid: (cx, cy)
+            for tid, (cx, cy) in zip(track_ids[out].tolist(), centers.tolist())
+        }
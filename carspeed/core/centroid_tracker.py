@@ -0,0 +1,62 @@
+"""Nearest-centroid tracker for sparse scenes."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .association import as_boxes, global_assign
+from .track_store import TrackStore
+from .tracker_wrapper import BaseTracker, Box, Point, register_tracker
+
+
+@register_tracker("centroid")
+class CentroidTracker(BaseTracker):
+    """Match detections to the nearest live track centre.
+
+    The cheapest tracker: pairs whose centres are at most ``max_distance``
+    pixels apart are matched closest first, ignoring box shape and scores.
+    Good enough for sparse scenes at high frame rates.
+    """
+
+    def __init__(self, max_distance: float = 50.0, decay_time: float = 1.0):
+        super().__init__()
+        self.max_distance = max_distance
+        self.decay_time = decay_time
+        self.store = TrackStore()
+        self.next_id = 0
+
+    def update(
+        self, boxes: List[Box], ts: float, scores: Optional[Sequence[float]] = None
+    ) -> Dict[int, Point]:
+        store = self.store
+        store.expire(ts, self.decay_time)
+
+        det = as_boxes(boxes)
+        centers = np.stack([(det[:, 0] + det[:, 2]) / 2, (det[:, 1] + det[:, 3]) / 2], 1)
+        live = store.live_slots()
+        diff = centers[:, None, :] - store.centers[live][None, :, :]
+        dist = np.hypot(diff[..., 0], diff[..., 1])
+        rows, cols = np.nonzero(dist <= self.max_distance)
+        matches = global_assign(
+            (rows, cols, self.max_distance - dist[rows, cols]), len(det)
+        )
+
+        matched = matches >= 0
+        slots = np.empty(len(det), dtype=np.int64)
+        slots[matched] = live[matches[matched]]
+        store.write(slots[matched], det[matched], ts)
+
+        fresh = np.flatnonzero(~matched)
+        if len(fresh):
+            slots[fresh] = store.allocate(len(fresh))
+            ids = np.arange(self.next_id, self.next_id + len(fresh))
+            self.next_id += len(fresh)
+            store.write(slots[fresh], det[fresh], ts, ids)
+
+        self.matches = store.ids[slots].tolist()
+        return {
+            tid: (cx, cy)
+            for tid, (cx, cy) in zip(self.matches, store.centers[slots].tolist())
+        }
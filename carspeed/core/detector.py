@@ -0,0 +1,77 @@
+"""Detector interface and a deterministic stand-in for benchmarks and tests."""
+
+from __future__ import annotations
+
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, List, Sequence
+
+import numpy as np
+
+from .processor import Detection
+
+
+class Detector(ABC):
+    """Turn frames into :data:`~carspeed.core.processor.Detection` tuples.
+
+    Implementations take a whole batch per call so accelerators can amortise
+    their per-call overhead; calling the detector with a single frame runs a
+    batch of one.
+    """
+
+    @abstractmethod
+    def detect_batch(self, frames: Sequence[Any]) -> List[List[Detection]]:
+        """Return the detections of every frame, in order."""
+        raise NotImplementedError
+
+    def __call__(self, frame: Any) -> List[Detection]:
+        return self.detect_batch([frame])[0]
+
+
+class FakeDetector(Detector):
+    """Deterministic detector with a configurable cost model.
+
+    Each call sleeps ``call_cost`` plus ``frame_cost`` per frame, which is
+    how a batched accelerator behaves, and returns ``boxes`` pseudo-random
+    boxes per frame seeded from the frame content, so the same frame always
+    yields the same detections whatever batch it is in.
+    """
+
+    def __init__(
+        self,
+        boxes: int = 4,
+        call_cost: float = 0.0,
+        frame_cost: float = 0.0,
+        seed: int = 0,
+        label: str = "car",
+    ):
+        self.boxes = boxes
+        self.call_cost = call_cost
+        self.frame_cost = frame_cost
+        self.seed = seed
+        self.label = label
+        self.calls = 0
+        self.frames = 0
+
+    def _detect(self, frame: Any) -> List[Detection]:
+        frame = np.asarray(frame)
+        height, width = (frame.shape + (1, 1))[:2]
+        rng = random.Random(self.seed ^ zlib.crc32(np.ascontiguousarray(frame.flat[:4096])))
+        detections = []
+        for _ in range(self.boxes):
+            w = rng.randint(1, max(1, width // 4))
+            h = rng.randint(1, max(1, height // 4))
+            x = rng.randint(0, max(0, width - w))
+            y = rng.randint(0, max(0, height - h))
+            detections.append((x, y, x + w, y + h, round(rng.uniform(0.3, 1.0), 3), self.label))
+        return detections
+
+    def detect_batch(self, frames: Sequence[Any]) -> List[List[Detection]]:
+        self.calls += 1
+        self.frames += len(frames)
+        cost = self.call_cost + self.frame_cost * len(frames)
+        if cost > 0:
+            time.sleep(cost)
+        return [self._detect(frame) for frame in frames]
@@ -0,0 +1,112 @@
+"""IoU-matching tracker backed by a compact track store."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .association import as_boxes, candidates, get_matcher
+from .track_store import TrackStore
+from .tracker_wrapper import BaseTracker, Box, Point, register_tracker
+
+
+class VehicleTrack:
+    __slots__ = ("box", "last_ts", "id", "center")
+
+    def __init__(self, box: Tuple[int, int, int, int], ts: float, tid: int):
+        self.box = box
+        self.last_ts = ts
+        self.id = tid
+        self.center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+
+
+def _iou(box_a: Tuple[int, int, int, int], box_b: Tuple[int, int, int, int]) -> float:
+    x1 = max(box_a[0], box_b[0])
+    y1 = max(box_a[1], box_b[1])
+    x2 = min(box_a[2], box_b[2])
+    y2 = min(box_a[3], box_b[3])
+    if x2 <= x1 or y2 <= y1:
+        return 0.0
+    inter = float((x2 - x1) * (y2 - y1))
+    area_a = float((box_a[2] - box_a[0]) * (box_a[3] - box_a[1]))
+    area_b = float((box_b[2] - box_b[0]) * (box_b[3] - box_b[1]))
+    return inter / (area_a + area_b - inter)
+
+
+@register_tracker("iou")
+class IoUTracker(BaseTracker):
+    """Greedy IoU tracker linking detections to the live tracks they overlap.
+
+    Unlike :class:`~carspeed.core.bytetrack.ByteTrackTracker` there is no
+    motion model and no second pass over low-score detections.
+    ``matching`` selects how detections are assigned to tracks once the IoU
+    matrix has been computed: ``"greedy"`` (default) keeps the original
+    first-come behaviour, ``"global"`` matches the best overlaps in the whole
+    frame first and ``"hungarian"`` solves the assignment optimally (SciPy).
+    ``grid_cell`` enables a uniform grid index with cells of that many pixels
+    so only spatially nearby tracks are scored; roughly the size of a typical
+    box works well.
+
+    Live tracks are kept in a :class:`~carspeed.core.track_store.TrackStore`
+    so long-running streams do not allocate a track object per detection.
+    Detection scores are accepted but not used.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        decay_time: float = 1.0,
+        matching: str = "greedy",
+        grid_cell: Optional[float] = None,
+    ):
+        super().__init__()
+        self.iou_threshold = iou_threshold
+        self.decay_time = decay_time
+        self.matching = matching
+        self._match = get_matcher(matching)
+        self.grid_cell = grid_cell
+        self.store = TrackStore()
+        self.next_id = 0
+
+    @property
+    def tracks(self) -> List[VehicleTrack]:
+        """Snapshot of the live tracks as :class:`VehicleTrack` records."""
+        store = self.store
+        out = []
+        for slot in store.live_slots().tolist():
+            box = tuple(int(v) for v in store.boxes[slot])
+            out.append(VehicleTrack(box, float(store.last_ts[slot]), int(store.ids[slot])))
+        return out
+
+    def update(
+        self, boxes: List[Box], ts: float, scores: Optional[Sequence[float]] = None
+    ) -> Dict[int, Point]:
+        store = self.store
+        # remove expired tracks
+        store.expire(ts, self.decay_time)
+
+        det = as_boxes(boxes)
+        live = store.live_slots()
+        matches = self._match(
+            candidates(det, store.boxes[live], self.iou_threshold, self.grid_cell),
+            len(det),
+        )
+
+        matched = matches >= 0
+        slots = np.empty(len(det), dtype=np.int64)
+        slots[matched] = live[matches[matched]]
+        store.write(slots[matched], det[matched], ts)
+
+        fresh = np.flatnonzero(~matched)
+        if len(fresh):
+            slots[fresh] = store.allocate(len(fresh))
+            ids = np.arange(self.next_id, self.next_id + len(fresh))
+            self.next_id += len(fresh)
+            store.write(slots[fresh], det[fresh], ts, ids)
+
+        self.matches = store.ids[slots].tolist()
+        return {
+            tid: (cx, cy)
+            for tid, (cx, cy) in zip(self.matches, store.centers[slots].tolist())
+        }
@@ -0,0 +1,119 @@
+"""Batched constant-velocity Kalman filter over bounding boxes."""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    """Convert ``(N, 4)`` corner boxes to centre/size form."""
+    out = np.empty_like(boxes, dtype=np.float64)
+    out[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+    out[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+    out[:, 2] = boxes[:, 2] - boxes[:, 0]
+    out[:, 3] = boxes[:, 3] - boxes[:, 1]
+    return out
+
+
+def cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    """Convert ``(N, 4)`` centre/size boxes to corner form."""
+    half = np.maximum(boxes[:, 2:4], 1.0) / 2
+    return np.hstack([boxes[:, 0:2] - half, boxes[:, 0:2] + half])
+
+
+class BoxKalmanFilter:
+    """Kalman filter for many boxes at once.
+
+    The state of each track is ``[cx, cy, w, h, vx, vy, vw, vh]`` with
+    velocities in pixels per second; ``mean`` is ``(N, 8)`` and ``cov`` is
+    ``(N, 8, 8)`` so predict and update run as single NumPy operations over
+    all tracks. Noise weights are ByteTrack's per-frame values scaled by box
+    height; ``nominal_fps`` converts them to per-second rates so the filter
+    behaves the same whatever the actual frame interval.
+    """
+
+    ndim = 4
+
+    def __init__(
+        self,
+        std_position: float = 1.0 / 20,
+        std_velocity: float = 1.0 / 160,
+        nominal_fps: float = 30.0,
+    ):
+        self.std_position = std_position
+        self.std_velocity = std_velocity * nominal_fps
+        self.nominal_fps = nominal_fps
+        self.mean = np.zeros((0, 8))
+        self.cov = np.zeros((0, 8, 8))
+
+    def __len__(self) -> int:
+        return len(self.mean)
+
+    def _scale(self, height: np.ndarray) -> np.ndarray:
+        return np.maximum(height, 1.0)[:, None]
+
+    def initiate(self, measurements: np.ndarray) -> None:
+        """Append new tracks from ``(K, 4)`` ``cxcywh`` measurements."""
+        k = len(measurements)
+        if k == 0:
+            return
+        mean = np.zeros((k, 8))
+        mean[:, :4] = measurements
+        h = self._scale(measurements[:, 3])
+        std = np.hstack(
+            [
+                np.repeat(2 * self.std_position * h, 4, axis=1),
+                np.repeat(10 * self.std_velocity * h, 4, axis=1),
+            ]
+        )
+        cov = np.zeros((k, 8, 8))
+        idx = np.arange(8)
+        cov[:, idx, idx] = std**2
+        self.mean = np.concatenate([self.mean, mean])
+        self.cov = np.concatenate([self.cov, cov])
+
+    def predict(self, dt: float) -> None:
+        """Advance every track by ``dt`` seconds."""
+        if len(self.mean) == 0 or dt <= 0:
+            return
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        h = self._scale(self.mean[:, 3])
+        # noise accumulates per nominal frame elapsed
+        frames = dt * self.nominal_fps
+        var = np.hstack(
+            [
+                np.repeat((self.std_position * h) ** 2, 4, axis=1),
+                np.repeat((self.std_velocity * h) ** 2, 4, axis=1),
+            ]
+        ) * frames
+        self.mean = self.mean @ F.T
+        self.cov = F @ self.cov @ F.T
+        idx = np.arange(8)
+        self.cov[:, idx, idx] += var
+
+    def update(self, index: np.ndarray, measurements: np.ndarray) -> None:
+        """Correct tracks ``index`` with ``(K, 4)`` ``cxcywh`` measurements."""
+        if len(index) == 0:
+            return
+        mean = self.mean[index]
+        cov = self.cov[index]
+        h = self._scale(mean[:, 3])
+        r = np.repeat((self.std_position * h) ** 2, 4, axis=1)
+        S = cov[:, :4, :4].copy()
+        idx = np.arange(4)
+        S[:, idx, idx] += r
+        # K = P H^T S^-1, solved as S^T K^T = H P^T (S is symmetric)
+        gain = np.linalg.solve(S, cov[:, :4, :]).transpose(0, 2, 1)
+        innovation = measurements - mean[:, :4]
+        self.mean[index] = mean + np.einsum("nij,nj->ni", gain, innovation)
+        self.cov[index] = cov - gain @ cov[:, :4, :]
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop every track where ``mask`` is false."""
+        self.mean = self.mean[mask]
+        self.cov = self.cov[mask]
+
+    def boxes(self) -> np.ndarray:
+        """Return the current state as ``(N, 4)`` corner boxes."""
+        return cxcywh_to_xyxy(self.mean[:, :4])
@@ -0,0 +1,110 @@
+"""Turn per-frame detections into vehicle rows."""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .projection import Homography
+from .speed_math import SpeedHistory
+from .summary import SummaryRow, TrackSummaries
+from .tracker_wrapper import BaseTracker
+
+Detection = Tuple[int, int, int, int, float, str]  # x1, y1, x2, y2, conf, label
+Row = Tuple[float, int, str, float, int, int, int, int, float]
+
+
+class FrameProcessor:
+    """Track detections, project centroids and estimate speeds frame by frame.
+
+    :meth:`process` returns one ``vehicles`` row per tracked detection in the
+    column order of :data:`carspeed.io.db.INSERT_VEHICLE`. Speeds are the
+    least-squares fit over the last ``window`` positions of each track, as in
+    ``speed_plugin.c``; tracks unseen for ``decay_time`` seconds are dropped.
+
+    With ``summaries`` every track is also accumulated into a
+    :class:`~carspeed.core.summary.TrackSummaries` tagged with ``source_id``;
+    the summary rows of dropped tracks are collected by :meth:`pop_summaries`
+    and those still open at the end of a stream by :meth:`finish`.
+    """
+
+    def __init__(
+        self,
+        tracker: BaseTracker,
+        ppm: float,
+        decay_time: float = 1.0,
+        window: int = 3,
+        homography: Optional[Union[Homography, Sequence[float]]] = None,
+        homography_lut: bool = False,
+        summaries: bool = False,
+        source_id: int = 0,
+    ):
+        if homography is not None and not isinstance(homography, Homography):
+            homography = Homography(homography)
+        self.tracker = tracker
+        self.ppm = ppm
+        self.decay_time = decay_time
+        self.history = SpeedHistory(window)
+        self.homography = homography
+        self._lut_pending = homography_lut and homography is not None
+        self.summaries = TrackSummaries(ppm, source_id) if summaries else None
+        self._finished: List[SummaryRow] = []
+
+    @property
+    def live_tracks(self) -> int:
+        """Tracks seen within the last ``decay_time`` seconds."""
+        return len(self.history)
+
+    def process(
+        self,
+        detections: Sequence[Detection],
+        ts: float,
+        shape: Optional[Tuple[int, ...]] = None,
+    ) -> List[Row]:
+        """Return the rows for the detections of the frame captured at ``ts``.
+
+        ``shape`` is the frame's ``(height, width, ...)``; it sizes the
+        homography lookup table on the first call when one was requested.
+        """
+        if self._lut_pending and shape is not None:
+            self.homography.build_lut(shape[1], shape[0])
+            self._lut_pending = False
+        trk = self.tracker
+        assignments = trk.track([d[:4] for d in detections], ts, [d[4] for d in detections])
+        kept = []
+        points = []
+        for det, track_id in zip(detections, trk.matches):
+            if track_id < 0:
+                continue  # detection discarded by the tracker
+            kept.append((track_id, det))
+            points.append(assignments[track_id])
+        if self.homography is not None:
+            points = self.homography.project(np.asarray(points, dtype=float).reshape(-1, 2))
+        slots = self.history.push([k[0] for k in kept], points, ts)
+        speeds = self.history.speeds(slots, self.ppm).tolist()
+        if self.summaries is not None:
+            counts = self.history.count[slots].tolist()
+            for (track_id, det), point, speed, n in zip(kept, points, speeds, counts):
+                self.summaries.add(
+                    track_id, ts, point, speed if n >= 2 else None, det[5], det[:4], det[4]
+                )
+        expired = self.history.expire(ts, self.decay_time)
+        if self.summaries is not None and expired:
+            self._finished.extend(self.summaries.finish(expired))
+        return [
+            (ts, track_id, label, speed, x1, y1, x2, y2, conf)
+            for (track_id, (x1, y1, x2, y2, conf, label)), speed in zip(kept, speeds)
+        ]
+
+    def pop_summaries(self) -> List[SummaryRow]:
+        """Return and clear the summary rows of tracks dropped so far."""
+        rows, self._finished = self._finished, []
+        return rows
+
+    def finish(self) -> List[SummaryRow]:
+        """Close every open track and return all pending summary rows."""
+        rows = self.pop_summaries()
+        if self.summaries is not None:
+            rows.extend(self.summaries.finish_all())
+        return rows
@@ -0,0 +1,115 @@
+"""Planar homography projection of image points."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - PyYAML is optional
+    yaml = None
+
+
+def load_matrix(path: str) -> np.ndarray:
+    """Read a 3x3 homography from a JSON/YAML file.
+
+    The file holds either the matrix itself (nested or flat) or a mapping with
+    a ``homography``, ``matrix`` or ``H`` entry.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        if Path(path).suffix.lower() in {".yml", ".yaml"}:
+            if yaml is None:
+                raise RuntimeError("PyYAML is required to read YAML homography files")
+            data = yaml.safe_load(fh)
+        else:
+            data = json.load(fh)
+
+    if isinstance(data, dict):
+        data = data.get("homography") or data.get("matrix") or data.get("H")
+    if data is None:
+        raise ValueError("homography file must contain a 3x3 matrix")
+
+    flat = []
+    for row in data:
+        if isinstance(row, (list, tuple)):
+            flat.extend(row)
+        else:
+            flat.append(row)
+    if len(flat) != 9:
+        raise ValueError("homography must have 9 values")
+    return np.array(flat, dtype=np.float64).reshape(3, 3)
+
+
+class Homography:
+    """A 3x3 image-to-ground homography applied to many points at once.
+
+    :meth:`project` maps an ``(N, 2)`` array in one matrix product. For fixed
+    resolution cameras :meth:`build_lut` precomputes the ground position of
+    every pixel so projection becomes a table lookup at nearest-pixel
+    precision; points outside the table fall back to the exact product.
+    """
+
+    def __init__(self, matrix: Sequence[float]):
+        self.matrix = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        self._lut: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_file(cls, path: str) -> "Homography":
+        """Load a homography written by the calibration tools."""
+        return cls(load_matrix(path))
+
+    def to_property(self) -> str:
+        """Return the row-major comma-separated form used by ``speedtrack``."""
+        return ",".join(str(float(v)) for v in self.matrix.ravel())
+
+    def project(self, points: np.ndarray) -> np.ndarray:
+        """Project ``(N, 2)`` image points to the ground plane.
+
+        Points whose homogeneous scale is zero are returned unchanged.
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self._lut is not None and len(pts):
+            return self._lookup(pts)
+        return self._exact(pts)
+
+    def _exact(self, pts: np.ndarray) -> np.ndarray:
+        H = self.matrix
+        tx = H[0, 0] * pts[:, 0] + H[0, 1] * pts[:, 1] + H[0, 2]
+        ty = H[1, 0] * pts[:, 0] + H[1, 1] * pts[:, 1] + H[1, 2]
+        tz = H[2, 0] * pts[:, 0] + H[2, 1] * pts[:, 1] + H[2, 2]
+        ok = tz != 0
+        safe = np.where(ok, tz, 1.0)
+        return np.where(ok[:, None], np.stack([tx / safe, ty / safe], axis=1), pts)
+
+    def project_boxes(self, boxes: np.ndarray, footpoint: bool = False) -> np.ndarray:
+        """Project the centre (or bottom-centre footpoint) of ``(N, 4)`` boxes."""
+        b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        y = b[:, 3] if footpoint else (b[:, 1] + b[:, 3]) / 2
+        return self.project(np.stack([(b[:, 0] + b[:, 2]) / 2, y], axis=1))
+
+    def build_lut(self, width: int, height: int) -> None:
+        """Precompute projections for every pixel of a ``width`` x ``height`` frame."""
+        ys, xs = np.mgrid[0:height, 0:width]
+        grid = np.stack([xs.ravel(), ys.ravel()], axis=1).astype(np.float64)
+        self._lut = self._exact(grid).astype(np.float32).reshape(height, width, 2)
+
+    def drop_lut(self) -> None:
+        """Release the lookup table and go back to exact projection."""
+        self._lut = None
+
+    def _lookup(self, pts: np.ndarray) -> np.ndarray:
+        lut = self._lut
+        assert lut is not None
+        height, width = lut.shape[:2]
+        ix = np.rint(pts[:, 0]).astype(np.int64)
+        iy = np.rint(pts[:, 1]).astype(np.int64)
+        inside = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+        out = np.empty_like(pts)
+        out[inside] = lut[iy[inside], ix[inside]]
+        if not inside.all():
+            out[~inside] = self._exact(pts[~inside])
+        return out
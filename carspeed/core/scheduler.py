@@ -0,0 +1,65 @@
+"""Adaptive detector scheduling driven by traffic density."""
+
+from __future__ import annotations
+
+import threading
+
+
+class AdaptiveInterval:
+    """Decide on which frames the detector runs.
+
+    While at least ``busy_tracks`` tracks are active the detector runs every
+    ``min_interval`` frames. Each :meth:`update` that sees a quieter scene
+    doubles the interval, up to ``max_interval``, and the tracker carries the
+    remaining tracks through the skipped frames. Any return to
+    ``busy_tracks`` drops straight back to ``min_interval`` so vehicles get
+    full-rate samples while they are measured.
+
+    ``max_interval == min_interval`` disables the adaptation.
+
+    :meth:`should_detect` and :meth:`update` may run on different threads:
+    the staged pipelines of :mod:`carspeed.io.capture` decide on the reading
+    or detecting thread and update from the tracking thread, so both take a
+    lock. There the interval reacts to a frame's tracks only once the frame
+    has passed the queues in between, up to their ``queue_size`` frames
+    later than when running everything on one thread.
+    """
+
+    def __init__(self, min_interval: int = 1, max_interval: int = 1, busy_tracks: int = 1):
+        if min_interval < 1 or max_interval < min_interval:
+            raise ValueError("intervals need 1 <= min_interval <= max_interval")
+        if busy_tracks < 1:
+            raise ValueError("busy_tracks must be >= 1")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.busy_tracks = busy_tracks
+        self.interval = min_interval
+        self.frames = 0
+        self.detections = 0
+        self._since = min_interval  # run on the first frame
+        self._lock = threading.Lock()
+
+    def should_detect(self) -> bool:
+        """Advance one frame and return whether the detector runs on it."""
+        with self._lock:
+            self.frames += 1
+            if self._since >= self.interval:
+                self._since = 1
+                self.detections += 1
+                return True
+            self._since += 1
+            return False
+
+    def update(self, active_tracks: int) -> int:
+        """Adapt the interval to ``active_tracks`` and return it."""
+        with self._lock:
+            if active_tracks >= self.busy_tracks:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * 2)
+            return self.interval
+
+    @property
+    def skipped(self) -> int:
+        """Frames on which the detector did not run."""
+        return self.frames - self.detections
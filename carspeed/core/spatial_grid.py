@@ -0,0 +1,61 @@
+"""Uniform grid index used to prune detection/track pairs before scoring."""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def _cell_keys(boxes: np.ndarray, cell_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(owner, key)`` with one entry per grid cell each box touches."""
+    x0 = np.floor(boxes[:, 0] / cell_size).astype(np.int64)
+    y0 = np.floor(boxes[:, 1] / cell_size).astype(np.int64)
+    x1 = np.maximum(np.floor(boxes[:, 2] / cell_size).astype(np.int64), x0)
+    y1 = np.maximum(np.floor(boxes[:, 3] / cell_size).astype(np.int64), y0)
+    nx = x1 - x0 + 1
+    counts = nx * (y1 - y0 + 1)
+    owner = np.repeat(np.arange(len(boxes)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    nx_rep = nx[owner]
+    cx = x0[owner] + offset % nx_rep
+    cy = y0[owner] + offset // nx_rep
+    return owner, (cy << 32) ^ (cx & 0xFFFFFFFF)
+
+
+def grid_pairs(
+    boxes_a: np.ndarray, boxes_b: np.ndarray, cell_size: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(rows, cols)`` of box pairs sharing at least one grid cell.
+
+    Every pair of boxes with a positive-area intersection shares a cell, so no
+    overlapping pair is lost; the cost is proportional to the number of cells
+    touched plus the number of nearby pairs instead of ``len(a) * len(b)``.
+    """
+    if cell_size <= 0:
+        raise ValueError("cell_size must be positive")
+    empty = np.empty(0, dtype=np.int64)
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return empty, empty
+
+    owner_a, key_a = _cell_keys(boxes_a, cell_size)
+    owner_b, key_b = _cell_keys(boxes_b, cell_size)
+    order = np.argsort(key_b, kind="stable")
+    key_b = key_b[order]
+    owner_b = owner_b[order]
+
+    lo = np.searchsorted(key_b, key_a, side="left")
+    hi = np.searchsorted(key_b, key_a, side="right")
+    counts = hi - lo
+    total = counts.sum()
+    if total == 0:
+        return empty, empty
+    rows = np.repeat(owner_a, counts)
+    idx = np.repeat(lo, counts) + (
+        np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    cols = owner_b[idx]
+
+    # boxes spanning several cells produce duplicate pairs
+    pair = np.unique(rows * len(boxes_b) + cols)
+    return pair // len(boxes_b), pair % len(boxes_b)
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+from collections import deque
 from math import hypot
-from typing import List, Sequence, Tuple
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 Point = Tuple[float, float]
 
@@ -47,3 +50,187 @@ def rolling_speed(
             smooth.append(sum(speeds[start : i + 1]) / (i - start + 1))
         speeds = smooth
     return speeds
+
+
+class RollingSpeed:
+    """Streaming equivalent of :func:`rolling_speed` for a single track.
+
+    Samples are fed one at a time; a running sum over the last ``window``
+    instantaneous speeds makes each :meth:`update` O(1).
+    """
+
+    def __init__(self, ppm: float, window: int = 1):
+        self.ppm = ppm
+        self.window = max(1, window)
+        self._speeds: Deque[float] = deque()
+        self._sum = 0.0
+        self._prev: Optional[Tuple[Point, float]] = None
+
+    def update(self, point: Point, ts: float) -> Optional[float]:
+        """Add a sample and return the smoothed speed, or ``None`` for the first."""
+        prev = self._prev
+        self._prev = (point, ts)
+        if prev is None:
+            return None
+        v = instant_speed(prev[0], point, ts - prev[1], self.ppm)
+        self._speeds.append(v)
+        self._sum += v
+        if len(self._speeds) > self.window:
+            self._sum -= self._speeds.popleft()
+        return self._sum / len(self._speeds)
+
+
+def rolling_speed_array(
+    centroids: np.ndarray, timestamps: np.ndarray, ppm: float, window: int = 1
+) -> np.ndarray:
+    """Vectorised :func:`rolling_speed` for ``(N, 2)`` centroid arrays.
+
+    The window average is taken from a cumulative sum, so the cost is linear
+    in the number of samples regardless of ``window``.
+    """
+    pts = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+    ts = np.asarray(timestamps, dtype=np.float64)
+    if len(pts) != len(ts):
+        raise ValueError("centroids and timestamps must align")
+    if len(pts) < 2:
+        return np.zeros(0)
+
+    step = np.diff(pts, axis=0)
+    dt = np.diff(ts)
+    dist = np.hypot(step[:, 0], step[:, 1]) / ppm
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speeds = np.where(dt > 0, dist / dt, 0.0)
+    if window <= 1:
+        return speeds
+
+    csum = np.concatenate([[0.0], np.cumsum(speeds)])
+    end = np.arange(1, len(speeds) + 1)
+    start = np.maximum(0, end - window)
+    return (csum[end] - csum[start]) / (end - start)
+
+
+def regression_speed(
+    centroids: Sequence[Point], timestamps: Sequence[float], ppm: float
+) -> float:
+    """Speed from a least-squares line fit of position over time.
+
+    Port of ``history_speed`` in ``speed_plugin.c``: the slopes of ``x(t)``
+    and ``y(t)`` give the velocity, returned in meters/second.
+    """
+    n = len(centroids)
+    if n != len(timestamps):
+        raise ValueError("centroids and timestamps must align")
+    if n < 2:
+        return 0.0
+    mean_t = sum(timestamps) / n
+    mean_x = sum(c[0] for c in centroids) / n
+    mean_y = sum(c[1] for c in centroids) / n
+    num_x = num_y = den = 0.0
+    for (x, y), t in zip(centroids, timestamps):
+        dt = t - mean_t
+        num_x += dt * (x - mean_x)
+        num_y += dt * (y - mean_y)
+        den += dt * dt
+    if den == 0.0:
+        return 0.0
+    return hypot(num_x / den, num_y / den) / ppm
+
+
+class SpeedHistory:
+    """Ring buffers of recent positions for many tracks in one array.
+
+    Samples live in a preallocated ``(tracks, window, 3)`` array of
+    ``x, y, ts``; :meth:`speeds` fits the regression of
+    :func:`regression_speed` for every requested track in one vectorised
+    call, so per-frame cost stays flat as the number of tracks grows. Slots of
+    expired tracks are recycled.
+    """
+
+    def __init__(self, window: int = 3, capacity: int = 64):
+        self.window = max(2, window)
+        capacity = max(1, capacity)
+        self.buf = np.zeros((capacity, self.window, 3))
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.head = np.zeros(capacity, dtype=np.int64)
+        self.last_ts = np.zeros(capacity)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _grow(self) -> None:
+        old = len(self.count)
+        for name in ("buf", "count", "head", "last_ts", "ids", "active"):
+            arr = getattr(self, name)
+            grown = np.zeros((old * 2,) + arr.shape[1:], dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self._free.extend(range(old * 2 - 1, old - 1, -1))
+
+    def slots(self, track_ids: Sequence[int]) -> np.ndarray:
+        """Return the buffer rows of ``track_ids``, allocating new ones."""
+        out = np.empty(len(track_ids), dtype=np.int64)
+        for i, tid in enumerate(track_ids):
+            slot = self._slots.get(tid)
+            if slot is None:
+                if not self._free:
+                    self._grow()
+                slot = self._free.pop()
+                self._slots[tid] = slot
+                self.count[slot] = 0
+                self.head[slot] = 0
+                self.ids[slot] = tid
+                self.active[slot] = True
+            out[i] = slot
+        return out
+
+    def push(self, track_ids: Sequence[int], points: np.ndarray, ts: float) -> np.ndarray:
+        """Append one ``(K, 2)`` position per track observed at ``ts``.
+
+        Returns the rows written, for use with :meth:`speeds`.
+        """
+        slots = self.slots(track_ids)
+        if len(slots):
+            head = self.head[slots]
+            self.buf[slots, head, 0:2] = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            self.buf[slots, head, 2] = ts
+            self.head[slots] = (head + 1) % self.window
+            self.count[slots] = np.minimum(self.count[slots] + 1, self.window)
+            self.last_ts[slots] = ts
+        return slots
+
+    def speeds(self, slots: np.ndarray, ppm: float) -> np.ndarray:
+        """Regression speed in meters/second for each row in ``slots``."""
+        buf = self.buf[slots]
+        n = self.count[slots].astype(np.float64)
+        # rows fill from index 0, so the first ``count`` entries are valid
+        valid = np.arange(self.window)[None, :] < self.count[slots][:, None]
+        safe_n = np.maximum(n, 1.0)[:, None]
+        mean = (buf * valid[..., None]).sum(axis=1) / safe_n
+        d = (buf - mean[:, None, :]) * valid[..., None]
+        dt = d[..., 2]
+        den = (dt * dt).sum(axis=1)
+        num_x = (dt * d[..., 0]).sum(axis=1)
+        num_y = (dt * d[..., 1]).sum(axis=1)
+        ok = (n >= 2) & (den != 0.0)
+        safe_den = np.where(ok, den, 1.0)
+        speed = np.hypot(num_x / safe_den, num_y / safe_den) / ppm
+        return np.where(ok, speed, 0.0)
+
+    def expire(self, ts: float, max_age: float) -> List[int]:
+        """Release tracks without samples in the last ``max_age`` seconds."""
+        slots = np.flatnonzero(self.active & (ts - self.last_ts > max_age))
+        stale = self.ids[slots].tolist()
+        self.discard(stale)
+        return stale
+
+    def discard(self, track_ids: Sequence[int]) -> None:
+        """Forget ``track_ids`` and recycle their rows."""
+        for tid in track_ids:
+            slot = self._slots.pop(tid, None)
+            if slot is not None:
+                self.active[slot] = False
+                self._free.append(slot)
@@ -0,0 +1,122 @@
+"""Per-vehicle summaries written once a track expires."""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# which rows a run writes: per-frame ``vehicles`` rows, per-vehicle summaries or both
+ROW_MODES = ("raw", "summary", "both")
+
+Point = Tuple[float, float]
+# source_id, track_id, label, entry_ts, exit_ts, distance, mean_speed,
+# median_speed, max_speed, samples, x1, y1, x2, y2, confidence
+SummaryRow = Tuple[
+    int, int, str, float, float, float, float, float, float, int, int, int, int, int, float
+]
+
+
+class VehicleSummary:
+    """Running statistics of one track."""
+
+    __slots__ = ("entry", "exit", "last", "distance", "speeds", "samples", "conf", "box", "label")
+
+    def __init__(self, ts: float, point: Point):
+        self.entry = self.exit = ts
+        self.last = point
+        self.distance = 0.0
+        self.speeds: List[float] = []
+        self.samples = 0
+        self.conf = -1.0
+        self.box: Sequence[int] = (0, 0, 0, 0)
+        self.label = ""
+
+    def add(
+        self,
+        ts: float,
+        point: Point,
+        speed: Optional[float],
+        label: str,
+        box: Sequence[int],
+        conf: float,
+    ) -> None:
+        """Add one observation; ``speed`` is ``None`` until it can be estimated."""
+        self.distance += math.hypot(point[0] - self.last[0], point[1] - self.last[1])
+        self.last = point
+        self.exit = ts
+        self.samples += 1
+        if speed is not None:
+            self.speeds.append(speed)
+        if conf > self.conf:
+            self.conf = conf
+            self.box = box
+            self.label = label
+
+
+class TrackSummaries:
+    """Accumulate :class:`VehicleSummary` objects and emit them as rows.
+
+    Distances are path lengths in the (projected) position space divided by
+    ``ppm``, like the speeds. Rows have the columns of
+    :data:`carspeed.io.db.INSERT_SUMMARY`; tracks that never got a speed
+    estimate (fewer than two samples) are not reported.
+    """
+
+    def __init__(self, ppm: float, source_id: int = 0):
+        self.ppm = ppm
+        self.source_id = source_id
+        self._tracks: Dict[int, VehicleSummary] = {}
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def add(
+        self,
+        track_id: int,
+        ts: float,
+        point: Point,
+        speed: Optional[float],
+        label: str,
+        box: Sequence[int],
+        conf: float,
+    ) -> None:
+        summary = self._tracks.get(track_id)
+        if summary is None:
+            summary = self._tracks[track_id] = VehicleSummary(ts, point)
+        summary.add(ts, point, speed, label, box, conf)
+
+    def _row(self, track_id: int, s: VehicleSummary) -> SummaryRow:
+        speeds = np.asarray(s.speeds, dtype=np.float64)
+        x1, y1, x2, y2 = (int(v) for v in s.box)
+        return (
+            self.source_id,
+            track_id,
+            s.label,
+            s.entry,
+            s.exit,
+            s.distance / self.ppm,
+            float(speeds.mean()),
+            float(np.median(speeds)),
+            float(speeds.max()),
+            s.samples,
+            x1,
+            y1,
+            x2,
+            y2,
+            s.conf,
+        )
+
+    def finish(self, track_ids: Sequence[int]) -> List[SummaryRow]:
+        """Close ``track_ids`` and return the rows of those with a speed."""
+        rows = []
+        for tid in track_ids:
+            summary = self._tracks.pop(tid, None)
+            if summary is not None and summary.speeds:
+                rows.append(self._row(tid, summary))
+        return rows
+
+    def finish_all(self) -> List[SummaryRow]:
+        """Close every open track, as at the end of a stream."""
+        return self.finish(list(self._tracks))
@@ -0,0 +1,99 @@
+"""Compact struct-of-arrays storage for live tracks."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import List, Sequence
+
+import numpy as np
+
+
+class TrackStore:
+    """Fixed-width arrays holding every live track, indexed by slot.
+
+    Boxes, centres, timestamps and ids live in preallocated NumPy arrays so an
+    update writes in place instead of allocating per-detection objects. Slots
+    of expired tracks go onto a free-list and are recycled by later tracks;
+    the arrays double in size only when the free-list runs dry.
+
+    Expiry is driven by an ordered map of slots sorted by ``last_ts`` (every
+    touch moves a slot to the back), so removing stale tracks only visits the
+    tracks that actually expire.
+    """
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(1, int(capacity))
+        self.boxes = np.zeros((capacity, 4), dtype=np.float64)
+        self.centers = np.zeros((capacity, 2), dtype=np.float64)
+        self.last_ts = np.zeros(capacity, dtype=np.float64)
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._order: "OrderedDict[int, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def capacity(self) -> int:
+        """Number of allocated slots."""
+        return len(self.ids)
+
+    def _grow(self) -> None:
+        old = self.capacity
+        new = old * 2
+        for name in ("boxes", "centers", "last_ts", "ids", "alive"):
+            arr = getattr(self, name)
+            grown = np.zeros((new,) + arr.shape[1:], dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self.ids[old:] = -1
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def allocate(self, count: int) -> np.ndarray:
+        """Reserve ``count`` free slots and return their indices."""
+        while len(self._free) < count:
+            self._grow()
+        slots = [self._free.pop() for _ in range(count)]
+        return np.asarray(slots, dtype=np.int64)
+
+    def write(
+        self, slots: np.ndarray, boxes: np.ndarray, ts: float, ids: Sequence[int] = ()
+    ) -> None:
+        """Store ``boxes`` observed at ``ts`` into ``slots``.
+
+        ``ids`` is only given for freshly allocated slots.
+        """
+        if len(slots) == 0:
+            return
+        self.boxes[slots] = boxes
+        self.centers[slots, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+        self.centers[slots, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+        self.last_ts[slots] = ts
+        if len(ids):
+            self.ids[slots] = ids
+            self.alive[slots] = True
+        order = self._order
+        for slot in slots.tolist():
+            order[slot] = None
+            order.move_to_end(slot)
+
+    def expire(self, ts: float, decay_time: float) -> int:
+        """Drop tracks not updated within ``decay_time`` of ``ts``."""
+        order = self._order
+        removed = 0
+        while order:
+            slot = next(iter(order))
+            if ts - self.last_ts[slot] <= decay_time:
+                break
+            del order[slot]
+            self.alive[slot] = False
+            self.ids[slot] = -1
+            self._free.append(slot)
+            removed += 1
+        return removed
+
+    def live_slots(self) -> np.ndarray:
+        """Return the slots of all live tracks, oldest track id first."""
+        slots = np.flatnonzero(self.alive)
+        return slots[np.argsort(self.ids[slots], kind="stable")]
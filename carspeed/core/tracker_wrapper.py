@@ -1,19 +1,87 @@
-"""Abstract interface for tracker implementations."""
+"""Abstract interface for tracker implementations and the tracker registry."""
 
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
 
 
 Point = Tuple[float, float]
 Box = Tuple[int, int, int, int]
+TimingHook = Callable[[str, float, int], None]
+T = TypeVar("T", bound="BaseTracker")
+
+_REGISTRY: Dict[str, Type["BaseTracker"]] = {}
 
 
 class BaseTracker(ABC):
-    """Interface for tracker wrappers."""
+    """Interface for tracker wrappers.
+
+    After each :meth:`update`, ``matches`` holds the track id assigned to every
+    input box in order, or ``-1`` for boxes the tracker discarded.
+    """
+
+    name = "base"
+    timing_hook: Optional[TimingHook] = None
+
+    def __init__(self) -> None:
+        self.matches: List[int] = []
 
     @abstractmethod
-    def update(self, boxes: List[Box], ts: float) -> Dict[int, Point]:
-        """Update with detections and return mapping of track id to centroid."""
+    def update(
+        self, boxes: List[Box], ts: float, scores: Optional[Sequence[float]] = None
+    ) -> Dict[int, Point]:
+        """Update with detections and return mapping of track id to centroid.
+
+        ``scores`` holds one detection confidence per box; trackers that do not
+        use confidences ignore it.
+        """
         raise NotImplementedError
+
+    def track(
+        self, boxes: List[Box], ts: float, scores: Optional[Sequence[float]] = None
+    ) -> Dict[int, Point]:
+        """Run :meth:`update` and report its duration to ``timing_hook``.
+
+        The hook is called as ``hook(name, seconds, len(boxes))``.
+        """
+        if self.timing_hook is None:
+            return self.update(boxes, ts, scores)
+        start = perf_counter()
+        result = self.update(boxes, ts, scores)
+        self.timing_hook(self.name, perf_counter() - start, len(boxes))
+        return result
+
+
+def register_tracker(name: str) -> Callable[[Type[T]], Type[T]]:
+    """Class decorator registering a tracker under ``name``."""
+
+    def decorator(cls: Type[T]) -> Type[T]:
+        cls.name = name
+        _REGISTRY[name] = cls
+        return cls
+
+    return decorator
+
+
+def _load_builtin() -> None:
+    from . import bytetrack, centroid_tracker, iou_tracker  # noqa: F401
+
+
+def available_trackers() -> List[str]:
+    """Return the names of all registered trackers."""
+    _load_builtin()
+    return sorted(_REGISTRY)
+
+
+def create_tracker(name: str, **kwargs: Any) -> BaseTracker:
+    """Instantiate the tracker registered as ``name`` with ``kwargs``."""
+    _load_builtin()
+    try:
+        cls = _REGISTRY[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown tracker {name!r}; choose from {sorted(_REGISTRY)}"
+        ) from None
+    return cls(**kwargs)
@@ -0,0 +1,454 @@
+"""Threaded capture, detection and tracking for the OpenCV path."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.detector import Detector
+from ..core.processor import Detection, FrameProcessor, Row
+from ..core.scheduler import AdaptiveInterval
+from ..core.summary import SummaryRow
+from .db import BACKPRESSURE_POLICIES
+
+Stage = Tuple[str, Callable[[Any], Any]]
+Detected = Tuple[int, float, Optional[Tuple[int, ...]], Sequence[Detection]]
+
+_END = object()
+_TIMEOUT = object()
+
+
+class StageQueue:
+    """Bounded hand-off between two pipeline stages.
+
+    A full queue applies ``policy`` like :class:`carspeed.io.db.AsyncWriter`:
+    ``"block"`` waits for room, ``"drop-oldest"`` discards the oldest queued
+    item (the stale frame on a live stream) and ``"drop-newest"`` discards the
+    incoming one. ``depth``, ``max_depth``, ``items`` and ``dropped`` can be
+    polled at any time.
+    """
+
+    def __init__(self, name: str, maxsize: int = 4, policy: str = "block"):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(BACKPRESSURE_POLICIES)}")
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.items = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._queue: Deque[Any] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._aborted = False
+
+    @property
+    def depth(self) -> int:
+        """Items currently waiting in the queue."""
+        return len(self._queue)
+
+    @property
+    def aborted(self) -> bool:
+        return self._aborted
+
+    def put(self, item: Any) -> None:
+        """Queue ``item`` according to the policy; a no-op once aborted."""
+        with self._cond:
+            queue = self._queue
+            if len(queue) >= self.maxsize:
+                if self.policy == "drop-newest":
+                    self.dropped += 1
+                    return
+                if self.policy == "drop-oldest":
+                    queue.popleft()
+                    self.dropped += 1
+                else:
+                    while len(queue) >= self.maxsize and not self._aborted:
+                        self._cond.wait()
+            if self._aborted:
+                return
+            queue.append(item)
+            self.items += 1
+            self.max_depth = max(self.max_depth, len(queue))
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Return the next item, or the end marker once closed and drained.
+
+        With ``timeout`` an internal timeout marker is returned when nothing
+        arrives in time.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or self._closed, timeout):
+                return _TIMEOUT
+            if self._aborted or not self._queue:
+                return _END
+            item = self._queue.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self) -> None:
+        """Mark the end of the stream; queued items are still delivered."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self) -> None:
+        """Discard queued items and wake every waiting producer and consumer."""
+        with self._cond:
+            self._closed = self._aborted = True
+            self._queue.clear()
+            self._cond.notify_all()
+
+
+class StagePipeline:
+    """Run a source and a chain of stages concurrently.
+
+    ``source`` is iterated in a reader thread and every stage except the last
+    runs in its own thread, each fed by a :class:`StageQueue`. The last stage
+    (the sink) runs in the thread calling :meth:`run`, so it may own objects
+    such as SQLite connections that must stay on that thread. A stage that
+    returns ``None`` drops the item. The first exception raised anywhere stops
+    all stages and is re-raised by :meth:`run`.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any],
+        stages: Sequence[Stage],
+        maxsize: int = 4,
+        policies: Optional[Sequence[str]] = None,
+    ):
+        if not stages:
+            raise ValueError("need at least one stage")
+        policies = list(policies) if policies is not None else ["block"] * len(stages)
+        if len(policies) != len(stages):
+            raise ValueError("need one queue policy per stage")
+        self.source = source
+        self.stages = list(stages)
+        self.queues = [
+            StageQueue(name, maxsize, policy) for (name, _), policy in zip(stages, policies)
+        ]
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def _fail(self, exc: BaseException) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = exc
+        for queue in self.queues:
+            queue.abort()
+
+    def _read(self) -> None:
+        out = self.queues[0]
+        source = iter(self.source)
+        try:
+            for item in source:
+                if out.aborted:
+                    break
+                out.put(item)
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            out.close()
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()  # stop generator sources, such as BatchCollector, right away
+
+    def _work(self, fn: Callable[[Any], Any], src: StageQueue, out: StageQueue) -> None:
+        try:
+            while True:
+                item = src.get()
+                if item is _END:
+                    break
+                result = fn(item)
+                if result is not None:
+                    out.put(result)
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            out.close()
+
+    def run(self) -> None:
+        """Process the whole source and wait for every stage to finish."""
+        threads = [threading.Thread(target=self._read, name="carspeed-read", daemon=True)]
+        for (name, fn), src, out in zip(self.stages, self.queues, self.queues[1:]):
+            threads.append(
+                threading.Thread(
+                    target=self._work, args=(fn, src, out), name=f"carspeed-{name}", daemon=True
+                )
+            )
+        for thread in threads:
+            thread.start()
+        sink = self.stages[-1][1]
+        try:
+            while True:
+                item = self.queues[-1].get()
+                if item is _END:
+                    break
+                sink(item)
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def read_frames(cap: Any, clock: Callable[[], float] = time.time) -> Iterator[Tuple[float, Any]]:
+    """Yield ``(ts, frame)`` from a ``cv2.VideoCapture`` until ``read`` fails.
+
+    ``ts`` is taken right after the read, before any queueing delay.
+    """
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        yield clock(), frame
+
+
+def run_stream(
+    frames: Iterable[Tuple[float, Any]],
+    detect: Callable[[Any], Sequence[Detection]],
+    processor: FrameProcessor,
+    sink: Callable[[List[Row]], None],
+    scheduler: Optional[AdaptiveInterval] = None,
+    staged: bool = False,
+    queue_size: int = 4,
+    frame_policy: str = "block",
+    on_detections: Optional[Callable[[float, Sequence[Detection]], None]] = None,
+    summary_sink: Optional[Callable[[List[SummaryRow]], None]] = None,
+) -> List[StageQueue]:
+    """Detect, track and store every ``(ts, frame)`` of ``frames``.
+
+    ``detect`` maps a frame to :data:`~carspeed.core.processor.Detection`
+    tuples and ``sink`` receives the rows of each detected frame. With
+    ``staged`` reading, detection and tracking overlap in a
+    :class:`StagePipeline` whose queues are returned for their counters;
+    ``frame_policy`` applies to the frames waiting for the detector, where
+    ``"drop-oldest"`` keeps latency bounded on live streams. Otherwise every
+    step runs in turn on the calling thread and no queues are returned.
+
+    ``on_detections(ts, detections)`` sees the raw detector output of every
+    detected frame, in order. Items of ``frames`` need not be images: without
+    a ``shape`` they are handed to ``detect`` as they are, which lets cached
+    detections be replayed with an identity ``detect``.
+
+    ``summary_sink`` receives the per-vehicle rows of a ``processor`` built
+    with ``summaries``, from the sink's thread as tracks expire and once
+    more for the tracks still open when ``frames`` ends.
+
+    When ``staged``, ``scheduler`` decides on the detect thread and is
+    updated on the track thread, so its interval trails the tracks by the
+    frames queued in between (see :class:`AdaptiveInterval`).
+    """
+    scheduler = scheduler if scheduler is not None else AdaptiveInterval()
+
+    def infer(item: Tuple[float, Any]) -> Optional[Tuple[float, Optional[Tuple[int, ...]], Any]]:
+        ts, frame = item
+        if not scheduler.should_detect():
+            return None  # tracks live on until decay_time without detections
+        return ts, getattr(frame, "shape", None), detect(frame)
+
+    def track(
+        item: Tuple[float, Optional[Tuple[int, ...]], Sequence[Detection]]
+    ) -> Tuple[List[Row], List[SummaryRow]]:
+        ts, shape, detections = item
+        if on_detections is not None:
+            on_detections(ts, detections)
+        rows = processor.process(detections, ts, shape)
+        # vehicles missed on this frame are still being measured
+        scheduler.update(processor.live_tracks)
+        return rows, processor.pop_summaries()
+
+    def write(item: Tuple[List[Row], List[SummaryRow]]) -> None:
+        rows, summaries = item
+        sink(rows)
+        if summaries and summary_sink is not None:
+            summary_sink(summaries)
+
+    queues: List[StageQueue] = []
+    if not staged:
+        for item in frames:
+            found = infer(item)
+            if found is not None:
+                write(track(found))
+    else:
+        pipeline = StagePipeline(
+            frames,
+            [("detect", infer), ("track", track), ("sink", write)],
+            maxsize=queue_size,
+            policies=(frame_policy, "block", "block"),
+        )
+        pipeline.run()
+        queues = pipeline.queues
+    if summary_sink is not None:
+        remaining = processor.finish()
+        if remaining:
+            summary_sink(remaining)
+    return queues
+
+
+class BatchCollector:
+    """Merge the frames of several sources into detector batches.
+
+    Every source is read by its own thread into one bounded
+    :class:`StageQueue` (``maxsize``/``policy`` as in :class:`StageQueue`).
+    Iterating yields lists of up to ``batch_size`` ``(source, ts, frame)``
+    items, in arrival order and so in order per source. A batch is handed
+    over once full or ``max_latency`` seconds after its first frame was
+    taken, whichever comes first, so a quiet stream never waits for a full
+    batch. Frames a source's scheduler skips never enter the queue.
+    ``batches`` and ``frames`` count what was produced.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[Iterable[Tuple[float, Any]]],
+        batch_size: int = 8,
+        max_latency: float = 0.05,
+        maxsize: int = 16,
+        policy: str = "block",
+        schedulers: Optional[Sequence[AdaptiveInterval]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if batch_size < 1 or max_latency < 0:
+            raise ValueError("need batch_size >= 1 and max_latency >= 0")
+        if schedulers is not None and len(schedulers) != len(sources):
+            raise ValueError("need one scheduler per source")
+        self.sources = list(sources)
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.schedulers = schedulers
+        self.clock = clock
+        self.queue = StageQueue("frames", max(maxsize, batch_size), policy)
+        self.batches = 0
+        self.frames = 0
+        self._live = len(self.sources)
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    def _read(self, index: int, source: Iterable[Tuple[float, Any]]) -> None:
+        scheduler = self.schedulers[index] if self.schedulers is not None else None
+        try:
+            for ts, frame in source:
+                if self.queue.aborted:
+                    break
+                if scheduler is not None and not scheduler.should_detect():
+                    continue  # tracks live on until decay_time without detections
+                self.queue.put((index, ts, frame))
+        except BaseException as exc:
+            with self._lock:
+                if self._error is None:
+                    self._error = exc
+            self.queue.abort()
+        finally:
+            with self._lock:
+                self._live -= 1
+                if not self._live:
+                    self.queue.close()
+
+    def __iter__(self) -> Iterator[List[Tuple[int, float, Any]]]:
+        threads = [
+            threading.Thread(
+                target=self._read, args=(idx, src), name=f"carspeed-read-{idx}", daemon=True
+            )
+            for idx, src in enumerate(self.sources)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            done = False
+            while not done:
+                item = self.queue.get()
+                if item is _END:
+                    break
+                batch = [item]
+                deadline = self.clock() + self.max_latency
+                while len(batch) < self.batch_size:
+                    item = self.queue.get(timeout=max(0.0, deadline - self.clock()))
+                    if item is _TIMEOUT:
+                        break
+                    if item is _END:
+                        done = True
+                        break
+                    batch.append(item)
+                self.batches += 1
+                self.frames += len(batch)
+                yield batch
+        finally:
+            self.queue.abort()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def run_batched(
+    sources: Sequence[Iterable[Tuple[float, Any]]],
+    detector: Detector,
+    processors: Sequence[FrameProcessor],
+    sink: Callable[[int, List[Row]], None],
+    batch_size: int = 8,
+    max_latency: float = 0.05,
+    schedulers: Optional[Sequence[AdaptiveInterval]] = None,
+    queue_size: int = 16,
+    frame_policy: str = "block",
+    on_detections: Optional[Callable[[int, float, Sequence[Detection]], None]] = None,
+    summary_sink: Optional[Callable[[int, List[SummaryRow]], None]] = None,
+) -> Tuple[BatchCollector, List[StageQueue]]:
+    """Detect frames of one or more sources in batches and track them per source.
+
+    A :class:`BatchCollector` feeds one ``detector.detect_batch`` call per
+    batch; the results are fanned out to ``processors[source]``, each with
+    its own tracker and speed history, and ``sink(source, rows)`` receives
+    the rows of every detected frame on the calling thread.
+    ``schedulers[source]`` decides which frames of each source are detected.
+    ``summary_sink(source, summaries)`` gets the per-vehicle rows as in
+    :func:`run_stream`. Returns the collector and the pipeline queues for their counters.
+    """
+    if len(processors) != len(sources):
+        raise ValueError("need one processor per source")
+    collector = BatchCollector(
+        sources, batch_size, max_latency, queue_size, frame_policy, schedulers
+    )
+
+    def infer(batch: List[Tuple[int, float, Any]]) -> List[Detected]:
+        results = detector.detect_batch([frame for _, _, frame in batch])
+        return [
+            (idx, ts, getattr(frame, "shape", None), detections)
+            for (idx, ts, frame), detections in zip(batch, results)
+        ]
+
+    def track(items: List[Detected]) -> List[Tuple[int, List[Row], List[SummaryRow]]]:
+        out = []
+        for idx, ts, shape, detections in items:
+            if on_detections is not None:
+                on_detections(idx, ts, detections)
+            rows = processors[idx].process(detections, ts, shape)
+            if schedulers is not None:
+                schedulers[idx].update(processors[idx].live_tracks)
+            out.append((idx, rows, processors[idx].pop_summaries()))
+        return out
+
+    def write(items: List[Tuple[int, List[Row], List[SummaryRow]]]) -> None:
+        for idx, rows, summaries in items:
+            sink(idx, rows)
+            if summaries and summary_sink is not None:
+                summary_sink(idx, summaries)
+
+    pipeline = StagePipeline(
+        collector,
+        [("detect", infer), ("track", track), ("sink", write)],
+        maxsize=max(1, queue_size // batch_size),
+    )
+    pipeline.run()
+    if summary_sink is not None:
+        for idx, processor in enumerate(processors):
+            remaining = processor.finish()
+            if remaining:
+                summary_sink(idx, remaining)
+    return collector, [collector.queue] + pipeline.queues
@@ -0,0 +1,8 @@
+"""Stream codecs and RTSP transports understood by :mod:`carspeed.io.rtsp`.
+
+Kept free of GStreamer imports so configuration code can validate against
+them without loading ``gi``.
+"""
+
+CODECS = ("h264", "h265", "auto")
+TRANSPORTS = ("tcp", "udp")
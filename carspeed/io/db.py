@@ -2,12 +2,60 @@
 
 from __future__ import annotations
 
+import logging
 import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Deque, Iterable, List, Optional, Sequence, Tuple
 
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+BACKPRESSURE_POLICIES = ("block", "drop-oldest", "drop-newest")
 
-def init_db(path: str) -> sqlite3.Connection:
-    """Create the vehicles table if needed and return a connection."""
+INSERT_VEHICLE = (
+    "INSERT INTO vehicles(timestamp, track_id, label, speed, x1, y1, x2, y2, confidence)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# rows of several cameras end with the source index, like speed_plugin.c writes
+INSERT_VEHICLE_SOURCE = (
+    "INSERT INTO vehicles(timestamp, track_id, label, speed, x1, y1, x2, y2, confidence,"
+    " source_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# one row per vehicle once its track expires, see carspeed.core.summary
+INSERT_SUMMARY = (
+    "INSERT INTO vehicle_summaries(source_id, track_id, label, entry_ts, exit_ts, distance,"
+    " mean_speed, median_speed, max_speed, samples, x1, y1, x2, y2, confidence)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+logger = logging.getLogger(__name__)
+
+
+def configure(
+    conn: sqlite3.Connection, wal: bool = True, synchronous: Optional[str] = "NORMAL"
+) -> None:
+    """Switch ``conn`` to WAL journaling and set ``PRAGMA synchronous``.
+
+    WAL with ``synchronous=NORMAL`` only syncs at checkpoints instead of on
+    every commit, which is what makes frequent writes affordable on SD cards.
+    """
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+    if synchronous is not None:
+        mode = synchronous.upper()
+        if mode not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        conn.execute(f"PRAGMA synchronous={mode}")
+
+
+def init_db(
+    path: str, wal: bool = False, synchronous: Optional[str] = None
+) -> sqlite3.Connection:
+    """Create the vehicles and vehicle_summaries tables if needed and return a connection."""
     conn = sqlite3.connect(path)
+    configure(conn, wal=wal, synchronous=synchronous)
     cur = conn.cursor()
     cur.execute(
         """CREATE TABLE IF NOT EXISTS vehicles (
@@ -17,8 +65,307 @@ def init_db(path: str) -> sqlite3.Connection:
         label TEXT,
         speed REAL,
         x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+        confidence REAL,
+        source_id INTEGER DEFAULT 0
+    )"""
+    )
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(vehicles)")}
+    if "source_id" not in columns:  # databases created before multi-camera support
+        cur.execute("ALTER TABLE vehicles ADD COLUMN source_id INTEGER DEFAULT 0")
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS vehicle_summaries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_id INTEGER DEFAULT 0,
+        track_id INTEGER,
+        label TEXT,
+        entry_ts REAL,
+        exit_ts REAL,
+        distance REAL,
+        mean_speed REAL,
+        median_speed REAL,
+        max_speed REAL,
+        samples INTEGER,
+        x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
         confidence REAL
     )"""
     )
     conn.commit()
     return conn
+
+
+class BatchWriter:
+    """Buffer rows and insert them with ``executemany`` in one transaction.
+
+    The buffer is flushed once it holds ``flush_rows`` rows or when a write
+    arrives more than ``flush_interval`` seconds after the last flush.
+    :meth:`close` (or leaving the ``with`` block) always flushes what is left.
+
+    Rows are inserted with ``sql`` unless a write names another statement, so
+    e.g. :data:`INSERT_SUMMARY` rows can share the connection and the
+    transactions of the per-frame rows instead of needing a second writer.
+
+    Rows of a failed flush stay buffered and are retried on the next one. With
+    ``max_rows`` the buffer is capped: once a flush fails with more rows
+    buffered, ``"drop-oldest"`` discards the oldest and ``"drop-newest"`` the
+    newest rows, counted in ``dropped``. ``"block"`` keeps every row and
+    leaves back-pressure to the caller, which can check :attr:`full`.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        sql: str = INSERT_VEHICLE,
+        flush_rows: int = 500,
+        flush_interval: float = 1.0,
+        close_connection: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        max_rows: Optional[int] = None,
+        policy: str = "drop-oldest",
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(BACKPRESSURE_POLICIES)}")
+        self.conn = conn
+        self.sql = sql
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.close_connection = close_connection
+        self._clock = clock
+        # (statement, row); None stands for ``sql`` as it is at flush time
+        self._rows: List[Tuple[Optional[str], Sequence[object]]] = []
+        self._last_flush = clock()
+        self.max_rows = None if max_rows is None else max(1, max_rows)
+        self.policy = policy
+        self.rows_written = 0
+        self.flushes = 0
+        self.dropped = 0
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def full(self) -> bool:
+        """Whether the buffer holds ``max_rows`` rows or more."""
+        return self.max_rows is not None and len(self._rows) >= self.max_rows
+
+    def write(self, row: Sequence[object], sql: Optional[str] = None) -> None:
+        """Queue one row for ``sql`` (default: the writer's statement)."""
+        self._rows.append((sql, row))
+        self._maybe_flush()
+
+    def write_many(self, rows: Iterable[Sequence[object]], sql: Optional[str] = None) -> None:
+        """Queue several rows for ``sql``, flushing if a threshold is reached."""
+        self._rows.extend((sql, row) for row in rows)
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if (
+            len(self._rows) >= self.flush_rows
+            or self._clock() - self._last_flush >= self.flush_interval
+            or self.full
+        ):
+            self.flush()
+
+    def poll(self) -> None:
+        """Flush if ``flush_interval`` has elapsed, even without new rows."""
+        if self._rows and self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered rows in a single transaction."""
+        self._last_flush = self._clock()
+        if not self._rows:
+            return
+        try:
+            with self.conn:
+                for sql, rows in groupby(self._rows, key=itemgetter(0)):
+                    self.conn.executemany(sql or self.sql, map(itemgetter(1), rows))
+        except sqlite3.Error:
+            self._trim()
+            raise
+        self.rows_written += len(self._rows)
+        self.flushes += 1
+        self._rows = []
+
+    def _trim(self) -> None:
+        """Apply the drop policy to rows beyond ``max_rows``."""
+        if self.max_rows is None or self.policy == "block":
+            return
+        excess = len(self._rows) - self.max_rows
+        if excess <= 0:
+            return
+        if self.policy == "drop-newest":
+            del self._rows[self.max_rows :]
+        else:
+            del self._rows[:excess]
+        self.dropped += excess
+
+    def close(self) -> None:
+        """Flush remaining rows and optionally close the connection."""
+        try:
+            self.flush()
+        finally:
+            if self.close_connection:
+                self.conn.close()
+
+
+class AsyncWriter:
+    """Hand rows to a dedicated writer thread through a bounded queue.
+
+    The thread owns its own connection and a :class:`BatchWriter`, so disk
+    latency never stalls the caller. When the queue holds ``maxsize`` rows the
+    ``policy`` decides what happens: ``"block"`` waits for room,
+    ``"drop-oldest"`` discards the oldest queued row and ``"drop-newest"``
+    discards the incoming one. ``depth``, ``max_depth`` and ``dropped`` can be
+    polled at any time; :meth:`close` drains the queue and flushes.
+
+    Like :class:`BatchWriter`, writes may name another statement than
+    ``sql``; all statements share the thread's connection.
+
+    Rows the database rejected are retried from a buffer of at most
+    ``maxsize`` rows with the same policy: ``"block"`` stops draining the
+    queue while the buffer is full, so producers wait, and the drop policies
+    discard buffered rows, counted in ``dropped``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sql: str = INSERT_VEHICLE,
+        maxsize: int = 10000,
+        policy: str = "block",
+        flush_rows: int = 500,
+        flush_interval: float = 1.0,
+        wal: bool = True,
+        synchronous: Optional[str] = "NORMAL",
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(BACKPRESSURE_POLICIES)}")
+        self.path = path
+        self.sql = sql
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.wal = wal
+        self.synchronous = synchronous
+        self.dropped = 0
+        self.max_depth = 0
+        self.rows_written = 0
+        self.errors = 0
+        self._queue: Deque[Tuple[Optional[str], Sequence[object]]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="carspeed-db", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "AsyncWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    @property
+    def depth(self) -> int:
+        """Rows currently waiting in the queue."""
+        return len(self._queue)
+
+    def write(self, row: Sequence[object], sql: Optional[str] = None) -> None:
+        """Queue one row according to the back-pressure policy."""
+        self.write_many((row,), sql)
+
+    def write_many(self, rows: Iterable[Sequence[object]], sql: Optional[str] = None) -> None:
+        """Queue several rows according to the back-pressure policy."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            queue = self._queue
+            for row in rows:
+                if len(queue) >= self.maxsize:
+                    if self.policy == "drop-newest":
+                        self.dropped += 1
+                        continue
+                    if self.policy == "drop-oldest":
+                        queue.popleft()
+                        self.dropped += 1
+                    else:
+                        while len(queue) >= self.maxsize and not self._closed:
+                            self._cond.wait()
+                        if self._closed:
+                            raise RuntimeError("writer is closed")
+                queue.append((sql, row))
+            self.max_depth = max(self.max_depth, len(queue))
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        try:
+            writer = BatchWriter(
+                init_db(self.path, wal=self.wal, synchronous=self.synchronous),
+                sql=self.sql,
+                flush_rows=self.flush_rows,
+                flush_interval=self.flush_interval,
+                close_connection=True,
+                max_rows=self.maxsize,
+                policy=self.policy,
+            )
+        except BaseException as exc:
+            self._error = exc
+            return
+        finally:
+            self._ready.set()
+        try:
+            trimmed = 0
+            while True:
+                with self._cond:
+                    # under "block" a full retry buffer leaves rows queued so producers wait
+                    stalled = self.policy == "block" and writer.full and not self._closed
+                    if (stalled or not self._queue) and not self._closed:
+                        self._cond.wait(self.flush_interval)
+                        stalled = self.policy == "block" and writer.full and not self._closed
+                    if stalled:
+                        batch = []
+                    else:
+                        batch = list(self._queue)
+                        self._queue.clear()
+                    done = self._closed and not self._queue and not batch
+                    self._cond.notify_all()
+                try:
+                    for sql, rows in groupby(batch, key=itemgetter(0)):
+                        writer.write_many(map(itemgetter(1), rows), sql)
+                    writer.poll()
+                except sqlite3.Error:
+                    self.errors += 1
+                    logger.exception("database write failed; %d rows kept for retry", len(writer))
+                if writer.dropped != trimmed:
+                    with self._cond:
+                        self.dropped += writer.dropped - trimmed
+                    trimmed = writer.dropped
+                self.rows_written = writer.rows_written
+                if done:
+                    break
+        finally:
+            try:
+                writer.close()
+            except sqlite3.Error:
+                self.errors += 1
+                logger.exception("failed to flush rows on shutdown")
+                with self._cond:
+                    self.dropped += len(writer)
+            self.rows_written = writer.rows_written
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting rows, drain the queue and wait for the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,177 @@
+"""Memory-mapped per-frame detection cache."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.processor import Detection
+
+CACHE_VERSION = 2
+_SAMPLES = 16
+_BLOCK = 1 << 20
+
+
+def fingerprint(path: str) -> str:
+    """Return a SHA-256 over the size, mtime and sampled 1 MiB blocks of ``path``.
+
+    Sampling keeps hashing an hour of video in the millisecond range, but it
+    is not a content hash: an in-place edit that keeps the size and the
+    modification time and only touches unsampled bytes yields the same
+    fingerprint, and a cache keyed by it goes stale. Delete the cache
+    directory to rebuild it after such an edit. Copying a file without
+    preserving its mtime changes the fingerprint and only costs a rebuild.
+    Paths that do not exist (such as model names resolved by the detector
+    library) hash their name instead.
+    """
+    digest = hashlib.sha256()
+    if not os.path.isfile(path):
+        digest.update(os.fsencode(path))
+        return digest.hexdigest()
+    stat = os.stat(path)
+    size = stat.st_size
+    digest.update(f"{size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as fh:
+        if size <= _BLOCK * _SAMPLES:
+            digest.update(fh.read())
+        else:
+            for i in range(_SAMPLES):
+                fh.seek((size - _BLOCK) * i // (_SAMPLES - 1))
+                digest.update(fh.read(_BLOCK))
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir: str, video: str, model: str, extra: str = "") -> str:
+    """Return the cache directory for ``video`` detected by ``model``.
+
+    ``extra`` distinguishes detector settings that change the output for the
+    same weights, such as the kept classes.
+    """
+    key = hashlib.sha256(
+        f"{CACHE_VERSION}:{fingerprint(video)}:{fingerprint(model)}:{extra}".encode()
+    ).hexdigest()[:32]
+    return os.path.join(cache_dir, key)
+
+
+class DetectionCacheWriter:
+    """Collect detections frame by frame and store them as columns.
+
+    :meth:`close` writes ``ts``, ``offsets``, ``boxes``, ``conf`` and
+    ``label`` ``.npy`` arrays plus ``meta.json`` to a temporary directory and
+    renames it to ``path``, so an interrupted run never leaves a partial
+    cache behind. :meth:`abort` discards what was collected.
+    """
+
+    def __init__(self, path: str, meta: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.meta = dict(meta or {})
+        self._ts: List[float] = []
+        self._counts: List[int] = []
+        self._boxes: List[Tuple[int, int, int, int]] = []
+        self._conf: List[float] = []
+        self._labels: List[int] = []
+        self._label_ids: Dict[str, int] = {}
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def append(self, ts: float, detections: Sequence[Detection]) -> None:
+        """Record the detections of the frame stamped ``ts``."""
+        self._ts.append(ts)
+        self._counts.append(len(detections))
+        for x1, y1, x2, y2, conf, label in detections:
+            self._boxes.append((x1, y1, x2, y2))
+            self._conf.append(conf)
+            self._labels.append(self._label_ids.setdefault(label, len(self._label_ids)))
+
+    def close(self) -> None:
+        """Write the cache to ``path``."""
+        if self._closed:
+            return
+        self._closed = True
+        parent = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".detections-", dir=parent)
+        try:
+            offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+            np.cumsum(self._counts, out=offsets[1:])
+            columns = {
+                "ts": np.asarray(self._ts, dtype=np.float64),
+                "offsets": offsets,
+                "boxes": np.asarray(self._boxes, dtype=np.int32).reshape(-1, 4),
+                "conf": np.asarray(self._conf, dtype=np.float64),
+                "label": np.asarray(self._labels, dtype=np.uint16),
+            }
+            for name, column in columns.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), column)
+            meta = dict(self.meta, version=CACHE_VERSION, labels=list(self._label_ids))
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+                json.dump(meta, fh)
+            if os.path.isdir(self.path):
+                shutil.rmtree(self.path)  # stale cache for the same key
+            os.replace(tmp, self.path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def abort(self) -> None:
+        """Drop the collected frames without writing anything."""
+        self._closed = True
+
+
+class DetectionCache:
+    """Read a cache written by :class:`DetectionCacheWriter`.
+
+    The columns are memory-mapped, so opening is instant and only the pages
+    of frames actually replayed are read from disk.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as fh:
+            self.meta: Dict[str, Any] = json.load(fh)
+        if self.meta.get("version") != CACHE_VERSION:
+            raise ValueError(f"{path}: unsupported detection cache version")
+        self.path = path
+        self.labels: List[str] = self.meta["labels"]
+        self.ts = self._column("ts")
+        self.offsets = self._column("offsets")
+        self.boxes = self._column("boxes")
+        self.conf = self._column("conf")
+        self.label = self._column("label")
+
+    def _column(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, "meta.json"))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def detections(self) -> int:
+        """Total number of cached detections."""
+        return int(self.offsets[-1])
+
+    def frame(self, index: int) -> Tuple[float, List[Detection]]:
+        """Return ``(ts, detections)`` of the ``index``-th cached frame."""
+        lo, hi = int(self.offsets[index]), int(self.offsets[index + 1])
+        labels = self.labels
+        return float(self.ts[index]), [
+            (x1, y1, x2, y2, conf, labels[label])
+            for (x1, y1, x2, y2), conf, label in zip(
+                self.boxes[lo:hi].tolist(), self.conf[lo:hi].tolist(), self.label[lo:hi].tolist()
+            )
+        ]
+
+    def __iter__(self) -> Iterator[Tuple[float, List[Detection]]]:
+        for index in range(len(self)):
+            yield self.frame(index)
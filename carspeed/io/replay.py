@@ -0,0 +1,212 @@
+"""Faster-than-realtime replay of recorded video."""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.iou_tracker import _iou
+from ..core.processor import Detection, FrameProcessor, Row
+from ..core.scheduler import AdaptiveInterval
+from .capture import run_stream
+
+# values of cv2.CAP_PROP_*, so this module does not need OpenCV
+CAP_PROP_POS_MSEC = 0
+CAP_PROP_POS_FRAMES = 1
+CAP_PROP_FPS = 5
+CAP_PROP_FRAME_COUNT = 7
+
+logger = logging.getLogger(__name__)
+
+
+def frame_rate(cap: Any, fps: Optional[float] = None) -> float:
+    """Return ``fps`` or the rate reported by ``cap``."""
+    if fps is None:
+        fps = cap.get(CAP_PROP_FPS)
+    if not fps or fps <= 0:
+        raise ValueError("cannot determine the frame rate; pass fps explicitly")
+    return float(fps)
+
+
+def media_frames(
+    cap: Any,
+    fps: Optional[float] = None,
+    start: int = 0,
+    stop: Optional[int] = None,
+    epoch: float = 0.0,
+) -> Iterator[Tuple[float, Any]]:
+    """Yield ``(ts, frame)`` stamped with the media time instead of the clock.
+
+    ``ts`` is ``epoch`` plus ``CAP_PROP_POS_MSEC`` when the backend reports
+    it, or plus ``index / fps`` otherwise, so speeds are right however fast
+    the file is decoded. Frames ``start`` (seeked to) up to ``stop`` are read.
+    """
+    fps = frame_rate(cap, fps)
+    if start:
+        cap.set(CAP_PROP_POS_FRAMES, start)
+    index = start
+    while stop is None or index < stop:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        msec = cap.get(CAP_PROP_POS_MSEC)
+        yield epoch + (msec / 1000.0 if msec and msec > 0 else index / fps), frame
+        index += 1
+
+
+@dataclass
+class Chunk:
+    """Frames ``start`` to ``stop`` of a file, decoded from ``warmup`` on.
+
+    The ``warmup`` frames are processed to seed the tracker and speed window
+    and to stitch track ids with the previous chunk, but not written.
+    """
+
+    index: int
+    start: int
+    stop: int
+    warmup: int
+
+
+def plan_chunks(frame_count: int, chunk_frames: int, overlap: int = 0) -> List[Chunk]:
+    """Split ``frame_count`` frames into chunks overlapping by ``overlap`` frames."""
+    if chunk_frames < 1 or overlap < 0:
+        raise ValueError("need chunk_frames >= 1 and overlap >= 0")
+    return [
+        Chunk(idx, start, min(frame_count, start + chunk_frames), max(0, start - overlap))
+        for idx, start in enumerate(range(0, frame_count, chunk_frames))
+    ]
+
+
+@dataclass
+class ReplayJob:
+    """Everything a worker process needs to replay one chunk.
+
+    The factories are called inside the worker and must be picklable (module
+    level functions or ``functools.partial`` of them): ``open_capture(source)``
+    returns a ``cv2.VideoCapture``-like object, ``make_detector()`` a
+    ``frame -> detections`` callable and ``make_processor()`` a fresh
+    :class:`~carspeed.core.processor.FrameProcessor`.
+    """
+
+    source: str
+    open_capture: Callable[[str], Any]
+    make_detector: Callable[[], Callable[[Any], Sequence[Detection]]]
+    make_processor: Callable[[], FrameProcessor]
+    fps: float
+    epoch: float = 0.0
+    make_scheduler: Callable[[], AdaptiveInterval] = AdaptiveInterval
+
+
+@dataclass
+class ChunkResult:
+    index: int
+    rows: List[Row] = field(default_factory=list)
+    warmup: List[Row] = field(default_factory=list)
+
+
+def run_chunk(job: ReplayJob, chunk: Chunk) -> ChunkResult:
+    """Detect, track and measure one chunk; track ids are local to it."""
+    cap = job.open_capture(job.source)
+    boundary: List[float] = []
+
+    def frames() -> Iterator[Tuple[float, Any]]:
+        stamped = media_frames(cap, job.fps, chunk.warmup, chunk.stop, job.epoch)
+        for index, (ts, frame) in enumerate(stamped, chunk.warmup):
+            if index == chunk.start:
+                boundary.append(ts)
+            yield ts, frame
+
+    rows: List[Row] = []
+    try:
+        run_stream(
+            frames(),
+            job.make_detector(),
+            job.make_processor(),
+            rows.extend,
+            scheduler=job.make_scheduler(),
+        )
+    finally:
+        cap.release()
+    result = ChunkResult(chunk.index)
+    cut = boundary[0] if boundary else float("inf")
+    for row in rows:
+        (result.warmup if row[0] < cut else result.rows).append(row)
+    return result
+
+
+class TrackStitcher:
+    """Renumber chunk-local track ids into ids that are unique across a file.
+
+    Chunks must be added in order. A track seen during a chunk's warmup
+    inherits the id of the previous chunk's track whose boxes it overlaps
+    (IoU >= ``min_iou`` on the same timestamps) most often; every other track
+    gets a new id.
+    """
+
+    def __init__(self, min_iou: float = 0.5):
+        self.min_iou = min_iou
+        self.next_id = 1
+        self._previous: List[Row] = []
+
+    def add(self, result: ChunkResult) -> List[Row]:
+        """Return ``result.rows`` with global track ids."""
+        by_ts: Dict[float, List[Row]] = {}
+        for row in self._previous:
+            by_ts.setdefault(round(row[0], 3), []).append(row)
+        votes: Dict[int, Counter] = {}
+        for row in result.warmup:
+            for prev in by_ts.get(round(row[0], 3), ()):
+                if _iou(row[4:8], prev[4:8]) >= self.min_iou:
+                    votes.setdefault(row[1], Counter())[prev[1]] += 1
+        pairs = sorted(
+            ((n, local, prev) for local, c in votes.items() for prev, n in c.items()),
+            reverse=True,
+        )
+        mapping: Dict[int, int] = {}
+        taken = set()
+        for _, local, prev in pairs:
+            if local not in mapping and prev not in taken:
+                mapping[local] = prev
+                taken.add(prev)
+        out = []
+        for row in result.rows:
+            tid = mapping.get(row[1])
+            if tid is None:
+                tid = mapping[row[1]] = self.next_id
+                self.next_id += 1
+            out.append((row[0], tid) + tuple(row[2:]))
+        self._previous = out
+        return out
+
+
+def replay_parallel(
+    job: ReplayJob,
+    frame_count: int,
+    sink: Callable[[List[Row]], None],
+    chunk_frames: int,
+    overlap: int = 0,
+    workers: int = 1,
+) -> int:
+    """Replay a file in chunks on ``workers`` processes and return the chunk count.
+
+    Rows reach ``sink`` chunk by chunk, in file order and with stitched track
+    ids. ``overlap`` should cover at least the speed window so speeds at
+    chunk boundaries match a single-pass run.
+    """
+    chunks = plan_chunks(frame_count, chunk_frames, overlap)
+    stitcher = TrackStitcher()
+    run = partial(run_chunk, job)
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for result in pool.map(run, chunks) if pool is not None else map(run, chunks):
+            logger.debug("chunk %d/%d done", result.index + 1, len(chunks))
+            sink(stitcher.add(result))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return len(chunks)
@@ -2,14 +2,66 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 from gi.repository import Gst
 
+from .codecs import CODECS, TRANSPORTS
+
 Gst.init(None)
 
 
-def latency_source(uri: str) -> Gst.Element:
-    """Return an RTSP source element configured with low latency."""
-    desc = (
-        f"rtspsrc location={uri} latency=100 ! rtph265depay ! h265parse ! nvv4l2decoder"
-    )
-    return Gst.parse_launch(desc)
+def _name(role: str, index: Optional[int]) -> str:
+    return "" if index is None else f" name={role}_{index}"
+
+
+def decoder_description(index: Optional[int] = None, drop_frame_interval: int = 0) -> str:
+    """Return the ``nvv4l2decoder`` element, decoding only every Nth frame if set."""
+    drop = f" drop-frame-interval={drop_frame_interval}" if drop_frame_interval > 0 else ""
+    return f"nvv4l2decoder{_name('dec', index)}{drop}"
+
+
+def rtsp_description(
+    uri: str,
+    index: Optional[int] = None,
+    codec: str = "h265",
+    latency: int = 100,
+    transport: Optional[str] = None,
+    drop_on_latency: bool = False,
+    drop_frame_interval: int = 0,
+) -> str:
+    """Return the ``rtspsrc`` to ``nvv4l2decoder`` chain for ``uri``.
+
+    ``codec`` selects the depayloader and parser; ``"auto"`` lets
+    ``parsebin`` pick them from the stream caps. ``transport`` restricts
+    ``rtspsrc`` to TCP or UDP (default: let it negotiate).
+
+    With ``index`` every element is named ``<role>_<index>`` so errors can be
+    traced back to the camera that raised them.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"codec must be one of {CODECS}")
+    if transport is not None and transport not in TRANSPORTS:
+        raise ValueError(f"transport must be one of {TRANSPORTS}")
+    src = f"rtspsrc{_name('src', index)} location={uri} latency={latency}"
+    if transport is not None:
+        src += f" protocols={transport}"
+    if drop_on_latency:
+        src += " drop-on-latency=true"
+    if codec == "auto":
+        parse = f"parsebin{_name('parse', index)}"
+    else:
+        parse = (
+            f"rtp{codec}depay{_name('depay', index)} ! {codec}parse{_name('parse', index)}"
+        )
+    return f"{src} ! {parse} ! {decoder_description(index, drop_frame_interval)}"
+
+
+def latency_source(uri: str, index: Optional[int] = None, **options: object) -> Gst.Bin:
+    """Return an RTSP source bin configured with low latency.
+
+    ``options`` are passed to :func:`rtsp_description`. The decoder output is
+    exposed as the bin's ghost ``src`` pad.
+    """
+    desc = rtsp_description(uri, index, **options)  # type: ignore[arg-type]
+    return Gst.parse_bin_from_description(desc, True)
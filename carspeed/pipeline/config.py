@@ -2,8 +2,25 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from ..core.projection import Homography
+from ..core.summary import ROW_MODES
+from ..io.codecs import CODECS, TRANSPORTS
+from ..io.db import BACKPRESSURE_POLICIES, SYNCHRONOUS_MODES
+
+
+@dataclass
+class SourceSpec:
+    """One camera of a manifest, linked to ``mux.sink_<index>``."""
+
+    uri: str
+    is_rtsp: bool
+    ppm: Optional[float] = None
+    homography: Optional[str] = None
+    name: Optional[str] = None
+    codec: Optional[str] = None
 
 
 @dataclass
@@ -17,7 +34,122 @@ class PipelineOptions:
     ppm: float
     is_rtsp: bool
     homography: Optional[str] = None
+    source_config: Optional[str] = None
     window: int = 3
     batch_size: int = 1
     width: int = 1280
     height: int = 720
+    sources: List[SourceSpec] = field(default_factory=list)
+    codec: str = "h265"
+    transport: Optional[str] = None
+    latency: int = 100
+    drop_on_latency: bool = False
+    drop_frame_interval: int = 0
+    nvbuf_memory_type: int = 0
+    infer_interval: int = 0
+    rows: str = "raw"
+
+    def __post_init__(self) -> None:
+        if self.codec not in CODECS:
+            raise ValueError(f"codec must be one of {CODECS}")
+        if self.transport is not None and self.transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}")
+        if self.latency < 0:
+            raise ValueError("latency must be >= 0")
+        if self.drop_frame_interval < 0:
+            raise ValueError("drop_frame_interval must be >= 0")
+        if self.infer_interval < 0:
+            raise ValueError("infer_interval must be >= 0")
+        if self.rows not in ROW_MODES:
+            raise ValueError(f"rows must be one of {ROW_MODES}")
+        if not 0 <= self.nvbuf_memory_type <= 3:
+            raise ValueError("nvbuf_memory_type must be between 0 and 3")
+
+
+@dataclass
+class CaptureOptions:
+    """Configuration of the OpenCV/YOLO capture loop (``speed_detector.py``).
+
+    Exactly one of ``rtsp``, ``video`` or ``sources`` names the input.
+    ``max_detect_interval`` defaults to ``min_detect_interval``. Options that
+    do not combine raise ``ValueError``.
+    """
+
+    ppm: float
+    rtsp: Optional[str] = None
+    video: Optional[str] = None
+    sources: List[str] = field(default_factory=list)
+    model: str = "yolov8n.pt"
+    db: str = "vehicles.db"
+    homography: Optional[Union[Homography, List[float]]] = None
+    homography_lut: bool = False
+    window: int = 3
+    tracker: str = "iou"
+    iou_threshold: float = 0.3
+    decay_time: float = 1.0
+    tracker_options: Dict[str, Any] = field(default_factory=dict)
+    flush_rows: int = 500
+    flush_interval: float = 1.0
+    synchronous: str = "NORMAL"
+    async_db: bool = False
+    db_queue_size: int = 10000
+    backpressure: str = "block"
+    min_detect_interval: int = 1
+    max_detect_interval: Optional[int] = None
+    staged: bool = False
+    queue_size: int = 4
+    frame_policy: str = "block"
+    replay: bool = False
+    fps: Optional[float] = None
+    start_time: float = 0.0
+    detection_cache: Optional[str] = None
+    batch_size: int = 1
+    max_batch_latency: float = 0.05
+    rows: str = "raw"
+    workers: int = 1
+    chunk_seconds: float = 300.0
+    chunk_overlap: float = 2.0
+
+    def __post_init__(self) -> None:
+        if sum(map(bool, (self.rtsp, self.video, self.sources))) != 1:
+            raise ValueError("need exactly one of rtsp, video or sources")
+        if "max_distance" in self.tracker_options and self.tracker != "centroid":
+            raise ValueError("max_distance only applies to the centroid tracker")
+        if self.max_detect_interval is None:
+            self.max_detect_interval = self.min_detect_interval
+        if not 1 <= self.min_detect_interval <= self.max_detect_interval:
+            raise ValueError("need 1 <= min_detect_interval <= max_detect_interval")
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {SYNCHRONOUS_MODES}")
+        if self.backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure must be one of {BACKPRESSURE_POLICIES}")
+        if self.frame_policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"frame_policy must be one of {BACKPRESSURE_POLICIES}")
+        if self.rows not in ROW_MODES:
+            raise ValueError(f"rows must be one of {ROW_MODES}")
+        if self.replay and self.rtsp:
+            raise ValueError("replay needs a video or sources")
+        if self.batch_size < 1 or self.max_batch_latency < 0:
+            raise ValueError("need batch_size >= 1 and max_batch_latency >= 0")
+        if self.chunk_seconds <= 0 or self.chunk_overlap < 0:
+            raise ValueError("need chunk_seconds > 0 and chunk_overlap >= 0")
+        if self.workers < 1:
+            raise ValueError("workers must be >= 1")
+        if self.workers > 1:
+            if not (self.replay and self.video):
+                raise ValueError("workers needs replay of a video")
+            if self.batch_size > 1 or self.staged:
+                raise ValueError("batch_size and staged do not combine with workers")
+            if self.rows != "raw":
+                # a vehicle crossing a chunk boundary would be summarised twice
+                raise ValueError("rows summary/both does not combine with workers")
+        if self.detection_cache:
+            if not self.replay:
+                raise ValueError("detection_cache needs replay")
+            if self.sources or self.workers > 1:
+                raise ValueError("detection_cache needs a single video and one worker")
+
+    @property
+    def uris(self) -> List[str]:
+        """The capture URIs, one per source."""
+        return list(self.sources) or [self.rtsp or self.video]
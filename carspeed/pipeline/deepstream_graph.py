@@ -2,31 +2,103 @@
 
 from __future__ import annotations
 
+from typing import Any, Dict, Optional
+
 from gi.repository import Gst
 
-from .config import PipelineOptions
+from ..io.rtsp import decoder_description, rtsp_description
+from .config import PipelineOptions, SourceSpec
 
 
 Gst.init(None)
 
 
-def build_pipeline(opts: PipelineOptions) -> Gst.Pipeline:
-    """Return a ``Gst.Pipeline`` for the given options."""
-    src = (
-        f"rtspsrc location={opts.uri} latency=100 ! "
-        "rtph265depay ! h265parse ! nvv4l2decoder"
-        if opts.is_rtsp
-        else f"filesrc location={opts.uri} ! qtdemux ! h265parse ! nvv4l2decoder"
+def decode_options(opts: PipelineOptions, spec: Optional[SourceSpec] = None) -> Dict[str, Any]:
+    """Return the :func:`~carspeed.io.rtsp.rtsp_description` options for a source."""
+    return {
+        "codec": (spec.codec if spec is not None and spec.codec else opts.codec),
+        "latency": opts.latency,
+        "transport": opts.transport,
+        "drop_on_latency": opts.drop_on_latency,
+        "drop_frame_interval": opts.drop_frame_interval,
+    }
+
+
+def source_description(
+    uri: str, is_rtsp: bool, index: Optional[int] = None, **options: Any
+) -> str:
+    """Return the decode chain for one camera, ending at ``nvv4l2decoder``.
+
+    ``options`` are those of :func:`decode_options`; the RTSP-only ones are
+    ignored for files. ``index`` names the elements after the
+    ``mux.sink_<index>`` pad they feed.
+    """
+    if is_rtsp:
+        return rtsp_description(uri, index, **options)
+    codec = options.get("codec", "h265")
+    dec = decoder_description(index, options.get("drop_frame_interval", 0))
+    if index is None:
+        names = {"src": "", "demux": "", "parse": ""}
+    else:
+        names = {role: f" name={role}_{index}" for role in ("src", "demux", "parse")}
+    if codec == "auto":
+        # parsebin finds the demuxer and parser from the container
+        return f"filesrc{names['src']} location={uri} ! parsebin{names['parse']} ! {dec}"
+    return (
+        f"filesrc{names['src']} location={uri} ! qtdemux{names['demux']} ! "
+        f"{codec}parse{names['parse']} ! {dec}"
     )
 
+
+def describe_pipeline(opts: PipelineOptions) -> str:
+    """Return the ``gst-launch`` description for ``opts``.
+
+    With ``opts.sources`` every camera gets its own decode chain linked to
+    ``mux.sink_<index>`` and ``batch-size`` is the number of sources;
+    otherwise ``opts.uri`` is the single source.
+    """
+    if opts.sources:
+        sources = " ".join(
+            f"{source_description(s.uri, s.is_rtsp, idx, **decode_options(opts, s))}"
+            f" ! mux.sink_{idx}"
+            for idx, s in enumerate(opts.sources)
+        )
+        head = f"{sources} nvstreammux name=mux batch-size={len(opts.sources)}"
+        # nvinfer must batch as many frames as the muxer produces
+        infer = (
+            f"nvinfer name=infer config-file-path={opts.config} "
+            f"batch-size={len(opts.sources)}"
+        )
+    else:
+        src = source_description(opts.uri, opts.is_rtsp, 0, **decode_options(opts))
+        head = f"{src} ! nvstreammux name=mux batch-size={opts.batch_size}"
+        infer = f"nvinfer name=infer config-file-path={opts.config}"
+    if opts.infer_interval:
+        # batches nvinfer skips between inferences; nvtracker carries the objects
+        infer += f" interval={opts.infer_interval}"
+
     homography = (
         " " + "homography=" + opts.homography if opts.homography is not None else ""
     )
-    pipe_desc = (
-        f"{src} ! nvstreammux name=mux batch-size={opts.batch_size} "
-        f"width={opts.width} height={opts.height} nvbuf-memory-type=0 ! "
-        f"nvinfer config-file-path={opts.config} ! nvtracker ! "
-        f"speedtrack ppm={opts.ppm} db={opts.db} window={opts.window}{homography} ! "
+    source_config = (
+        f" source-config={opts.source_config}" if opts.source_config is not None else ""
+    )
+    rows = ""
+    if opts.rows != "raw":
+        rows += " summaries=true"
+    if opts.rows == "summary":
+        rows += " raw-rows=false"
+    return (
+        f"{head} "
+        f"width={opts.width} height={opts.height} "
+        f"nvbuf-memory-type={opts.nvbuf_memory_type} ! "
+        f"{infer} ! nvtracker ! "
+        f"speedtrack name=speed ppm={opts.ppm} db={opts.db} window={opts.window}"
+        f"{homography}{source_config}{rows} ! "
         "fakesink sync=false"
     )
-    return Gst.parse_launch(pipe_desc)
+
+
+def build_pipeline(opts: PipelineOptions) -> Gst.Pipeline:
+    """Return a ``Gst.Pipeline`` for the given options."""
+    return Gst.parse_launch(describe_pipeline(opts))
@@ -0,0 +1,112 @@
+"""Multi-camera source manifests."""
+
+from __future__ import annotations
+
+import json
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from ..core.projection import Homography
+from .config import CODECS, SourceSpec
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - PyYAML is optional
+    yaml = None
+
+
+def _homography(value: object, base: Path) -> str:
+    if isinstance(value, str):
+        path = Path(value)
+        if not path.is_absolute():
+            path = base / path
+        return Homography.from_file(str(path)).to_property()
+    if isinstance(value, (list, tuple)):
+        matrix = np.asarray(value, dtype=np.float64)
+        if matrix.size != 9:
+            raise ValueError("homography must have 9 values")
+        return Homography(matrix).to_property()
+    raise ValueError("homography must be a file path or a 3x3 matrix")
+
+
+def load_manifest(path: str) -> List[SourceSpec]:
+    """Read a JSON/YAML manifest of camera sources.
+
+    The file holds a list of sources, or a mapping with a ``sources`` list.
+    Each source needs a ``uri`` (``rtsp://`` URIs are streamed, anything else
+    is read as an MP4 file) and may set ``ppm``, ``homography`` (a file path
+    relative to the manifest, or an inline matrix), ``codec`` (overriding
+    ``--codec``) and ``name``.
+    """
+    manifest = Path(path)
+    with open(manifest, "r", encoding="utf-8") as fh:
+        if manifest.suffix.lower() in {".yml", ".yaml"}:
+            if yaml is None:
+                raise RuntimeError("PyYAML is required to read YAML manifests")
+            data = yaml.safe_load(fh)
+        else:
+            data = json.load(fh)
+
+    if isinstance(data, dict):
+        data = data.get("sources")
+    if not isinstance(data, list) or not data:
+        raise ValueError("manifest must list at least one source")
+
+    specs = []
+    for idx, entry in enumerate(data):
+        if isinstance(entry, str):
+            entry = {"uri": entry}
+        if not isinstance(entry, dict) or not entry.get("uri"):
+            raise ValueError(f"source {idx} needs a uri")
+        uri = str(entry["uri"])
+        ppm = entry.get("ppm")
+        if ppm is not None and float(ppm) <= 0:
+            raise ValueError(f"source {idx}: ppm must be positive")
+        homography = entry.get("homography")
+        codec = entry.get("codec")
+        if codec is not None and codec not in CODECS:
+            raise ValueError(f"source {idx}: codec must be one of {CODECS}")
+        specs.append(
+            SourceSpec(
+                uri=uri,
+                is_rtsp=uri.lower().startswith(("rtsp://", "rtsps://")),
+                ppm=None if ppm is None else float(ppm),
+                homography=None
+                if homography is None
+                else _homography(homography, manifest.parent),
+                name=entry.get("name"),
+                codec=codec,
+            )
+        )
+    return specs
+
+
+def write_source_config(sources: Sequence[SourceSpec]) -> Optional[str]:
+    """Write the per-source calibration as a ``speedtrack`` ``source-config`` file.
+
+    Returns ``None`` when no source overrides ``ppm`` or ``homography``,
+    otherwise the path of a temporary file the caller removes once the
+    pipeline has stopped.
+    """
+    lines = []
+    for idx, spec in enumerate(sources):
+        if spec.ppm is None and spec.homography is None:
+            continue
+        lines.append(f"[source{idx}]")
+        if spec.name:
+            lines.append(f"# {spec.name}")
+        if spec.ppm is not None:
+            lines.append(f"ppm={spec.ppm}")
+        if spec.homography is not None:
+            lines.append(f"homography={spec.homography}")
+        lines.append("")
+    if not lines:
+        return None
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".ini", prefix="carspeed-sources-", delete=False, encoding="utf-8"
+    ) as fh:
+        fh.write("\n".join(lines))
+        return fh.name
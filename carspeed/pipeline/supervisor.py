@@ -0,0 +1,180 @@
+"""Reconnect failed RTSP cameras without restarting the pipeline."""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from gi.repository import Gst
+
+from ..io.rtsp import latency_source
+from .config import SourceSpec
+
+
+logger = logging.getLogger(__name__)
+
+# element names given by deepstream_graph.source_description and by
+# SourceSupervisor to the bins it attaches
+_SOURCE_NAME = re.compile(r"^(?:src|depay|demux|parse|dec|source)_(\d+)$")
+_CHAIN_ROLES = ("src", "depay", "demux", "parse", "dec", "source")
+
+
+class Backoff:
+    """Exponential delay between reconnect attempts, capped at ``maximum``."""
+
+    def __init__(self, initial: float = 1.0, maximum: float = 60.0, factor: float = 2.0):
+        if initial <= 0 or maximum < initial or factor < 1:
+            raise ValueError("backoff needs 0 < initial <= maximum and factor >= 1")
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempts = 0
+
+    def next(self) -> float:
+        """Return the delay before the next attempt and advance."""
+        delay = min(self.maximum, self.initial * self.factor**self.attempts)
+        self.attempts += 1
+        return delay
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+
+def source_index(element: object) -> Optional[int]:
+    """Return the mux sink index of the source chain ``element`` belongs to."""
+    while element is not None:
+        match = _SOURCE_NAME.match(element.get_name())  # type: ignore[attr-defined]
+        if match:
+            return int(match.group(1))
+        element = element.get_parent()  # type: ignore[attr-defined]
+    return None
+
+
+class SourceSupervisor:
+    """Tear down and reconnect RTSP source chains that post errors.
+
+    Only the failed camera's elements are removed; ``nvstreammux`` keeps its
+    ``sink_<index>`` pad and everything downstream (nvinfer, nvtracker,
+    speedtrack) keeps running. Reconnects are attempted from :meth:`poll`
+    after a per-source :class:`Backoff` delay, which is reset once a
+    reconnected source has run for ``stable_after`` seconds without error.
+
+    The top-level elements of each source's current chain are remembered, so
+    errors still queued on the bus from a chain that was already replaced are
+    ignored instead of tearing down its successor.
+    """
+
+    def __init__(
+        self,
+        pipeline: Gst.Pipeline,
+        sources: Sequence[SourceSpec],
+        mux_name: str = "mux",
+        backoff: Callable[[], Backoff] = Backoff,
+        stable_after: float = 30.0,
+        make_source: Callable[[str, int], Gst.Bin] = latency_source,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pipeline = pipeline
+        self.sources = list(sources)
+        self.mux = pipeline.get_by_name(mux_name)
+        self.stable_after = stable_after
+        self.make_source = make_source
+        self.clock = clock
+        self._backoff: Dict[int, Backoff] = {
+            idx: backoff() for idx, s in enumerate(self.sources) if s.is_rtsp
+        }
+        self._pending: Dict[int, float] = {}
+        self._since: Dict[int, float] = {}
+        self._chains: Dict[int, List[object]] = {
+            idx: self._chain_elements(idx) for idx in self._backoff
+        }
+        self.reconnects = 0
+
+    def handle_error(self, message: Gst.Message) -> bool:
+        """Schedule a reconnect for the source that posted ``message``.
+
+        Returns ``False`` when the error did not come from a supervised RTSP
+        source, in which case the caller should treat it as fatal.
+        """
+        idx = source_index(message.src)
+        if idx is None or idx not in self._backoff:
+            return False
+        if idx in self._pending or not self._is_current(idx, message.src):
+            return True  # posted by a chain that was already torn down
+        err, _ = message.parse_error()
+        delay = self._backoff[idx].next()
+        logger.warning(
+            "Source %d (%s) failed: %s; reconnecting in %.1fs",
+            idx,
+            self.sources[idx].uri,
+            err.message if err is not None else "unknown error",
+            delay,
+        )
+        self._teardown(idx)
+        self._since.pop(idx, None)
+        self._pending[idx] = self.clock() + delay
+        return True
+
+    def poll(self) -> None:
+        """Run due reconnects and reset the backoff of stable sources."""
+        now = self.clock()
+        for idx, due in list(self._pending.items()):
+            if now < due:
+                continue
+            del self._pending[idx]
+            try:
+                self._attach(idx)
+            except Exception as exc:  # retried with backoff
+                delay = self._backoff[idx].next()
+                logger.warning(
+                    "Reconnecting source %d failed: %s; retrying in %.1fs", idx, exc, delay
+                )
+                self._teardown(idx)
+                self._pending[idx] = now + delay
+                continue
+            self.reconnects += 1
+            self._since[idx] = now
+            logger.info("Source %d reconnected", idx)
+        for idx, since in list(self._since.items()):
+            if now - since >= self.stable_after:
+                self._backoff[idx].reset()
+                del self._since[idx]
+
+    def _chain_elements(self, idx: int) -> List[object]:
+        """Return the direct children of the pipeline that make up source ``idx``."""
+        elements = []
+        for role in _CHAIN_ROLES:
+            element = self.pipeline.get_by_name(f"{role}_{idx}")
+            # get_by_name recurses; only direct children of the pipeline count
+            if element is not None and element.get_parent() == self.pipeline:
+                elements.append(element)
+        return elements
+
+    def _is_current(self, idx: int, element: object) -> bool:
+        """Whether ``element`` lies inside the chain now attached for ``idx``."""
+        chain = self._chains[idx]
+        while element is not None:
+            if any(element == member for member in chain):
+                return True
+            element = element.get_parent()  # type: ignore[attr-defined]
+        return False
+
+    def _teardown(self, idx: int) -> None:
+        for element in self._chain_elements(idx):
+            element.set_state(Gst.State.NULL)
+            self.pipeline.remove(element)
+        self._chains[idx] = []
+
+    def _attach(self, idx: int) -> None:
+        source = self.make_source(self.sources[idx].uri, idx)
+        source.set_name(f"source_{idx}")
+        self.pipeline.add(source)
+        pad = self.mux.get_static_pad(f"sink_{idx}") or self.mux.get_request_pad(
+            f"sink_{idx}"
+        )
+        if source.get_static_pad("src").link(pad) != Gst.PadLinkReturn.OK:
+            raise RuntimeError(f"could not link source {idx} to {self.mux.get_name()}")
+        self._chains[idx] = [source]
+        source.sync_state_with_parent()
@@ -0,0 +1,111 @@
+/* Minimal stand-ins for the DeepStream metadata types read by speedtrack.
+ *
+ * Used when building without DeepStream (USE_DEEPSTREAM unset) and by the C
+ * tests in tests/c, which build batches by hand. Only the fields speedtrack
+ * reads are declared.
+ *
+ * Test builds of speedtrack (SPEEDTRACK_STUB_PAYLOAD, make STUB_PAYLOAD=1)
+ * take their metadata from the buffer payload: an array of NvDsStubObject
+ * records, turned into a batch by nvds_stub_batch_new(), so tests can drive
+ * the element from appsrc.
+ */
+#ifndef NVDS_STUB_H
+#define NVDS_STUB_H
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+typedef struct _NvDsMetaList {
+  struct _NvDsMetaList *next;
+  void *data;
+} NvDsMetaList;
+
+typedef struct _NvDsObjectMeta {
+  uint64_t object_id;
+  struct {
+    float left;
+    float top;
+    float width;
+    float height;
+  } rect_params;
+  float confidence;
+} NvDsObjectMeta;
+
+typedef struct _NvDsFrameMeta {
+  uint32_t source_id;
+  NvDsMetaList *obj_meta_list;
+  uint64_t ntp_timestamp;
+} NvDsFrameMeta;
+
+typedef struct _NvDsBatchMeta {
+  NvDsMetaList *frame_meta_list;
+} NvDsBatchMeta;
+
+/* One object of a synthetic buffer, 40 bytes in native byte order (Python
+ * struct format "=QQIfffff"). Consecutive records with the same source_id
+ * and ntp_timestamp belong to one frame. */
+typedef struct {
+  uint64_t ntp_timestamp;
+  uint64_t object_id;
+  uint32_t source_id;
+  float left;
+  float top;
+  float width;
+  float height;
+  float confidence;
+} NvDsStubObject;
+
+typedef struct {
+  NvDsFrameMeta frame;
+  NvDsMetaList frame_link;
+  NvDsObjectMeta obj;
+  NvDsMetaList obj_link;
+} NvDsStubSlot;
+
+typedef struct {
+  NvDsBatchMeta batch; /* first, so free() on the batch releases everything */
+  NvDsStubSlot slots[];
+} NvDsStubBatch;
+
+/* Build a batch from n packed NvDsStubObject records at data, which need not
+ * be aligned. Returns NULL when n is 0 or allocation fails; free() the
+ * result. */
+static inline NvDsBatchMeta *nvds_stub_batch_new(const void *data, size_t n) {
+  if (n == 0)
+    return NULL;
+  NvDsStubBatch *b =
+      (NvDsStubBatch *)calloc(1, sizeof(NvDsStubBatch) + n * sizeof(NvDsStubSlot));
+  if (!b)
+    return NULL;
+  NvDsMetaList **next_frame = &b->batch.frame_meta_list;
+  NvDsMetaList **next_obj = NULL;
+  NvDsFrameMeta *frame = NULL;
+  for (size_t i = 0; i < n; i++) {
+    NvDsStubObject rec;
+    memcpy(&rec, (const char *)data + i * sizeof(rec), sizeof(rec));
+    NvDsStubSlot *s = &b->slots[i];
+    if (!frame || frame->source_id != rec.source_id ||
+        frame->ntp_timestamp != rec.ntp_timestamp) {
+      frame = &s->frame;
+      frame->source_id = rec.source_id;
+      frame->ntp_timestamp = rec.ntp_timestamp;
+      s->frame_link.data = frame;
+      *next_frame = &s->frame_link;
+      next_frame = &s->frame_link.next;
+      next_obj = &frame->obj_meta_list;
+    }
+    s->obj.object_id = rec.object_id;
+    s->obj.rect_params.left = rec.left;
+    s->obj.rect_params.top = rec.top;
+    s->obj.rect_params.width = rec.width;
+    s->obj.rect_params.height = rec.height;
+    s->obj.confidence = rec.confidence;
+    s->obj_link.data = &s->obj;
+    *next_obj = &s->obj_link;
+    next_obj = &s->obj_link.next;
+  }
+  return &b->batch;
+}
+
+#endif /* NVDS_STUB_H */
@@ -1,107 +1,486 @@
-import sqlite3
+import argparse
+import logging
 import time
-from typing import List, Tuple, Optional
-import json
-
-try:
-    import yaml
-except Exception:  # pragma: no cover - PyYAML may be missing
-    yaml = None
+from functools import partial
+from typing import Iterable, List, Optional, Sequence, Union
 
 import cv2
+import numpy as np
 from ultralytics import YOLO
-from tracker import ByteTracker
+from carspeed.core.detector import Detector
+from carspeed.core.processor import Detection, FrameProcessor, Row
+from carspeed.core.projection import Homography
+from carspeed.core.scheduler import AdaptiveInterval
+from carspeed.core.summary import ROW_MODES, SummaryRow
+from carspeed.core.tracker_wrapper import available_trackers, create_tracker
+from carspeed.io.db import (
+    BACKPRESSURE_POLICIES,
+    INSERT_SUMMARY,
+    INSERT_VEHICLE,
+    INSERT_VEHICLE_SOURCE,
+    SYNCHRONOUS_MODES,
+    AsyncWriter,
+    BatchWriter,
+    init_db,
+)
+from carspeed.io.capture import read_frames, run_batched, run_stream
+from carspeed.io.detection_cache import DetectionCache, DetectionCacheWriter, cache_path
+from carspeed.io.replay import (
+    CAP_PROP_FRAME_COUNT,
+    ReplayJob,
+    frame_rate,
+    media_frames,
+    replay_parallel,
+)
+from carspeed.pipeline.config import CaptureOptions
+
 
+logger = logging.getLogger(__name__)
 
+VEHICLE_CLASSES = (2, 5, 7)  # COCO car, bus, truck
 
 
-def load_homography(path: str) -> Optional[List[float]]:
+def load_homography(path: str) -> Optional[Homography]:
     if not path:
         return None
-    with open(path, "r") as f:
-        if yaml and path.endswith((".yml", ".yaml")):
-            data = yaml.safe_load(f)
-        else:
-            data = json.load(f)
-    flat = [float(v) for row in data for v in row]
-    if len(flat) != 9:
-        raise ValueError("homography must have 9 values")
-    return flat
-
-
-def init_db(path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(path)
-    cur = conn.cursor()
-    cur.execute(
-        """CREATE TABLE IF NOT EXISTS vehicles (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp REAL,
-        track_id INTEGER,
-        label TEXT,
-        speed REAL,
-        x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
-        confidence REAL
-    )"""
-    )
-    conn.commit()
-    return conn
-
-
-def run_capture(
-    cap: cv2.VideoCapture,
-    model_path: str,
-    db_path: str,
-    ppm: float,
-    iou_threshold: float = 0.3,
-    decay_time: float = 1.0,
-    homography: Optional[List[float]] = None,
-):
-    model = YOLO(model_path)
-    conn = init_db(db_path)
-    tracker = ByteTracker(iou_threshold, decay_time)
-    prev_positions = {}
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        ts = time.time()
-        detections = []
-        results = model(frame)
-        for r in results:
+    return Homography.from_file(path)
+
+
+def _log_timing(name: str, seconds: float, count: int) -> None:
+    logger.debug("%s update: %.3f ms for %d boxes", name, seconds * 1e3, count)
+
+
+def open_writer(
+    options: CaptureOptions, sql: str = INSERT_VEHICLE
+) -> Union[AsyncWriter, BatchWriter]:
+    if options.async_db:
+        return AsyncWriter(
+            options.db,
+            sql=sql,
+            maxsize=options.db_queue_size,
+            policy=options.backpressure,
+            flush_rows=options.flush_rows,
+            flush_interval=options.flush_interval,
+            synchronous=options.synchronous,
+        )
+    return BatchWriter(
+        init_db(options.db, wal=True, synchronous=options.synchronous),
+        sql=sql,
+        flush_rows=options.flush_rows,
+        flush_interval=options.flush_interval,
+        close_connection=True,
+    )
+
+
+def make_processor(
+    options: CaptureOptions, summaries: bool = False, source_id: int = 0
+) -> FrameProcessor:
+    tracker_options = {"decay_time": options.decay_time}
+    if options.tracker != "centroid":
+        tracker_options["iou_threshold"] = options.iou_threshold
+    tracker_options.update(options.tracker_options)
+    trk = create_tracker(options.tracker, **tracker_options)
+    trk.timing_hook = _log_timing
+    return FrameProcessor(
+        trk,
+        options.ppm,
+        decay_time=options.decay_time,
+        window=options.window,
+        homography=options.homography,
+        homography_lut=options.homography_lut,
+        summaries=summaries,
+        source_id=source_id,
+    )
+
+
+class YoloDetector(Detector):
+    """Ultralytics YOLO keeping the vehicle classes; batches run in one call."""
+
+    def __init__(self, model_path: str):
+        self.model = YOLO(model_path)
+
+    def detect_batch(self, frames: Sequence[np.ndarray]) -> List[List[Detection]]:
+        out = []
+        for r in self.model(list(frames)):
+            detections = []
             for box in r.boxes:
                 cls = int(box.cls[0])
-                if cls not in [2, 5, 7]:
+                if cls not in VEHICLE_CLASSES:
                     continue  # vehicle classes
                 x1, y1, x2, y2 = map(int, box.xyxy[0])
                 detections.append((x1, y1, x2, y2, float(box.conf[0]), r.names[cls]))
-        boxes = [d[:4] for d in detections]
-        assignments = tracker.update(boxes, ts)
-        for (x1, y1, x2, y2, conf, label), (track_id, center) in zip(detections, assignments.items()):
-            cx, cy = center
-            if homography:
-                tx = homography[0] * cx + homography[1] * cy + homography[2]
-                ty = homography[3] * cx + homography[4] * cy + homography[5]
-                tz = homography[6] * cx + homography[7] * cy + homography[8]
-                if tz != 0:
-                    cx = tx / tz
-                    cy = ty / tz
-            speed = 0.0
-            if track_id in prev_positions:
-                px, py, pts = prev_positions[track_id]
-                dist_pix = ((cx - px) ** 2 + (cy - py) ** 2) ** 0.5
-                dist_m = dist_pix / ppm
-                dt = ts - pts
-                if dt > 0:
-                    speed = dist_m / dt  # m/s
-            prev_positions[track_id] = (cx, cy, ts)
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO vehicles(timestamp, track_id, label, speed, x1, y1, x2, y2, confidence)"
-                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (ts, track_id, label, speed, x1, y1, x2, y2, conf),
+            out.append(detections)
+        return out
+
+
+class _Cached(Detector):
+    """Frames replayed from a DetectionCache are already detections."""
+
+    def detect_batch(self, frames: Sequence[List[Detection]]) -> List[List[Detection]]:
+        return list(frames)
+
+
+def _log_writer(writer: Union[AsyncWriter, BatchWriter]) -> None:
+    if isinstance(writer, AsyncWriter):
+        logger.info(
+            "DB writer: %d rows written, %d dropped, max queue depth %d",
+            writer.rows_written,
+            writer.dropped,
+            writer.max_depth,
+        )
+
+
+def run_capture(options: CaptureOptions) -> None:
+    """Detect, track and store vehicles of one capture or of several.
+
+    With several ``sources``, or ``batch_size > 1``, frames are detected in
+    batches and every capture gets its own tracker; rows of several captures
+    carry their index as ``source_id``. ``rows`` is one of
+    :data:`~carspeed.core.summary.ROW_MODES` and selects per-frame
+    ``vehicles`` rows, one ``vehicle_summaries`` row per vehicle, or both.
+    """
+    uris = options.uris
+    multi = len(uris) > 1
+    min_interval, max_interval = options.min_detect_interval, options.max_detect_interval
+    detection_cache = cache = recorder = None
+    if options.detection_cache:
+        # timestamps are cached too, so they are part of the key
+        detection_cache = cache_path(
+            options.detection_cache,
+            options.video,
+            options.model,
+            extra=f"{VEHICLE_CLASSES}:{options.start_time}:{options.fps}",
+        )
+    if detection_cache is not None and DetectionCache.exists(detection_cache):
+        cache = DetectionCache(detection_cache)
+        logger.info(
+            "Replaying %d frames, %d detections from %s",
+            len(cache),
+            cache.detections,
+            detection_cache,
+        )
+    elif detection_cache is not None:
+        recorder = DetectionCacheWriter(detection_cache, meta={"model": options.model})
+        if max_interval > 1:
+            # the cache must hold every frame to replay any detect interval later
+            logger.warning("Detecting every frame while building %s", detection_cache)
+            min_interval = max_interval = 1
+    schedulers = [AdaptiveInterval(min_interval, max_interval) for _ in uris]
+    detector = _Cached() if cache is not None else YoloDetector(options.model)
+    # summary rows go through the same writer, so one connection holds the lock
+    writer = open_writer(options, sql=INSERT_VEHICLE_SOURCE if multi else INSERT_VEHICLE)
+    processors = [
+        make_processor(options, summaries=options.rows != "raw", source_id=idx)
+        for idx in range(len(uris))
+    ]
+    caps = [cv2.VideoCapture(uri) for uri in uris]
+    if cache is not None:
+        sources = [iter(cache)]
+    elif options.replay:
+        # recorded files are stamped with media time so they can run at any speed
+        sources = [media_frames(c, options.fps, epoch=options.start_time) for c in caps]
+    else:
+        sources = [read_frames(c) for c in caps]
+
+    raw_rows = options.rows != "summary"
+
+    def write(idx: int, rows: List[Row]) -> None:
+        if raw_rows:
+            writer.write_many((row + (idx,) for row in rows) if multi else rows)
+
+    def write_summaries(idx: int, summaries: List[SummaryRow]) -> None:
+        writer.write_many(summaries, INSERT_SUMMARY)
+
+    summarize = write_summaries if options.rows != "raw" else None
+
+    collector = None
+    queues = []
+    try:
+        if multi or options.batch_size > 1:
+            collector, queues = run_batched(
+                sources,
+                detector,
+                processors,
+                write,
+                batch_size=options.batch_size,
+                max_latency=options.max_batch_latency,
+                schedulers=schedulers,
+                queue_size=max(options.queue_size, options.batch_size),
+                frame_policy=options.frame_policy,
+                on_detections=(lambda idx, ts, d: recorder.append(ts, d))
+                if recorder is not None
+                else None,
+                summary_sink=summarize,
+            )
+        else:
+            queues = run_stream(
+                sources[0],
+                detector,
+                processors[0],
+                partial(write, 0),
+                scheduler=schedulers[0],
+                staged=options.staged,
+                queue_size=options.queue_size,
+                frame_policy=options.frame_policy,
+                on_detections=recorder.append if recorder is not None else None,
+                summary_sink=partial(summarize, 0) if summarize is not None else None,
+            )
+        if recorder is not None:
+            recorder.close()
+            logger.info("Cached detections of %d frames in %s", len(recorder), detection_cache)
+    finally:
+        for c in caps:
+            c.release()
+        writer.close()
+        logger.info(
+            "Detector ran on %d of %d frames",
+            sum(sch.detections for sch in schedulers),
+            sum(sch.frames for sch in schedulers),
+        )
+        if collector is not None and collector.batches:
+            logger.info(
+                "Detector ran %d batches, %.1f frames per batch",
+                collector.batches,
+                collector.frames / collector.batches,
             )
-            conn.commit()
+        for queue in queues:
+            logger.info(
+                "%s queue: %d items, %d dropped, max depth %d",
+                queue.name,
+                queue.items,
+                queue.dropped,
+                queue.max_depth,
+            )
+        _log_writer(writer)
+
+
+def run_replay(options: CaptureOptions) -> None:
+    """Replay ``options.video`` in overlapping chunks on ``options.workers`` processes."""
+    video = options.video
+    cap = cv2.VideoCapture(video)
+    try:
+        fps = frame_rate(cap, options.fps)
+        frame_count = int(cap.get(CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+    if frame_count <= 0:
+        raise ValueError(f"cannot determine the frame count of {video}")
+    job = ReplayJob(
+        video,
+        cv2.VideoCapture,
+        partial(YoloDetector, options.model),
+        partial(make_processor, options),
+        fps,
+        epoch=options.start_time,
+        make_scheduler=partial(
+            AdaptiveInterval, options.min_detect_interval, options.max_detect_interval
+        ),
+    )
+    writer = open_writer(options)
+    start = time.monotonic()
+    try:
+        chunks = replay_parallel(
+            job,
+            frame_count,
+            writer.write_many,
+            chunk_frames=max(1, int(options.chunk_seconds * fps)),
+            overlap=int(options.chunk_overlap * fps),
+            workers=options.workers,
+        )
+    finally:
+        writer.close()
+        _log_writer(writer)
+    elapsed = time.monotonic() - start
+    logger.info(
+        "Replayed %.0fs of video in %d chunks in %.1fs (%.1fx realtime)",
+        frame_count / fps,
+        chunks,
+        elapsed,
+        frame_count / fps / max(elapsed, 1e-9),
+    )
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Return the argument parser for the OpenCV/YOLO path."""
+    parser = argparse.ArgumentParser(description="OpenCV speed detector")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--rtsp", help="RTSP stream URL")
+    src.add_argument("--video", help="Path to a video file")
+    src.add_argument(
+        "--sources",
+        nargs="+",
+        metavar="URI",
+        help="Several RTSP URLs or video files detected in shared batches",
+    )
+    parser.add_argument("--model", default="yolov8n.pt", help="YOLO model path")
+    parser.add_argument("--db", default="vehicles.db", help="SQLite DB path")
+    parser.add_argument("--ppm", type=float, required=True, help="Pixels per meter")
+    parser.add_argument("--homography", help="Path to 3x3 homography JSON/YAML")
+    parser.add_argument(
+        "--homography-lut",
+        action="store_true",
+        help="Precompute the homography for every pixel of the first frame",
+    )
+    parser.add_argument("--window", type=int, default=3, help="History window size")
+    parser.add_argument(
+        "--flush-rows", type=int, default=500, help="Rows buffered per DB transaction"
+    )
+    parser.add_argument(
+        "--flush-interval", type=float, default=1.0, help="Max seconds between DB flushes"
+    )
+    parser.add_argument(
+        "--synchronous",
+        default="NORMAL",
+        type=str.upper,
+        choices=SYNCHRONOUS_MODES,
+        help="SQLite synchronous pragma",
+    )
+    parser.add_argument(
+        "--async-db", action="store_true", help="Write rows from a background thread"
+    )
+    parser.add_argument(
+        "--db-queue-size", type=int, default=10000, help="Rows queued for --async-db"
+    )
+    parser.add_argument(
+        "--db-backpressure",
+        default="block",
+        choices=BACKPRESSURE_POLICIES,
+        help="What to do when the --async-db queue is full",
+    )
+    parser.add_argument(
+        "--tracker", default="iou", choices=available_trackers(), help="Tracker to use"
+    )
+    parser.add_argument("--iou-threshold", type=float, default=0.3)
+    parser.add_argument("--decay-time", type=float, default=1.0)
+    parser.add_argument(
+        "--max-distance", type=float, help="Match radius in pixels (centroid tracker)"
+    )
+    parser.add_argument(
+        "--detect-interval-min",
+        type=int,
+        default=1,
+        help="Run the detector at least every N frames while vehicles are tracked",
+    )
+    parser.add_argument(
+        "--detect-interval-max",
+        type=int,
+        help="Back off to every N frames when the scene is empty (default: min)",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Overlap capture, detection and tracking in separate threads",
+    )
+    parser.add_argument(
+        "--frame-queue-size", type=int, default=4, help="Frames queued per --staged stage"
+    )
+    parser.add_argument(
+        "--frame-backpressure",
+        default="block",
+        choices=BACKPRESSURE_POLICIES,
+        help="What to do when frames arrive faster than the detector (--staged)",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Stamp --video frames with media time and process them as fast as possible",
+    )
+    parser.add_argument("--fps", type=float, help="Frame rate for --replay (default: from file)")
+    parser.add_argument(
+        "--start-time",
+        type=float,
+        default=0.0,
+        help="Epoch seconds of the first --replay frame (default: 0)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Processes replaying chunks of the file"
+    )
+    parser.add_argument(
+        "--chunk-seconds", type=float, default=300.0, help="Video seconds per --workers chunk"
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=float,
+        default=2.0,
+        help="Seconds decoded before each chunk to carry tracks across its start",
+    )
+    parser.add_argument(
+        "--detection-cache",
+        metavar="DIR",
+        help="Store --replay detections here keyed by video and model, and reuse them",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1, help="Frames per detector call"
+    )
+    parser.add_argument(
+        "--max-batch-latency",
+        type=float,
+        default=0.05,
+        help="Seconds a partial batch waits for more frames",
+    )
+    parser.add_argument(
+        "--rows",
+        default="raw",
+        choices=ROW_MODES,
+        help="Store per-frame rows, one summary row per vehicle when its track ends, or both",
+    )
+    parser.add_argument("--log-level", default="INFO", help="Logging level")
+    return parser
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    """Parse arguments and run the OpenCV capture loop."""
+    parser = build_arg_parser()
+    args = parser.parse_args(list(argv) if argv is not None else None)
+    logging.basicConfig(
+        format="%(levelname)s:%(message)s",
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+    )
+    try:
+        options = CaptureOptions(
+            ppm=args.ppm,
+            rtsp=args.rtsp,
+            video=args.video,
+            sources=args.sources or [],
+            model=args.model,
+            db=args.db,
+            homography=load_homography(args.homography),
+            homography_lut=args.homography_lut,
+            window=args.window,
+            tracker=args.tracker,
+            iou_threshold=args.iou_threshold,
+            decay_time=args.decay_time,
+            tracker_options=(
+                {} if args.max_distance is None else {"max_distance": args.max_distance}
+            ),
+            flush_rows=args.flush_rows,
+            flush_interval=args.flush_interval,
+            synchronous=args.synchronous,
+            async_db=args.async_db,
+            db_queue_size=args.db_queue_size,
+            backpressure=args.db_backpressure,
+            min_detect_interval=args.detect_interval_min,
+            max_detect_interval=args.detect_interval_max,
+            staged=args.staged,
+            queue_size=args.frame_queue_size,
+            frame_policy=args.frame_backpressure,
+            replay=args.replay,
+            fps=args.fps,
+            start_time=args.start_time,
+            detection_cache=args.detection_cache,
+            batch_size=args.batch_size,
+            max_batch_latency=args.max_batch_latency,
+            rows=args.rows,
+            workers=args.workers,
+            chunk_seconds=args.chunk_seconds,
+            chunk_overlap=args.chunk_overlap,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    if options.workers > 1:
+        run_replay(options)
+    else:
+        run_capture(options)
 
-    cap.release()
-    conn.close()
+if __name__ == "__main__":  # pragma: no cover - manual execution
+    main()
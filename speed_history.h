@@ -0,0 +1,197 @@
+/* Per-track position history for the speedtrack element.
+ *
+ * Track histories are carved out of a slab: tracks and their fixed-size
+ * sample rings are allocated in chunks of SPEED_SLAB_CHUNK and recycled
+ * through a free-list, so a new track costs no heap allocation once the slab
+ * has warmed up. Each track keeps running sums of its window so the
+ * least-squares speed is O(1) per sample instead of O(window).
+ *
+ * Plain C with no GLib dependency so it can be benchmarked and tested
+ * without GStreamer.
+ */
+#ifndef SPEED_HISTORY_H
+#define SPEED_HISTORY_H
+
+#include <math.h>
+#include <stdint.h>
+#include <stdlib.h>
+
+#include "track_summary.h"
+
+#define SPEED_SLAB_CHUNK 256
+
+typedef struct {
+  double x;
+  double y;
+  double t; /* seconds relative to the track's origin t0 */
+} SpeedSample;
+
+typedef struct _SpeedTrack SpeedTrack;
+struct _SpeedTrack {
+  uint64_t track_id;
+  uint32_t source_id;
+  double last_seen;
+  /* LRU list links while in use, free-list link (next) while recycled */
+  SpeedTrack *prev;
+  SpeedTrack *next;
+  SpeedSample *pts; /* window entries owned by the slab */
+  int count;
+  int idx;
+  double t0;
+  /* running sums over the samples currently in the ring */
+  double st, sx, sy, stt, stx, sty;
+  TrackSummary summary; /* filled only when summaries are enabled */
+};
+
+typedef struct _SpeedSlabChunk SpeedSlabChunk;
+struct _SpeedSlabChunk {
+  SpeedSlabChunk *next;
+  SpeedSample *samples; /* SPEED_SLAB_CHUNK * window entries */
+  SpeedTrack tracks[SPEED_SLAB_CHUNK];
+};
+
+typedef struct {
+  int window;
+  SpeedSlabChunk *chunks;
+  SpeedTrack *free_list;
+  size_t in_use;
+  size_t capacity;
+} SpeedSlab;
+
+static inline void speed_slab_init(SpeedSlab *slab, int window) {
+  slab->window = window;
+  slab->chunks = NULL;
+  slab->free_list = NULL;
+  slab->in_use = 0;
+  slab->capacity = 0;
+}
+
+/* Add one chunk of tracks to the free-list. Returns 0 on allocation failure. */
+static inline int speed_slab_grow(SpeedSlab *slab) {
+  SpeedSlabChunk *chunk = (SpeedSlabChunk *)calloc(1, sizeof(SpeedSlabChunk));
+  SpeedSample *samples =
+      (SpeedSample *)calloc((size_t)SPEED_SLAB_CHUNK * slab->window, sizeof(SpeedSample));
+  if (!chunk || !samples) {
+    free(chunk);
+    free(samples);
+    return 0;
+  }
+  chunk->samples = samples;
+  chunk->next = slab->chunks;
+  slab->chunks = chunk;
+  for (int i = SPEED_SLAB_CHUNK - 1; i >= 0; i--) {
+    SpeedTrack *t = &chunk->tracks[i];
+    t->pts = samples + (size_t)i * slab->window;
+    t->next = slab->free_list;
+    slab->free_list = t;
+  }
+  slab->capacity += SPEED_SLAB_CHUNK;
+  return 1;
+}
+
+/* Release every chunk. All tracks handed out become invalid. */
+static inline void speed_slab_clear(SpeedSlab *slab) {
+  while (slab->chunks) {
+    SpeedSlabChunk *next = slab->chunks->next;
+    for (int i = 0; i < SPEED_SLAB_CHUNK; i++)
+      track_summary_free(&slab->chunks->tracks[i].summary);
+    free(slab->chunks->samples);
+    free(slab->chunks);
+    slab->chunks = next;
+  }
+  slab->free_list = NULL;
+  slab->in_use = 0;
+  slab->capacity = 0;
+}
+
+/* Take a track from the free-list, growing the slab if needed. */
+static inline SpeedTrack *speed_slab_alloc(SpeedSlab *slab, uint64_t track_id) {
+  if (!slab->free_list && !speed_slab_grow(slab))
+    return NULL;
+  SpeedTrack *t = slab->free_list;
+  slab->free_list = t->next;
+  SpeedSample *pts = t->pts;
+  TrackSummary summary = t->summary;
+  *t = (SpeedTrack){0};
+  t->pts = pts;
+  t->summary = summary;
+  track_summary_reset(&t->summary); /* keeps the speeds buffer */
+  t->track_id = track_id;
+  slab->in_use++;
+  return t;
+}
+
+static inline void speed_slab_release(SpeedSlab *slab, SpeedTrack *t) {
+  t->prev = NULL;
+  t->next = slab->free_list;
+  slab->free_list = t;
+  slab->in_use--;
+}
+
+/* Recompute the running sums from the ring, rebasing t on the oldest sample
+ * so the sums stay small and rounding error does not accumulate. */
+static inline void speed_track_resum(SpeedTrack *t, int window) {
+  int first = (t->idx - t->count + window) % window;
+  double shift = t->pts[first].t;
+  t->t0 += shift;
+  t->st = t->sx = t->sy = t->stt = t->stx = t->sty = 0.0;
+  for (int i = 0; i < t->count; i++) {
+    SpeedSample *p = &t->pts[(first + i) % window];
+    p->t -= shift;
+    t->st += p->t;
+    t->sx += p->x;
+    t->sy += p->y;
+    t->stt += p->t * p->t;
+    t->stx += p->t * p->x;
+    t->sty += p->t * p->y;
+  }
+}
+
+/* Append one observation, dropping the oldest once the window is full. */
+static inline void speed_track_push(SpeedTrack *t, int window, double x, double y,
+                                    double ts) {
+  if (t->count == 0)
+    t->t0 = ts;
+  SpeedSample *p = &t->pts[t->idx];
+  if (t->count == window) {
+    t->st -= p->t;
+    t->sx -= p->x;
+    t->sy -= p->y;
+    t->stt -= p->t * p->t;
+    t->stx -= p->t * p->x;
+    t->sty -= p->t * p->y;
+  } else {
+    t->count++;
+  }
+  p->x = x;
+  p->y = y;
+  p->t = ts - t->t0;
+  t->st += p->t;
+  t->sx += p->x;
+  t->sy += p->y;
+  t->stt += p->t * p->t;
+  t->stx += p->t * p->x;
+  t->sty += p->t * p->y;
+  if (++t->idx == window) {
+    t->idx = 0;
+    /* amortised O(1): one exact pass every window samples */
+    speed_track_resum(t, window);
+  }
+}
+
+/* Least-squares speed over the window in pixels (or metres) per second,
+ * divided by ppm. Returns 0 with fewer than two samples or no time spread. */
+static inline double speed_track_speed(const SpeedTrack *t, double ppm) {
+  if (t->count < 2)
+    return 0.0;
+  double n = t->count;
+  double den = t->stt - t->st * t->st / n;
+  /* cancellation leaves den as rounding noise when all timestamps match */
+  if (den <= 1e-12 * (t->stt + 1.0))
+    return 0.0;
+  double vx = (t->stx - t->st * t->sx / n) / den;
+  double vy = (t->sty - t->st * t->sy / n) / den;
+  return sqrt(vx * vx + vy * vy) / ppm;
+}
+
+#endif /* SPEED_HISTORY_H */
@@ -6,105 +6,98 @@
 #ifdef HAVE_NVDS
 #include <nvds_meta.h>
 #include <nvds_meta_schema.h>
+
+/* the batch meta is owned by the buffer */
+static inline void speed_batch_release(NvDsBatchMeta *batch) { (void)batch; }
 #else
-typedef struct _NvDsMetaList {
-  struct _NvDsMetaList *next;
-  void *data;
-} NvDsMetaList;
-
-typedef struct _NvDsObjectMeta {
-  guint64 object_id;
-  struct {
-    gfloat left;
-    gfloat top;
-    gfloat width;
-    gfloat height;
-  } rect_params;
-} NvDsObjectMeta;
-
-typedef struct _NvDsFrameMeta {
-  NvDsMetaList *obj_meta_list;
-  guint64 ntp_timestamp;
-} NvDsFrameMeta;
-
-typedef struct _NvDsBatchMeta {
-  NvDsMetaList *frame_meta_list;
-} NvDsBatchMeta;
+#include "nvds_stub.h"
 
+#ifdef SPEEDTRACK_STUB_PAYLOAD
+/* Test builds (make STUB_PAYLOAD=1) read NvDsStubObject records from the
+ * buffer payload, so tests can push synthetic objects through appsrc. */
+static inline NvDsBatchMeta *gst_buffer_get_nvds_batch_meta(GstBuffer *buf) {
+  GstMapInfo map;
+  if (!gst_buffer_map(buf, &map, GST_MAP_READ))
+    return NULL;
+  NvDsBatchMeta *batch = nvds_stub_batch_new(map.data, map.size / sizeof(NvDsStubObject));
+  gst_buffer_unmap(buf, &map);
+  return batch;
+}
+
+static inline void speed_batch_release(NvDsBatchMeta *batch) { free(batch); }
+#else
+/* without DeepStream buffers carry no batch meta and pass through */
 static inline NvDsBatchMeta *gst_buffer_get_nvds_batch_meta(GstBuffer *buf) {
   (void)buf;
   return NULL;
 }
+
+static inline void speed_batch_release(NvDsBatchMeta *batch) { (void)batch; }
+#endif
 #endif
 #include <sqlite3.h>
 #include <math.h>
+#include "speed_history.h"
+#include "track_table.h"
 
 GST_DEBUG_CATEGORY_STATIC(gst_speed_debug);
 #define GST_CAT_DEFAULT gst_speed_debug
 
+/* A finished vehicle, written to vehicle_summaries. */
+typedef struct {
+  gdouble entry_ts;
+  gdouble exit_ts;
+  gdouble distance; /* metres */
+  gdouble mean_speed;
+  gdouble median_speed;
+  gdouble max_speed;
+  guint samples;
+  gfloat confidence;
+  gfloat box[4];
+} SpeedSummaryRecord;
+
+/* One pending row handed from the streaming thread to the writer thread. */
 typedef struct {
-  gdouble x;
-  gdouble y;
   gdouble ts;
-} HistoryPoint;
+  guint source_id;
+  guint64 track_id;
+  gdouble speed;
+  gboolean is_summary; /* a vehicle_summaries row described by summary */
+  SpeedSummaryRecord summary;
+} SpeedRecord;
 
+/* Calibration and live tracks of one nvstreammux source. */
 typedef struct {
-  gint cap;
-  gint count;
-  gint idx;
-  HistoryPoint *pts;
-} History;
-
-static History *history_new(gint cap) {
-  History *h = g_new0(History, 1);
-  h->cap = cap;
-  h->count = 0;
-  h->idx = 0;
-  h->pts = g_new0(HistoryPoint, cap);
-  return h;
-}
-
-static void history_free(gpointer data) {
-  History *h = (History *)data;
-  g_free(h->pts);
-  g_free(h);
-}
-
-static void history_add(History *h, gdouble x, gdouble y, gdouble ts) {
-  h->pts[h->idx].x = x;
-  h->pts[h->idx].y = y;
-  h->pts[h->idx].ts = ts;
-  h->idx = (h->idx + 1) % h->cap;
-  if (h->count < h->cap)
-    h->count++;
-}
-
-static gdouble history_speed(const History *h, gdouble ppm) {
-  if (h->count < 2)
-    return 0.0;
-  gdouble sum_t = 0.0, sum_x = 0.0, sum_y = 0.0;
-  for (int i = 0; i < h->count; i++) {
-    int idx = (h->idx - h->count + i + h->cap) % h->cap;
-    sum_t += h->pts[idx].ts;
-    sum_x += h->pts[idx].x;
-    sum_y += h->pts[idx].y;
-  }
-  gdouble mean_t = sum_t / h->count;
-  gdouble mean_x = sum_x / h->count;
-  gdouble mean_y = sum_y / h->count;
-  gdouble num_x = 0.0, num_y = 0.0, den = 0.0;
-  for (int i = 0; i < h->count; i++) {
-    int idx = (h->idx - h->count + i + h->cap) % h->cap;
-    gdouble dt = h->pts[idx].ts - mean_t;
-    num_x += dt * (h->pts[idx].x - mean_x);
-    num_y += dt * (h->pts[idx].y - mean_y);
-    den += dt * dt;
+  gdouble ppm;
+  gdouble H[9];
+  gboolean have_h;
+  TrackTable tracks; /* DeepStream object_id -> SpeedTrack* in slab */
+} SpeedSource;
+
+/* Parse a row-major 3x3 matrix separated by commas, semicolons or spaces. */
+static gboolean speed_parse_homography(const gchar *s, gdouble H[9]) {
+  if (!s || !*s)
+    return FALSE;
+  gchar **tokens = g_strsplit_set(s, ",; ", -1);
+  int n = 0;
+  for (int i = 0; tokens[i]; i++) {
+    if (!*tokens[i])
+      continue;
+    if (n == 9) {
+      n++;
+      break;
+    }
+    H[n++] = g_ascii_strtod(tokens[i], NULL);
   }
-  if (den == 0.0)
-    return 0.0;
-  gdouble vx = num_x / den;
-  gdouble vy = num_y / den;
-  return sqrt(vx * vx + vy * vy) / ppm;
+  g_strfreev(tokens);
+  return n == 9;
+}
+
+static void speed_source_free(SpeedSource *src) {
+  if (!src)
+    return;
+  track_table_clear(&src->tracks);
+  g_free(src);
 }
 
 typedef struct {
@@ -113,10 +106,45 @@ typedef struct {
   gchar *db_path;
   sqlite3 *db;
   gint window;
-  GHashTable *history; /* key: guint64 track id, value: History* */
+  gchar *source_config;
+  SpeedSource **sources; /* indexed by NvDsFrameMeta.source_id */
+  guint n_sources;
+  SpeedSlab slab; /* track histories of every source */
+  SpeedTrack *lru_head; /* least recently seen track */
+  SpeedTrack *lru_tail; /* most recently seen track */
+  gdouble track_timeout; /* seconds of running time, shared by every source */
+  guint max_tracks;
+  gdouble now; /* running time (s) of the buffer being processed */
+  gint n_tracks; /* live tracks published for the tracks property */
   gdouble H[9];
   gboolean have_h;
-  GString *sql_batch;
+  sqlite3_stmt *insert_stmt;
+  sqlite3_stmt *summary_stmt;
+  gboolean raw_rows; /* per-frame rows in vehicles */
+  gboolean summaries; /* one vehicle_summaries row per evicted track */
+  gboolean in_txn;
+  gint64 txn_start; /* monotonic time (us) the open transaction began */
+  guint txn_rows;
+  gdouble flush_interval;
+  guint flush_rows;
+  /* rows of the current buffer, staged by the streaming thread without the
+   * lock and moved to the ring in one locked step */
+  SpeedRecord *pending;
+  guint n_pending;
+  guint pending_cap;
+  /* writer thread state; ring, counters and stopping are guarded by lock.
+   * Sources, tracks and the LRU list belong to the streaming thread. */
+  GThread *writer;
+  GMutex lock;
+  GCond cond;
+  SpeedRecord *ring;
+  guint queue_size; /* property, applied on the next start */
+  guint ring_cap;
+  guint ring_head;
+  guint ring_len;
+  gboolean stopping;
+  guint64 dropped;
+  guint64 written;
 } GstSpeed;
 
 typedef struct {
@@ -125,7 +153,25 @@ typedef struct {
 
 G_DEFINE_TYPE(GstSpeed, gst_speed, GST_TYPE_BASE_TRANSFORM);
 
-enum { PROP_0, PROP_PPM, PROP_DB, PROP_HOMOGRAPHY, PROP_WINDOW };
+enum {
+  PROP_0,
+  PROP_PPM,
+  PROP_DB,
+  PROP_HOMOGRAPHY,
+  PROP_WINDOW,
+  PROP_FLUSH_INTERVAL,
+  PROP_FLUSH_ROWS,
+  PROP_QUEUE_SIZE,
+  PROP_DROPPED,
+  PROP_QUEUED,
+  PROP_WRITTEN,
+  PROP_TRACK_TIMEOUT,
+  PROP_MAX_TRACKS,
+  PROP_TRACKS,
+  PROP_SOURCE_CONFIG,
+  PROP_RAW_ROWS,
+  PROP_SUMMARIES
+};
 
 static void gst_speed_set_property(GObject *object, guint prop_id,
                                    const GValue *value, GParamSpec *pspec) {
@@ -138,24 +184,39 @@ static void gst_speed_set_property(GObject *object, guint prop_id,
     g_free(speed->db_path);
     speed->db_path = g_value_dup_string(value);
     break;
-  case PROP_HOMOGRAPHY: {
-    const gchar *s = g_value_get_string(value);
-    speed->have_h = FALSE;
-    if (s && *s) {
-      gchar **tokens = g_strsplit_set(s, ",; ", -1);
-      int i;
-      for (i = 0; tokens[i] && i < 9; i++)
-        speed->H[i] = g_ascii_strtod(tokens[i], NULL);
-      speed->have_h = (i == 9);
-      g_strfreev(tokens);
-    }
+  case PROP_HOMOGRAPHY:
+    speed->have_h = speed_parse_homography(g_value_get_string(value), speed->H);
     break;
-  }
   case PROP_WINDOW:
     speed->window = g_value_get_int(value);
     if (speed->window < 2)
       speed->window = 2;
     break;
+  case PROP_FLUSH_INTERVAL:
+    speed->flush_interval = g_value_get_double(value);
+    break;
+  case PROP_FLUSH_ROWS:
+    speed->flush_rows = g_value_get_uint(value);
+    break;
+  case PROP_QUEUE_SIZE:
+    speed->queue_size = g_value_get_uint(value);
+    break;
+  case PROP_TRACK_TIMEOUT:
+    speed->track_timeout = g_value_get_double(value);
+    break;
+  case PROP_MAX_TRACKS:
+    speed->max_tracks = g_value_get_uint(value);
+    break;
+  case PROP_SOURCE_CONFIG:
+    g_free(speed->source_config);
+    speed->source_config = g_value_dup_string(value);
+    break;
+  case PROP_RAW_ROWS:
+    speed->raw_rows = g_value_get_boolean(value);
+    break;
+  case PROP_SUMMARIES:
+    speed->summaries = g_value_get_boolean(value);
+    break;
   default:
     G_OBJECT_WARN_INVALID_PROPERTY_ID(object, prop_id, pspec);
   }
@@ -187,20 +248,422 @@ static void gst_speed_get_property(GObject *object, guint prop_id, GValue *value
   case PROP_WINDOW:
     g_value_set_int(value, speed->window);
     break;
+  case PROP_FLUSH_INTERVAL:
+    g_value_set_double(value, speed->flush_interval);
+    break;
+  case PROP_FLUSH_ROWS:
+    g_value_set_uint(value, speed->flush_rows);
+    break;
+  case PROP_QUEUE_SIZE:
+    g_value_set_uint(value, speed->queue_size);
+    break;
+  case PROP_DROPPED:
+    g_mutex_lock(&speed->lock);
+    g_value_set_uint64(value, speed->dropped);
+    g_mutex_unlock(&speed->lock);
+    break;
+  case PROP_QUEUED:
+    g_mutex_lock(&speed->lock);
+    g_value_set_uint(value, speed->ring_len);
+    g_mutex_unlock(&speed->lock);
+    break;
+  case PROP_WRITTEN:
+    g_mutex_lock(&speed->lock);
+    g_value_set_uint64(value, speed->written);
+    g_mutex_unlock(&speed->lock);
+    break;
+  case PROP_TRACK_TIMEOUT:
+    g_value_set_double(value, speed->track_timeout);
+    break;
+  case PROP_MAX_TRACKS:
+    g_value_set_uint(value, speed->max_tracks);
+    break;
+  case PROP_TRACKS:
+    g_value_set_uint(value, (guint)g_atomic_int_get(&speed->n_tracks));
+    break;
+  case PROP_SOURCE_CONFIG:
+    g_value_set_string(value, speed->source_config);
+    break;
+  case PROP_RAW_ROWS:
+    g_value_set_boolean(value, speed->raw_rows);
+    break;
+  case PROP_SUMMARIES:
+    g_value_set_boolean(value, speed->summaries);
+    break;
   default:
     G_OBJECT_WARN_INVALID_PROPERTY_ID(object, prop_id, pspec);
   }
 }
 
+static void lru_unlink(GstSpeed *speed, SpeedTrack *h) {
+  if (h->prev)
+    h->prev->next = h->next;
+  else
+    speed->lru_head = h->next;
+  if (h->next)
+    h->next->prev = h->prev;
+  else
+    speed->lru_tail = h->prev;
+  h->prev = h->next = NULL;
+}
+
+static void lru_append(GstSpeed *speed, SpeedTrack *h) {
+  h->prev = speed->lru_tail;
+  h->next = NULL;
+  if (speed->lru_tail)
+    speed->lru_tail->next = h;
+  else
+    speed->lru_head = h;
+  speed->lru_tail = h;
+}
+
+/* Mark a track as seen at running time now, moving it to the tail of the LRU
+ * list, which therefore stays sorted by last_seen. */
+static void speed_track_touch(GstSpeed *speed, SpeedTrack *h, gdouble now) {
+  h->last_seen = now;
+  if (speed->lru_tail != h) {
+    lru_unlink(speed, h);
+    lru_append(speed, h);
+  }
+}
+
+static void speed_summary_stage(GstSpeed *speed, SpeedTrack *h);
+
+static void speed_track_evict(GstSpeed *speed, SpeedTrack *h) {
+  GST_LOG_OBJECT(speed, "evicting track %llu", (unsigned long long)h->track_id);
+  if (speed->summaries)
+    speed_summary_stage(speed, h);
+  lru_unlink(speed, h);
+  track_table_remove(&speed->sources[h->source_id]->tracks, h->track_id);
+  speed_slab_release(&speed->slab, h);
+}
+
+/* Drop tracks unseen for longer than track-timeout of running time. Only the
+ * expired tracks at the head of the LRU list are visited, so this is cheap to
+ * run per buffer. */
+static void speed_evict_stale(GstSpeed *speed, gdouble now) {
+  while (speed->lru_head && now - speed->lru_head->last_seen > speed->track_timeout)
+    speed_track_evict(speed, speed->lru_head);
+}
+
+/* Return the state of source_id, creating it with the element-wide ppm and
+ * homography if the source-config file did not describe it. */
+static SpeedSource *speed_source_get(GstSpeed *speed, guint source_id) {
+  if (source_id >= speed->n_sources) {
+    guint n = MAX(source_id + 1, speed->n_sources * 2);
+    speed->sources = g_renew(SpeedSource *, speed->sources, n);
+    for (guint i = speed->n_sources; i < n; i++)
+      speed->sources[i] = NULL;
+    speed->n_sources = n;
+  }
+  SpeedSource *src = speed->sources[source_id];
+  if (!src) {
+    src = g_new0(SpeedSource, 1);
+    src->ppm = speed->ppm;
+    src->have_h = speed->have_h;
+    for (int i = 0; i < 9; i++)
+      src->H[i] = speed->H[i];
+    speed->sources[source_id] = src;
+  }
+  return src;
+}
+
+static void speed_sources_free(GstSpeed *speed) {
+  for (guint i = 0; i < speed->n_sources; i++)
+    speed_source_free(speed->sources[i]);
+  g_free(speed->sources);
+  speed->sources = NULL;
+  speed->n_sources = 0;
+}
+
+/* Apply per-source calibration from the source-config key file. Each
+ * [sourceN] group may set ppm and/or homography for source_id N:
+ *
+ *   [source1]
+ *   ppm=32.5
+ *   homography=1,0,0,0,1,0,0,0,1
+ */
+static gboolean speed_load_source_config(GstSpeed *speed) {
+  GKeyFile *kf = g_key_file_new();
+  GError *err = NULL;
+  gboolean ok = FALSE;
+  gchar **groups = NULL;
+  if (!g_key_file_load_from_file(kf, speed->source_config, G_KEY_FILE_NONE, &err)) {
+    GST_ELEMENT_ERROR(speed, RESOURCE, OPEN_READ,
+                      ("Could not read source config %s", speed->source_config),
+                      ("%s", err->message));
+    goto out;
+  }
+  groups = g_key_file_get_groups(kf, NULL);
+  for (int g = 0; groups[g]; g++) {
+    gchar *end = NULL;
+    if (!g_str_has_prefix(groups[g], "source"))
+      continue;
+    guint64 id = g_ascii_strtoull(groups[g] + 6, &end, 10);
+    if (end == groups[g] + 6 || *end || id > G_MAXUINT16) {
+      GST_ELEMENT_ERROR(speed, RESOURCE, SETTINGS, (NULL),
+                        ("%s: bad group [%s], expected [sourceN]",
+                         speed->source_config, groups[g]));
+      goto out;
+    }
+    SpeedSource *src = speed_source_get(speed, (guint)id);
+    if (g_key_file_has_key(kf, groups[g], "ppm", NULL)) {
+      src->ppm = g_key_file_get_double(kf, groups[g], "ppm", &err);
+      if (err || src->ppm <= 0) {
+        GST_ELEMENT_ERROR(speed, RESOURCE, SETTINGS, (NULL),
+                          ("%s: [%s] ppm must be a positive number",
+                           speed->source_config, groups[g]));
+        goto out;
+      }
+    }
+    if (g_key_file_has_key(kf, groups[g], "homography", NULL)) {
+      gchar *h = g_key_file_get_string(kf, groups[g], "homography", NULL);
+      src->have_h = speed_parse_homography(h, src->H);
+      g_free(h);
+      if (!src->have_h) {
+        GST_ELEMENT_ERROR(speed, RESOURCE, SETTINGS, (NULL),
+                          ("%s: [%s] homography needs 9 values",
+                           speed->source_config, groups[g]));
+        goto out;
+      }
+    }
+    GST_DEBUG_OBJECT(speed, "source %u: ppm=%f homography=%d", (guint)id, src->ppm,
+                     src->have_h);
+  }
+  ok = TRUE;
+out:
+  g_clear_error(&err);
+  g_strfreev(groups);
+  g_key_file_free(kf);
+  return ok;
+}
+
+/* Return the history of (source, tid), creating it (and evicting the least
+ * recently seen track of any source when max-tracks is reached) if needed. */
+static SpeedTrack *speed_track_lookup(GstSpeed *speed, SpeedSource *src,
+                                      guint source_id, guint64 tid) {
+  SpeedTrack *hist = track_table_lookup(&src->tracks, tid);
+  if (hist)
+    return hist;
+  if (speed->slab.in_use >= speed->max_tracks && speed->lru_head)
+    speed_track_evict(speed, speed->lru_head);
+  hist = speed_slab_alloc(&speed->slab, tid);
+  if (!hist)
+    return NULL;
+  hist->source_id = source_id;
+  if (!track_table_insert(&src->tracks, tid, hist)) {
+    speed_slab_release(&speed->slab, hist);
+    return NULL;
+  }
+  lru_append(speed, hist);
+  return hist;
+}
+
+/* Open a transaction unless one is already open. */
+static gboolean speed_db_begin(GstSpeed *speed) {
+  if (speed->in_txn)
+    return TRUE;
+  if (sqlite3_exec(speed->db, "BEGIN;", NULL, NULL, NULL) != SQLITE_OK)
+    return FALSE;
+  speed->in_txn = TRUE;
+  speed->txn_start = g_get_monotonic_time();
+  return TRUE;
+}
+
+/* Commit the open transaction, if any. */
+static void speed_db_commit(GstSpeed *speed) {
+  if (!speed->in_txn)
+    return;
+  if (sqlite3_exec(speed->db, "COMMIT;", NULL, NULL, NULL) != SQLITE_OK)
+    GST_WARNING_OBJECT(speed, "commit failed: %s", sqlite3_errmsg(speed->db));
+  GST_DEBUG_OBJECT(speed, "committed %u rows", speed->txn_rows);
+  speed->in_txn = FALSE;
+  speed->txn_rows = 0;
+}
+
+/* Insert one row through the cached statement into the transaction opened by
+ * speed_db_begin(). Rows accumulate across frames until
+ * speed_db_maybe_commit(). Returns FALSE if the row was not inserted. */
+static gboolean speed_db_insert(GstSpeed *speed, const SpeedRecord *rec) {
+  sqlite3_stmt *stmt;
+  if (rec->is_summary) {
+    const SpeedSummaryRecord *s = &rec->summary;
+    stmt = speed->summary_stmt;
+    sqlite3_bind_int64(stmt, 1, rec->source_id);
+    sqlite3_bind_int64(stmt, 2, (sqlite3_int64)rec->track_id);
+    sqlite3_bind_double(stmt, 3, s->entry_ts);
+    sqlite3_bind_double(stmt, 4, s->exit_ts);
+    sqlite3_bind_double(stmt, 5, s->distance);
+    sqlite3_bind_double(stmt, 6, s->mean_speed);
+    sqlite3_bind_double(stmt, 7, s->median_speed);
+    sqlite3_bind_double(stmt, 8, s->max_speed);
+    sqlite3_bind_int64(stmt, 9, s->samples);
+    for (int i = 0; i < 4; i++)
+      sqlite3_bind_int64(stmt, 10 + i, (sqlite3_int64)lrintf(s->box[i]));
+    sqlite3_bind_double(stmt, 14, s->confidence);
+  } else {
+    stmt = speed->insert_stmt;
+    sqlite3_bind_double(stmt, 1, rec->ts);
+    sqlite3_bind_int64(stmt, 2, rec->source_id);
+    sqlite3_bind_int64(stmt, 3, (sqlite3_int64)rec->track_id);
+    sqlite3_bind_double(stmt, 4, rec->speed);
+  }
+  gboolean ok = sqlite3_step(stmt) == SQLITE_DONE;
+  if (!ok)
+    GST_WARNING_OBJECT(speed, "insert failed: %s", sqlite3_errmsg(speed->db));
+  sqlite3_reset(stmt);
+  if (ok)
+    speed->txn_rows++;
+  return ok;
+}
+
+/* Commit once the transaction holds flush-rows rows or is flush-interval old. */
+static void speed_db_maybe_commit(GstSpeed *speed) {
+  if (!speed->in_txn)
+    return;
+  gint64 age = g_get_monotonic_time() - speed->txn_start;
+  if (speed->txn_rows >= speed->flush_rows ||
+      age >= (gint64)(speed->flush_interval * G_USEC_PER_SEC))
+    speed_db_commit(speed);
+}
+
+static void speed_db_close(GstSpeed *speed) {
+  if (!speed->db)
+    return;
+  speed_db_commit(speed);
+  if (speed->insert_stmt) {
+    sqlite3_finalize(speed->insert_stmt);
+    speed->insert_stmt = NULL;
+  }
+  if (speed->summary_stmt) {
+    sqlite3_finalize(speed->summary_stmt);
+    speed->summary_stmt = NULL;
+  }
+  sqlite3_close(speed->db);
+  speed->db = NULL;
+}
+
+/* Append a row to the staging array of the current buffer. Streaming thread
+ * only, so no lock is needed. */
+static SpeedRecord *speed_stage(GstSpeed *speed) {
+  if (speed->n_pending == speed->pending_cap) {
+    speed->pending_cap = speed->pending_cap ? speed->pending_cap * 2 : 64;
+    speed->pending = g_renew(SpeedRecord, speed->pending, speed->pending_cap);
+  }
+  return &speed->pending[speed->n_pending++];
+}
+
+/* Move the staged rows to the writer ring and wake the writer. Never blocks
+ * on disk: rows that do not fit are dropped and counted. Called with
+ * speed->lock held. */
+static void speed_queue_push_locked(GstSpeed *speed) {
+  guint n = MIN(speed->n_pending, speed->ring_cap - speed->ring_len);
+  for (guint i = 0; i < n; i++)
+    speed->ring[(speed->ring_head + speed->ring_len++) % speed->ring_cap] = speed->pending[i];
+  if (n < speed->n_pending) {
+    if (speed->dropped == 0)
+      GST_WARNING_OBJECT(speed, "writer queue full, dropping rows");
+    speed->dropped += speed->n_pending - n;
+  }
+  speed->n_pending = 0;
+  if (speed->ring_len > 0)
+    g_cond_signal(&speed->cond);
+}
+
+static void speed_row_stage(GstSpeed *speed, gdouble ts, guint source_id, guint64 tid,
+                            gdouble spd) {
+  SpeedRecord *rec = speed_stage(speed);
+  rec->ts = ts;
+  rec->source_id = source_id;
+  rec->track_id = tid;
+  rec->speed = spd;
+  rec->is_summary = FALSE;
+}
+
+/* Stage the vehicle_summaries row of a track that is going away. Tracks that
+ * never had a speed estimate are skipped. */
+static void speed_summary_stage(GstSpeed *speed, SpeedTrack *h) {
+  TrackSummary *sum = &h->summary;
+  if (sum->n_speeds == 0 || !speed->summary_stmt)
+    return;
+  SpeedRecord *rec = speed_stage(speed);
+  SpeedSummaryRecord *s = &rec->summary;
+  rec->ts = sum->exit_ts;
+  rec->source_id = h->source_id;
+  rec->track_id = h->track_id;
+  rec->speed = 0.0;
+  rec->is_summary = TRUE;
+  s->entry_ts = sum->entry_ts;
+  s->exit_ts = sum->exit_ts;
+  s->distance = sum->distance / speed->sources[h->source_id]->ppm;
+  s->mean_speed = track_summary_mean(sum);
+  s->median_speed = track_summary_median(sum);
+  s->max_speed = sum->speed_max;
+  s->samples = sum->samples;
+  s->confidence = sum->confidence;
+  for (int i = 0; i < 4; i++)
+    s->box[i] = sum->box[i];
+}
+
+/* Drain the ring into the database until stop() sets speed->stopping. Waits
+ * for new rows, or until the open transaction reaches flush-interval. */
+static gpointer speed_writer_thread(gpointer data) {
+  GstSpeed *speed = (GstSpeed *)data;
+  SpeedRecord *batch = g_new(SpeedRecord, speed->ring_cap);
+
+  g_mutex_lock(&speed->lock);
+  for (;;) {
+    if (speed->ring_len == 0 && !speed->stopping) {
+      if (speed->in_txn)
+        g_cond_wait_until(&speed->cond, &speed->lock,
+                          speed->txn_start +
+                              (gint64)(speed->flush_interval * G_USEC_PER_SEC));
+      else
+        g_cond_wait(&speed->cond, &speed->lock);
+    }
+    guint n = speed->ring_len;
+    for (guint i = 0; i < n; i++)
+      batch[i] = speed->ring[(speed->ring_head + i) % speed->ring_cap];
+    speed->ring_head = (speed->ring_head + n) % speed->ring_cap;
+    speed->ring_len = 0;
+    gboolean stopping = speed->stopping;
+    g_mutex_unlock(&speed->lock);
+
+    guint failed = 0;
+    if (n > 0 && !speed_db_begin(speed)) {
+      GST_WARNING_OBJECT(speed, "begin failed, dropping %u rows: %s", n,
+                         sqlite3_errmsg(speed->db));
+      failed = n;
+    } else {
+      for (guint i = 0; i < n; i++)
+        failed += !speed_db_insert(speed, &batch[i]);
+    }
+    speed_db_maybe_commit(speed);
+
+    g_mutex_lock(&speed->lock);
+    speed->written += n - failed;
+    speed->dropped += failed;
+    if (stopping && speed->ring_len == 0)
+      break;
+  }
+  g_mutex_unlock(&speed->lock);
+
+  speed_db_commit(speed);
+  g_free(batch);
+  return NULL;
+}
+
 static void gst_speed_finalize(GObject *obj) {
   GstSpeed *speed = (GstSpeed *)obj;
-  if (speed->db)
-    sqlite3_close(speed->db);
+  speed_db_close(speed);
   g_free(speed->db_path);
-  if (speed->history)
-    g_hash_table_unref(speed->history);
-  if (speed->sql_batch)
-    g_string_free(speed->sql_batch, TRUE);
+  g_free(speed->source_config);
+  speed_sources_free(speed);
+  speed_slab_clear(&speed->slab);
+  g_free(speed->ring);
+  g_free(speed->pending);
+  g_mutex_clear(&speed->lock);
+  g_cond_clear(&speed->cond);
   G_OBJECT_CLASS(gst_speed_parent_class)->finalize(obj);
 }
 
@@ -211,61 +674,190 @@ static gboolean gst_speed_start(GstBaseTransform *trans) {
 
     g_printerr("Could not open DB %s\n", speed->db_path);
     GST_DEBUG_OBJECT(speed, "failed to open DB %s", speed->db_path);
+    sqlite3_close(speed->db);
     speed->db = NULL;
   } else {
+    /* readers such as the sqlite3 shell may hold the lock briefly at commit */
+    sqlite3_busy_timeout(speed->db, 5000);
     sqlite3_exec(speed->db,
-                 "CREATE TABLE IF NOT EXISTS vehicles (timestamp REAL, track_id INTEGER, speed REAL);",
+                 "CREATE TABLE IF NOT EXISTS vehicles (timestamp REAL, source_id INTEGER, "
+                 "track_id INTEGER, speed REAL);",
                  NULL, NULL, NULL);
-    speed->sql_batch = g_string_new(NULL);
-    GST_DEBUG_OBJECT(speed, "opened DB %s", speed->db_path);
+    /* databases written before per-source support lack the column; the
+     * ALTER fails harmlessly when it already exists */
+    sqlite3_exec(speed->db,
+                 "ALTER TABLE vehicles ADD COLUMN source_id INTEGER DEFAULT 0;", NULL,
+                 NULL, NULL);
+    if (sqlite3_prepare_v2(speed->db,
+                           "INSERT INTO vehicles(timestamp, source_id, track_id, speed) "
+                           "VALUES(?,?,?,?);",
+                           -1, &speed->insert_stmt, NULL) != SQLITE_OK) {
+      g_printerr("Could not prepare insert on %s: %s\n", speed->db_path,
+                 sqlite3_errmsg(speed->db));
+      sqlite3_close(speed->db);
+      speed->db = NULL;
+    } else {
+      GST_DEBUG_OBJECT(speed, "opened DB %s", speed->db_path);
+    }
+  }
+  if (speed->db && speed->summaries) {
+    /* same columns as carspeed.io.db.init_db; label stays NULL */
+    sqlite3_exec(speed->db,
+                 "CREATE TABLE IF NOT EXISTS vehicle_summaries ("
+                 "id INTEGER PRIMARY KEY AUTOINCREMENT, source_id INTEGER DEFAULT 0, "
+                 "track_id INTEGER, label TEXT, entry_ts REAL, exit_ts REAL, "
+                 "distance REAL, mean_speed REAL, median_speed REAL, max_speed REAL, "
+                 "samples INTEGER, x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER, "
+                 "confidence REAL);",
+                 NULL, NULL, NULL);
+    if (sqlite3_prepare_v2(speed->db,
+                           "INSERT INTO vehicle_summaries(source_id, track_id, entry_ts, "
+                           "exit_ts, distance, mean_speed, median_speed, max_speed, "
+                           "samples, x1, y1, x2, y2, confidence) "
+                           "VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?);",
+                           -1, &speed->summary_stmt, NULL) != SQLITE_OK) {
+      g_printerr("Could not prepare summary insert on %s: %s\n", speed->db_path,
+                 sqlite3_errmsg(speed->db));
+      speed_db_close(speed);
+    }
+  }
+  speed->in_txn = FALSE;
+  speed->txn_rows = 0;
+  speed_sources_free(speed);
+  if (speed->source_config && *speed->source_config &&
+      !speed_load_source_config(speed)) {
+    speed_sources_free(speed);
+    speed_db_close(speed);
+    return FALSE;
   }
-  speed->history = g_hash_table_new_full(g_int64_hash, g_int64_equal, NULL,
-                                         history_free);
+  speed_slab_init(&speed->slab, speed->window);
+  speed->lru_head = speed->lru_tail = NULL;
+  speed->now = 0.0;
+  g_atomic_int_set(&speed->n_tracks, 0);
+
+  g_free(speed->ring);
+  speed->ring_cap = speed->queue_size;
+  speed->ring = g_new(SpeedRecord, speed->ring_cap);
+  speed->ring_head = 0;
+  speed->ring_len = 0;
+  speed->stopping = FALSE;
+  speed->dropped = 0;
+  speed->written = 0;
+  if (speed->db)
+    speed->writer = g_thread_new("speedtrack-db", speed_writer_thread, speed);
+  return TRUE;
+}
+
+static gboolean gst_speed_stop(GstBaseTransform *trans) {
+  GstSpeed *speed = (GstSpeed *)trans;
+  if (speed->writer) {
+    if (speed->summaries) {
+      /* vehicles still in view end with the stream */
+      for (SpeedTrack *h = speed->lru_head; h; h = h->next)
+        speed_summary_stage(speed, h);
+    }
+    /* let the writer drain the ring and commit before joining */
+    g_mutex_lock(&speed->lock);
+    speed_queue_push_locked(speed);
+    speed->stopping = TRUE;
+    g_cond_signal(&speed->cond);
+    g_mutex_unlock(&speed->lock);
+    g_thread_join(speed->writer);
+    speed->writer = NULL;
+  }
+  speed_db_close(speed);
+  speed_sources_free(speed);
+  speed_slab_clear(&speed->slab);
+  speed->lru_head = speed->lru_tail = NULL;
+  g_atomic_int_set(&speed->n_tracks, 0);
+  g_free(speed->ring);
+  speed->ring = NULL;
+  speed->n_pending = 0;
   return TRUE;
 }
 
+/* Running time of buf in seconds. Frame NTP timestamps are per source and
+ * need not agree across cameras, so track-timeout is measured on this clock
+ * instead: the buffer's PTS in the segment, else the element clock, else the
+ * last known value. */
+static gdouble speed_running_time(GstSpeed *speed, GstBuffer *buf) {
+  GstBaseTransform *trans = GST_BASE_TRANSFORM(speed);
+  GstClockTime rt = GST_CLOCK_TIME_NONE;
+  if (GST_BUFFER_PTS_IS_VALID(buf) && trans->segment.format == GST_FORMAT_TIME)
+    rt = gst_segment_to_running_time(&trans->segment, GST_FORMAT_TIME,
+                                     GST_BUFFER_PTS(buf));
+  if (!GST_CLOCK_TIME_IS_VALID(rt)) {
+    GstClock *clock = gst_element_get_clock(GST_ELEMENT(speed));
+    if (clock) {
+      rt = gst_clock_get_time(clock) - gst_element_get_base_time(GST_ELEMENT(speed));
+      gst_object_unref(clock);
+    }
+  }
+  if (!GST_CLOCK_TIME_IS_VALID(rt))
+    return speed->now;
+  return (gdouble)rt / GST_SECOND;
+}
+
 static GstFlowReturn gst_speed_transform_ip(GstBaseTransform *trans, GstBuffer *buf) {
   GstSpeed *speed = (GstSpeed *)trans;
   NvDsBatchMeta *batch = gst_buffer_get_nvds_batch_meta(buf);
-  if (!batch || !speed->db)
+  if (!batch)
     return GST_FLOW_OK;
+  if (!speed->writer) {
+    speed_batch_release(batch);
+    return GST_FLOW_OK;
+  }
+  speed->now = speed_running_time(speed, buf);
+  speed_evict_stale(speed, speed->now);
   for (NvDsMetaList *l = batch->frame_meta_list; l; l = l->next) {
     NvDsFrameMeta *frame = (NvDsFrameMeta *)l->data;
     gdouble ts = frame->ntp_timestamp / 1e9;
-    g_string_truncate(speed->sql_batch, 0);
+    guint source_id = frame->source_id;
+    SpeedSource *src = speed_source_get(speed, source_id);
     for (NvDsMetaList *o = frame->obj_meta_list; o; o = o->next) {
       NvDsObjectMeta *obj = (NvDsObjectMeta *)o->data;
       guint64 tid = obj->object_id;
       gdouble cx = obj->rect_params.left + obj->rect_params.width / 2.0;
       gdouble cy = obj->rect_params.top + obj->rect_params.height / 2.0;
-      if (speed->have_h) {
-        gdouble tx = speed->H[0] * cx + speed->H[1] * cy + speed->H[2];
-        gdouble ty = speed->H[3] * cx + speed->H[4] * cy + speed->H[5];
-        gdouble tz = speed->H[6] * cx + speed->H[7] * cy + speed->H[8];
+      if (src->have_h) {
+        const gdouble *H = src->H;
+        gdouble tx = H[0] * cx + H[1] * cy + H[2];
+        gdouble ty = H[3] * cx + H[4] * cy + H[5];
+        gdouble tz = H[6] * cx + H[7] * cy + H[8];
         if (tz != 0) {
           cx = tx / tz;
           cy = ty / tz;
         }
       }
-      History *hist = g_hash_table_lookup(speed->history, GUINT_TO_POINTER(tid));
-      if (!hist) {
-        hist = history_new(speed->window);
-        g_hash_table_insert(speed->history, GUINT_TO_POINTER(tid), hist);
+      SpeedTrack *hist = speed_track_lookup(speed, src, source_id, tid);
+      if (!hist)
+        continue;
+      speed_track_touch(speed, hist, speed->now);
+      speed_track_push(hist, speed->slab.window, cx, cy, ts);
+      gdouble spd = speed_track_speed(hist, src->ppm);
+      if (speed->summaries) {
+        const float box[4] = {obj->rect_params.left, obj->rect_params.top,
+                              obj->rect_params.left + obj->rect_params.width,
+                              obj->rect_params.top + obj->rect_params.height};
+        track_summary_add(&hist->summary, ts, cx, cy, box, obj->confidence);
+        if (hist->count >= 2 && !track_summary_add_speed(&hist->summary, spd))
+          GST_WARNING_OBJECT(speed, "out of memory for track %llu speeds",
+                             (unsigned long long)tid);
       }
-      history_add(hist, cx, cy, ts);
-      gdouble spd = history_speed(hist, speed->ppm);
-      if (spd > 0) {
-        GST_LOG_OBJECT(speed, "track %llu speed=%f", (unsigned long long)tid, spd);
-        char *sql = sqlite3_mprintf("INSERT INTO vehicles(timestamp, track_id, speed) VALUES(%f,%llu,%f);", ts, (unsigned long long)tid, spd);
-        g_string_append(speed->sql_batch, sql);
-        sqlite3_free(sql);
+      if (spd > 0 && speed->raw_rows) {
+        GST_LOG_OBJECT(speed, "source %u track %llu speed=%f", source_id,
+                       (unsigned long long)tid, spd);
+        speed_row_stage(speed, ts, source_id, tid, spd);
       }
     }
-    if (speed->sql_batch->len > 0) {
-      sqlite3_exec(speed->db, speed->sql_batch->str, NULL, NULL, NULL);
-      GST_DEBUG_OBJECT(speed, "executed SQL batch: %s", speed->sql_batch->str);
-    }
   }
+  if (speed->n_pending > 0) {
+    g_mutex_lock(&speed->lock);
+    speed_queue_push_locked(speed);
+    g_mutex_unlock(&speed->lock);
+  }
+  g_atomic_int_set(&speed->n_tracks, (gint)speed->slab.in_use);
+  speed_batch_release(batch);
   return GST_FLOW_OK;
 }
 
@@ -274,6 +866,7 @@ static void gst_speed_class_init(GstSpeedClass *klass) {
   gst_element_class_set_static_metadata(element_class, "Speed Estimator", "Filter/Analysis", "Estimate object speed", "openai");
   GstBaseTransformClass *trans = GST_BASE_TRANSFORM_CLASS(klass);
   trans->start = gst_speed_start;
+  trans->stop = gst_speed_stop;
   trans->transform_ip = gst_speed_transform_ip;
   GObjectClass *gobject_class = G_OBJECT_CLASS(klass);
   gobject_class->finalize = gst_speed_finalize;
@@ -289,6 +882,54 @@ static void gst_speed_class_init(GstSpeedClass *klass) {
   g_object_class_install_property(gobject_class, PROP_WINDOW,
       g_param_spec_int("window", "History window", "Number of observations", 2, 60,
                        3, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_FLUSH_INTERVAL,
+      g_param_spec_double("flush-interval", "Flush interval",
+                          "Maximum seconds a DB transaction stays open", 0.0, 3600.0,
+                          1.0, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_FLUSH_ROWS,
+      g_param_spec_uint("flush-rows", "Flush rows",
+                        "Rows per DB transaction before committing", 1, G_MAXUINT,
+                        500, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_QUEUE_SIZE,
+      g_param_spec_uint("queue-size", "Queue size",
+                        "Rows buffered for the DB writer thread", 1, 1 << 24,
+                        4096, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_DROPPED,
+      g_param_spec_uint64("dropped-records", "Dropped records",
+                          "Rows dropped because the writer queue was full or the "
+                          "database rejected them",
+                          0, G_MAXUINT64, 0, G_PARAM_READABLE));
+  g_object_class_install_property(gobject_class, PROP_QUEUED,
+      g_param_spec_uint("queued-records", "Queued records",
+                        "Rows waiting for the writer thread", 0, G_MAXUINT, 0,
+                        G_PARAM_READABLE));
+  g_object_class_install_property(gobject_class, PROP_WRITTEN,
+      g_param_spec_uint64("written-records", "Written records",
+                          "Rows inserted by the writer thread", 0, G_MAXUINT64, 0,
+                          G_PARAM_READABLE));
+  g_object_class_install_property(gobject_class, PROP_TRACK_TIMEOUT,
+      g_param_spec_double("track-timeout", "Track timeout",
+                          "Seconds of running time a track may go unseen before its history is dropped",
+                          0.0, 86400.0, 5.0, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_MAX_TRACKS,
+      g_param_spec_uint("max-tracks", "Maximum tracks",
+                        "Hard cap on tracked histories; the least recently seen is evicted",
+                        1, G_MAXUINT, 4096, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_TRACKS,
+      g_param_spec_uint("tracks", "Tracks", "Current number of tracked histories", 0,
+                        G_MAXUINT, 0, G_PARAM_READABLE));
+  g_object_class_install_property(gobject_class, PROP_SOURCE_CONFIG,
+      g_param_spec_string("source-config", "Source config",
+                          "Key file with per-source ppm and homography in [sourceN] groups",
+                          NULL, G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_RAW_ROWS,
+      g_param_spec_boolean("raw-rows", "Raw rows",
+                           "Write one vehicles row per object and frame", TRUE,
+                           G_PARAM_READWRITE));
+  g_object_class_install_property(gobject_class, PROP_SUMMARIES,
+      g_param_spec_boolean("summaries", "Summaries",
+                           "Write one vehicle_summaries row per track when it is evicted",
+                           FALSE, G_PARAM_READWRITE));
 }
 
 static void gst_speed_init(GstSpeed *speed) {
@@ -296,8 +937,38 @@ static void gst_speed_init(GstSpeed *speed) {
   speed->db_path = g_strdup("vehicles.db");
   speed->have_h = FALSE;
   speed->window = 3;
-  speed->history = NULL;
-  speed->sql_batch = NULL;
+  speed->source_config = NULL;
+  speed->sources = NULL;
+  speed->n_sources = 0;
+  speed_slab_init(&speed->slab, speed->window);
+  speed->lru_head = NULL;
+  speed->lru_tail = NULL;
+  speed->track_timeout = 5.0;
+  speed->max_tracks = 4096;
+  speed->now = 0.0;
+  speed->n_tracks = 0;
+  speed->insert_stmt = NULL;
+  speed->summary_stmt = NULL;
+  speed->raw_rows = TRUE;
+  speed->summaries = FALSE;
+  speed->in_txn = FALSE;
+  speed->txn_rows = 0;
+  speed->flush_interval = 1.0;
+  speed->flush_rows = 500;
+  speed->writer = NULL;
+  g_mutex_init(&speed->lock);
+  g_cond_init(&speed->cond);
+  speed->ring = NULL;
+  speed->pending = NULL;
+  speed->n_pending = 0;
+  speed->pending_cap = 0;
+  speed->queue_size = 4096;
+  speed->ring_cap = 0;
+  speed->ring_head = 0;
+  speed->ring_len = 0;
+  speed->stopping = FALSE;
+  speed->dropped = 0;
+  speed->written = 0;
   for (int i = 0; i < 9; i++)
     speed->H[i] = (i % 4 == 0) ? 1.0 : 0.0; /* identity */
 }
@@ -0,0 +1,45 @@
+/* Checks for the synthetic batches of nvds_stub.h, compiled and run by
+ * tests/test_c_headers.py. */
+#include <assert.h>
+#include <stdio.h>
+
+#include "nvds_stub.h"
+
+static void test_records_group_into_frames(void) {
+  const NvDsStubObject recs[] = {
+      {1000, 7, 0, 10, 20, 30, 40, 0.9f},
+      {1000, 8, 0, 50, 20, 30, 40, 0.8f},
+      {1000, 7, 1, 0, 0, 5, 5, 0.7f}, /* same time, another source */
+      {2000, 7, 0, 12, 20, 30, 40, 0.6f},
+  };
+  /* the plug-in maps buffers that need not be aligned */
+  char payload[sizeof(recs) + 1];
+  memcpy(payload + 1, recs, sizeof(recs));
+  NvDsBatchMeta *batch = nvds_stub_batch_new(payload + 1, 4);
+  assert(batch);
+  const uint32_t sources[] = {0, 1, 0};
+  const int objects[] = {2, 1, 1};
+  int f = 0;
+  for (NvDsMetaList *l = batch->frame_meta_list; l; l = l->next, f++) {
+    NvDsFrameMeta *frame = (NvDsFrameMeta *)l->data;
+    assert(frame->source_id == sources[f]);
+    int n = 0;
+    for (NvDsMetaList *o = frame->obj_meta_list; o; o = o->next, n++) {
+      NvDsObjectMeta *obj = (NvDsObjectMeta *)o->data;
+      if (f == 0 && n == 1)
+        assert(obj->object_id == 8 && obj->rect_params.left == 50 &&
+               obj->confidence == 0.8f);
+    }
+    assert(n == objects[f]);
+  }
+  assert(f == 3);
+  free(batch);
+  assert(nvds_stub_batch_new(payload, 0) == NULL);
+}
+
+int main(void) {
+  assert(sizeof(NvDsStubObject) == 40);
+  test_records_group_into_frames();
+  puts("ok");
+  return 0;
+}
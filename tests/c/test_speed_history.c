@@ -0,0 +1,87 @@
+/* Checks for speed_history.h, compiled and run by tests/test_c_headers.py. */
+#include <assert.h>
+#include <stdio.h>
+
+#include "speed_history.h"
+
+static double two_pass(const double *x, const double *y, const double *t, int n,
+                       double ppm) {
+  double mt = 0, mx = 0, my = 0;
+  for (int i = 0; i < n; i++) {
+    mt += t[i] / n;
+    mx += x[i] / n;
+    my += y[i] / n;
+  }
+  double nx = 0, ny = 0, den = 0;
+  for (int i = 0; i < n; i++) {
+    nx += (t[i] - mt) * (x[i] - mx);
+    ny += (t[i] - mt) * (y[i] - my);
+    den += (t[i] - mt) * (t[i] - mt);
+  }
+  return den == 0 ? 0 : sqrt(nx * nx + ny * ny) / den / ppm;
+}
+
+static void test_matches_two_pass_after_many_wraps(void) {
+  enum { WINDOW = 5, N = 10000 };
+  static double x[N], y[N], t[N];
+  SpeedSlab slab;
+  speed_slab_init(&slab, WINDOW);
+  SpeedTrack *tr = speed_slab_alloc(&slab, 1);
+  for (int i = 0; i < N; i++) {
+    /* large absolute timestamps and jittered positions */
+    t[i] = 1.7e9 + i * 0.04;
+    x[i] = 100 + 12.5 * i * 0.04 + (i % 3) * 0.7;
+    y[i] = 50 - 3.0 * i * 0.04;
+    speed_track_push(tr, WINDOW, x[i], y[i], t[i]);
+    int n = i + 1 < WINDOW ? i + 1 : WINDOW;
+    double want = two_pass(x + i + 1 - n, y + i + 1 - n, t + i + 1 - n, n, 20.0);
+    double got = speed_track_speed(tr, 20.0);
+    assert(fabs(got - want) <= 1e-6 * (want + 1.0));
+  }
+  speed_slab_clear(&slab);
+}
+
+static void test_needs_two_samples_and_time_spread(void) {
+  SpeedSlab slab;
+  speed_slab_init(&slab, 3);
+  SpeedTrack *tr = speed_slab_alloc(&slab, 1);
+  speed_track_push(tr, 3, 0, 0, 1.0);
+  assert(speed_track_speed(tr, 1.0) == 0.0);
+  speed_track_push(tr, 3, 10, 0, 2.0);
+  assert(fabs(speed_track_speed(tr, 1.0) - 10.0) < 1e-9);
+  /* a full window at one timestamp has no slope */
+  for (int i = 0; i < 3; i++)
+    speed_track_push(tr, 3, 5.0 * i, 0, 3.0);
+  assert(speed_track_speed(tr, 1.0) == 0.0);
+  speed_slab_clear(&slab);
+}
+
+static void test_slots_are_recycled(void) {
+  SpeedSlab slab;
+  speed_slab_init(&slab, 4);
+  SpeedTrack *live[SPEED_SLAB_CHUNK];
+  for (int i = 0; i < SPEED_SLAB_CHUNK; i++)
+    live[i] = speed_slab_alloc(&slab, i);
+  assert(slab.capacity == SPEED_SLAB_CHUNK);
+  for (int round = 0; round < 100; round++) {
+    int i = round % SPEED_SLAB_CHUNK;
+    speed_track_push(live[i], 4, 1, 1, round);
+    speed_slab_release(&slab, live[i]);
+    live[i] = speed_slab_alloc(&slab, 1000 + round);
+    /* recycled tracks come back empty */
+    assert(live[i]->count == 0 && live[i]->track_id == (uint64_t)(1000 + round));
+  }
+  assert(slab.capacity == SPEED_SLAB_CHUNK);
+  assert(slab.in_use == SPEED_SLAB_CHUNK);
+  assert(speed_slab_alloc(&slab, 9999) != NULL);
+  assert(slab.capacity == 2 * SPEED_SLAB_CHUNK);
+  speed_slab_clear(&slab);
+}
+
+int main(void) {
+  test_matches_two_pass_after_many_wraps();
+  test_needs_two_samples_and_time_spread();
+  test_slots_are_recycled();
+  puts("ok");
+  return 0;
+}
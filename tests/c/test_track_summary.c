@@ -0,0 +1,57 @@
+/* Checks for track_summary.h, compiled and run by tests/test_c_headers.py. */
+#include <assert.h>
+#include <stdio.h>
+
+#include "speed_history.h"
+
+static int near(double a, double b) { return fabs(a - b) < 1e-6; }
+
+static void test_accumulates_one_vehicle(void) {
+  TrackSummary s = {0};
+  track_summary_reset(&s);
+  const float speeds[] = {4.0f, 9.0f, 2.0f, 5.0f};
+  for (int i = 0; i < 5; i++) {
+    const float box[4] = {i, i, i + 10, i + 10};
+    /* a 3-4-5 step per sample, most confident at i == 3 */
+    track_summary_add(&s, 10.0 + i * 0.5, 3.0 * i, 4.0 * i, box, i == 3 ? 0.9f : 0.5f);
+    if (i > 0)
+      assert(track_summary_add_speed(&s, speeds[i - 1]));
+  }
+  assert(s.samples == 5 && s.n_speeds == 4);
+  assert(near(s.entry_ts, 10.0) && near(s.exit_ts, 12.0));
+  assert(near(s.distance, 20.0));
+  assert(near(track_summary_mean(&s), 5.0) && near(s.speed_max, 9.0));
+  assert(near(track_summary_median(&s), 4.5));
+  assert(near(s.confidence, 0.9f) && s.box[0] == 3.0f && s.box[3] == 13.0f);
+  assert(track_summary_add_speed(&s, 1.0));
+  assert(near(track_summary_median(&s), 4.0));
+  track_summary_free(&s);
+  assert(s.speeds == NULL && s.n_speeds == 0);
+}
+
+static void test_speeds_grow_and_survive_recycling(void) {
+  SpeedSlab slab;
+  speed_slab_init(&slab, 3);
+  SpeedTrack *tr = speed_slab_alloc(&slab, 1);
+  assert(tr->summary.confidence < 0 && tr->summary.n_speeds == 0);
+  for (int i = 0; i < 1000; i++)
+    assert(track_summary_add_speed(&tr->summary, i % 7));
+  assert(tr->summary.n_speeds == 1000 && tr->summary.cap_speeds >= 1000);
+  assert(near(track_summary_median(&tr->summary), 3.0));
+  float *buffer = tr->summary.speeds;
+  speed_slab_release(&slab, tr);
+  tr = speed_slab_alloc(&slab, 2);
+  /* the most recently released track comes back first, empty but with its
+   * buffer still attached */
+  assert(tr->summary.speeds == buffer && tr->summary.cap_speeds >= 1000);
+  assert(tr->summary.n_speeds == 0 && tr->summary.samples == 0);
+  assert(tr->summary.speed_max == 0.0 && tr->summary.confidence < 0);
+  speed_slab_clear(&slab);
+}
+
+int main(void) {
+  test_accumulates_one_vehicle();
+  test_speeds_grow_and_survive_recycling();
+  puts("ok");
+  return 0;
+}
@@ -0,0 +1,110 @@
+/* Checks for track_table.h, compiled and run by tests/test_c_headers.py. */
+#include <assert.h>
+#include <stdio.h>
+
+#include "nvds_stub.h"
+#include "track_table.h"
+
+/* Walk a batch the way speedtrack's transform_ip does, creating an entry for
+ * every object id not seen before. Returns the number of new entries. */
+static int walk_batch(TrackTable *t, NvDsBatchMeta *batch, int *store, int *next) {
+  int created = 0;
+  for (NvDsMetaList *l = batch->frame_meta_list; l; l = l->next) {
+    NvDsFrameMeta *frame = (NvDsFrameMeta *)l->data;
+    for (NvDsMetaList *o = frame->obj_meta_list; o; o = o->next) {
+      NvDsObjectMeta *obj = (NvDsObjectMeta *)o->data;
+      if (track_table_lookup(t, obj->object_id))
+        continue;
+      int *slot = &store[(*next)++];
+      *slot = (int)obj->object_id;
+      assert(track_table_insert(t, obj->object_id, slot));
+      created++;
+    }
+  }
+  return created;
+}
+
+static void test_batch_ids_are_distinct_64_bit_keys(void) {
+  /* ids that collide when truncated to 32 bits or to a pointer on 32-bit
+   * targets must still map to separate tracks */
+  uint64_t ids[] = {1, 1ULL << 32 | 1, 2ULL << 32 | 1, UINT64_MAX, 0, 7};
+  enum { N = sizeof(ids) / sizeof(ids[0]) };
+  NvDsObjectMeta objs[N] = {0};
+  NvDsMetaList obj_links[N], frame_links[2];
+  NvDsFrameMeta frames[2] = {{0}};
+  for (int i = 0; i < N; i++) {
+    objs[i].object_id = ids[i];
+    obj_links[i].data = &objs[i];
+    obj_links[i].next = (i == N / 2 - 1 || i == N - 1) ? NULL : &obj_links[i + 1];
+  }
+  frames[0].obj_meta_list = &obj_links[0];
+  frames[1].obj_meta_list = &obj_links[N / 2];
+  frame_links[0] = (NvDsMetaList){&frame_links[1], &frames[0]};
+  frame_links[1] = (NvDsMetaList){NULL, &frames[1]};
+  NvDsBatchMeta batch = {&frame_links[0]};
+
+  TrackTable t;
+  assert(track_table_init(&t, 4));
+  int store[2 * N], next = 0;
+  assert(walk_batch(&t, &batch, store, &next) == N);
+  assert(track_table_size(&t) == N);
+  /* the same batch again finds every track */
+  assert(walk_batch(&t, &batch, store, &next) == 0);
+  for (int i = 0; i < N; i++)
+    assert(*(int *)track_table_lookup(&t, ids[i]) == (int)ids[i]);
+  track_table_clear(&t);
+}
+
+/* Random inserts and removals checked against a direct-mapped reference. */
+static void test_churn_matches_reference(void) {
+  enum { KEYS = 4096, OPS = 200000 };
+  static int present[KEYS];
+  static int values[KEYS];
+  TrackTable t;
+  assert(track_table_init(&t, 16));
+  uint64_t rng = 12345;
+  size_t live = 0;
+  for (int op = 0; op < OPS; op++) {
+    rng = rng * 6364136223846793005ULL + 1442695040888963407ULL;
+    int k = (int)((rng >> 33) % KEYS);
+    /* keys share low bits so they cluster in the same probe runs */
+    uint64_t key = (uint64_t)k << 40 | 0xabc;
+    if (present[k]) {
+      assert(track_table_remove(&t, key) == &values[k]);
+      present[k] = 0;
+      live--;
+    } else {
+      assert(track_table_insert(&t, key, &values[k]));
+      present[k] = 1;
+      live++;
+    }
+    assert(track_table_size(&t) == live);
+    if (op % 997 == 0) {
+      for (int j = 0; j < KEYS; j++) {
+        void *v = track_table_lookup(&t, (uint64_t)j << 40 | 0xabc);
+        assert(present[j] ? v == &values[j] : v == NULL);
+      }
+    }
+  }
+  assert(track_table_remove(&t, 42) == NULL);
+  track_table_clear(&t);
+}
+
+static void test_insert_replaces(void) {
+  TrackTable t = {0};
+  int a, b;
+  assert(track_table_insert(&t, 5, &a));
+  assert(track_table_insert(&t, 5, &b));
+  assert(track_table_size(&t) == 1);
+  assert(track_table_lookup(&t, 5) == &b);
+  track_table_clear(&t);
+  assert(track_table_lookup(&t, 5) == NULL);
+}
+
+int main(void) {
+  test_batch_ids_are_distinct_64_bit_keys();
+  test_churn_matches_reference();
+  test_insert_replaces();
+  puts("ok");
+  return 0;
+}
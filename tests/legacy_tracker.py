@@ -0,0 +1,49 @@
+"""The original list-of-objects tracker, kept as a reference implementation."""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+from tracker import VehicleTrack, _iou
+
+Box = Tuple[int, int, int, int]
+
+
+class LoopTracker:
+    """Reference tracker using the original per-pair Python loop.
+
+    ``tests/test_association.py`` checks the greedy matcher against it and the
+    tracker benchmarks time it as the legacy baseline.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, decay_time: float = 1.0):
+        self.iou_threshold = iou_threshold
+        self.decay_time = decay_time
+        self.tracks: List[VehicleTrack] = []
+        self.next_id = 0
+
+    def update(self, detections: List[Box], ts: float):
+        self.tracks = [t for t in self.tracks if ts - t.last_ts <= self.decay_time]
+        assignments = {}
+        used = set()
+        for box in detections:
+            best_iou = self.iou_threshold
+            best_track = None
+            for track in self.tracks:
+                if track in used:
+                    continue
+                iou = _iou(box, track.box)
+                if iou > best_iou:
+                    best_iou = iou
+                    best_track = track
+            if best_track is None:
+                best_track = VehicleTrack(box, ts, self.next_id)
+                self.next_id += 1
+                self.tracks.append(best_track)
+            else:
+                best_track.box = box
+                best_track.center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+                best_track.last_ts = ts
+            used.add(best_track)
+            assignments[best_track.id] = best_track.center
+        return assignments
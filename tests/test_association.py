@@ -0,0 +1,102 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from carspeed.core.association import (
+    candidate_pairs,
+    candidates,
+    get_matcher,
+    global_assign,
+    greedy_assign,
+    iou_matrix,
+)
+from legacy_tracker import LoopTracker
+from tracker import ByteTracker, _iou
+
+
+def _random_boxes(rng, n):
+    boxes = []
+    for _ in range(n):
+        x = rng.randint(0, 200)
+        y = rng.randint(0, 200)
+        boxes.append((x, y, x + rng.randint(5, 40), y + rng.randint(5, 40)))
+    return boxes
+
+
+def test_iou_matrix_matches_scalar():
+    rng = random.Random(1)
+    a = _random_boxes(rng, 30)
+    b = _random_boxes(rng, 20)
+    mat = iou_matrix(a, b)
+    for i, box_a in enumerate(a):
+        for j, box_b in enumerate(b):
+            assert mat[i, j] == _iou(box_a, box_b)
+
+
+def test_greedy_mode_identical_to_legacy_loop():
+    rng = random.Random(7)
+    new = ByteTracker(iou_threshold=0.2, decay_time=0.3)
+    ref = LoopTracker(iou_threshold=0.2, decay_time=0.3)
+    boxes = _random_boxes(rng, 25)
+    for frame in range(60):
+        ts = frame * 0.1
+        boxes = [
+            (x1 + rng.randint(-3, 3), y1 + rng.randint(-3, 3), x2, y2)
+            for x1, y1, x2, y2 in boxes
+        ]
+        dets = [b for b in boxes if rng.random() > 0.2] + _random_boxes(rng, 2)
+        rng.shuffle(dets)
+        assert list(new.update(dets, ts).items()) == list(ref.update(dets, ts).items())
+
+
+def test_global_assign_prefers_best_overlap():
+    # detection 0 overlaps both tracks, detection 1 only the first one
+    iou = np.array([[0.5, 0.4], [0.9, 0.0]])
+    pairs = candidate_pairs(iou, 0.3)
+    assert greedy_assign(pairs, 2).tolist() == [0, -1]
+    assert global_assign(pairs, 2).tolist() == [1, 0]
+
+
+def test_hungarian_assign_beats_global():
+    pytest.importorskip("scipy.optimize")
+    # the best pair (0, 0) blocks detection 1, whose only track is 0
+    iou = np.array([[0.9, 0.8], [0.7, 0.0]])
+    pairs = candidate_pairs(iou, 0.3)
+    assert global_assign(pairs, 2).tolist() == [0, -1]
+    assert get_matcher("hungarian")(pairs, 2).tolist() == [1, 0]
+    assert get_matcher("hungarian")(candidate_pairs(iou, 0.95), 2).tolist() == [-1, -1]
+
+
+def test_hungarian_matcher_needs_scipy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "scipy", None)
+    monkeypatch.setitem(sys.modules, "scipy.optimize", None)
+    with pytest.raises(RuntimeError, match="SciPy is required for hungarian matching"):
+        get_matcher("hungarian")
+    assert get_matcher("global") is global_assign
+
+
+def test_grid_candidates_match_dense():
+    rng = random.Random(3)
+    a = np.array(_random_boxes(rng, 80), dtype=float)
+    b = np.array(_random_boxes(rng, 60), dtype=float)
+    dense = candidates(a, b, 0.05)
+    for cell in (7, 25, 500):
+        grid = candidates(a, b, 0.05, cell_size=cell)
+        assert sorted(zip(*(x.tolist() for x in grid))) == sorted(
+            zip(*(x.tolist() for x in dense))
+        )
+
+
+def test_grid_tracker_identical_to_dense():
+    rng = random.Random(11)
+    dense = ByteTracker(iou_threshold=0.2)
+    grid = ByteTracker(iou_threshold=0.2, grid_cell=32)
+    for frame in range(20):
+        dets = _random_boxes(rng, 30)
+        assert list(grid.update(dets, frame * 0.1).items()) == list(
+            dense.update(dets, frame * 0.1).items()
+        )
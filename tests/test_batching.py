@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+import pytest
+
+from carspeed.core.detector import Detector, FakeDetector
+from carspeed.core.processor import FrameProcessor
+from carspeed.core.scheduler import AdaptiveInterval
+from carspeed.core.tracker_wrapper import create_tracker
+from carspeed.io.capture import BatchCollector, run_batched, run_stream
+
+
+class RoadDetector(Detector):
+    """One car per source moving 5 px per frame; frames are ``[source, index]``."""
+
+    def __init__(self):
+        self.batches = []
+
+    def detect_batch(self, frames):
+        self.batches.append(len(frames))
+        out = []
+        for source, index in frames:
+            x = int(index) * 5
+            y = int(source) * 100
+            out.append([(x, y, x + 30, y + 20, 0.9, "car")])
+        return out
+
+
+def _source(idx, n, delay=0.0):
+    for i in range(n):
+        if delay:
+            time.sleep(delay)
+        yield i / 10.0, np.array([idx, i])
+
+
+def _processor():
+    tracker = create_tracker("iou", iou_threshold=0.2, decay_time=1.0)
+    return FrameProcessor(tracker, ppm=5.0, window=3)
+
+
+def test_fake_detector_is_deterministic_per_frame():
+    frames = [np.full((90, 160, 3), i, dtype=np.uint8) for i in range(4)]
+    detector = FakeDetector(boxes=3, seed=7)
+    batched = detector.detect_batch(frames)
+    assert [detector(f) for f in frames] == batched
+    assert batched[0] != batched[1]
+    assert all(len(d) == 3 for d in batched)
+    for x1, y1, x2, y2, conf, label in batched[2]:
+        assert 0 <= x1 < x2 <= 160 and 0 <= y1 < y2 <= 90
+        assert 0.3 <= conf <= 1.0 and label == "car"
+    assert (detector.calls, detector.frames) == (5, 8)
+
+
+def test_run_batched_fans_out_per_source():
+    detector = RoadDetector()
+    rows = {0: [], 1: [], 2: []}
+    collector, queues = run_batched(
+        [_source(i, 30) for i in range(3)],
+        detector,
+        [_processor() for _ in range(3)],
+        lambda idx, r: rows[idx].extend(r),
+        batch_size=4,
+        max_latency=0.5,
+    )
+    assert collector.frames == 90
+    assert max(detector.batches) <= 4
+    assert collector.batches == len(detector.batches) < 90
+    assert queues[0].name == "frames"
+    for idx in range(3):
+        single = []
+        run_stream(_source(idx, 30), RoadDetector(), _processor(), single.extend)
+        assert rows[idx] == single
+        assert {r[5] for r in rows[idx]} == {idx * 100}
+
+
+def test_collector_deadline_flushes_partial_batches():
+    collector = BatchCollector([_source(0, 5, delay=0.03)], batch_size=8, max_latency=0.001)
+    batches = list(collector)
+    assert [len(b) for b in batches] == [1] * 5
+    assert [b[0][1] for b in batches] == pytest.approx([0.0, 0.1, 0.2, 0.3, 0.4])
+
+
+def test_run_batched_per_source_schedulers():
+    schedulers = [AdaptiveInterval(1, 1), AdaptiveInterval(3, 3)]
+    detector = RoadDetector()
+    run_batched(
+        [_source(0, 9), _source(1, 9)],
+        detector,
+        [_processor(), _processor()],
+        lambda idx, r: None,
+        batch_size=2,
+        schedulers=schedulers,
+    )
+    assert [s.detections for s in schedulers] == [9, 3]
+    assert sum(detector.batches) == 12
+
+
+def test_source_error_is_raised():
+    def broken():
+        yield 0.0, np.array([0, 0])
+        raise OSError("stream lost")
+
+    with pytest.raises(OSError, match="stream lost"):
+        run_batched(
+            [broken(), _source(1, 50)],
+            RoadDetector(),
+            [_processor(), _processor()],
+            lambda idx, r: None,
+        )
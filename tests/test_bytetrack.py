@@ -0,0 +1,60 @@
+import numpy as np
+
+from carspeed.core.bytetrack import ByteTrackTracker
+from carspeed.core.kalman import BoxKalmanFilter, cxcywh_to_xyxy, xyxy_to_cxcywh
+from tracker import ByteTracker
+
+
+def _car(ts, speed, width=40):
+    x = int(ts * speed)
+    return (x, 100, x + width, 130)
+
+
+def test_kalman_learns_constant_velocity():
+    kf = BoxKalmanFilter()
+    kf.initiate(np.array([[0.0, 0.0, 40.0, 30.0], [100.0, 50.0, 20.0, 20.0]]))
+    for step in range(1, 20):
+        kf.predict(0.1)
+        z = np.array([[step * 30.0, 0.0, 40.0, 30.0], [100.0, 50.0 + step * 5.0, 20.0, 20.0]])
+        kf.update(np.array([0, 1]), z)
+    assert abs(kf.mean[0, 4] - 300.0) < 5.0
+    assert abs(kf.mean[1, 5] - 50.0) < 2.0
+
+
+def test_box_conversion_round_trip():
+    boxes = np.array([[10.0, 20.0, 50.0, 60.0]])
+    assert np.allclose(cxcywh_to_xyxy(xyxy_to_cxcywh(boxes)), boxes)
+
+
+def test_fast_vehicle_keeps_id_at_low_frame_rate():
+    bytetrack = ByteTrackTracker(iou_threshold=0.2)
+    iou_only = ByteTracker(iou_threshold=0.2)
+    bt_ids, iou_ids = set(), set()
+    # 20 fps while the car enters, then inference drops to 5 fps: the car moves
+    # a full box width between frames and no longer overlaps its last box
+    times = [i * 0.05 for i in range(6)] + [0.25 + i * 0.2 for i in range(1, 10)]
+    for ts in times:
+        box = _car(ts, 200)
+        bt_ids.update(bytetrack.update([box], ts, [0.9]))
+        iou_ids.update(iou_only.update([box], ts))
+    assert len(bt_ids) == 1
+    assert len(iou_ids) > 1
+
+
+def test_low_confidence_detection_rescues_track():
+    tracker = ByteTrackTracker()
+    first = tracker.update([_car(0.0, 100)], 0.0, [0.9])
+    tid = next(iter(first))
+    # a partially occluded frame: low score, would not start a new track
+    rescued = tracker.update([_car(0.1, 100)], 0.1, [0.3])
+    assert list(rescued) == [tid]
+    orphan = ByteTrackTracker().update([_car(0.1, 100)], 0.1, [0.3])
+    assert orphan == {}
+
+
+def test_expired_tracks_are_dropped():
+    tracker = ByteTrackTracker(decay_time=0.5)
+    tid = next(iter(tracker.update([_car(0.0, 0)], 0.0, [0.9])))
+    later = tracker.update([_car(0.0, 0)], 2.0, [0.9])
+    assert tid not in later
+    assert len(tracker.ids) == 1
@@ -0,0 +1,21 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+C_TESTS = sorted((Path(__file__).parent / "c").glob("test_*.c"))
+CC = shutil.which("gcc") or shutil.which("cc")
+
+
+@pytest.mark.skipif(CC is None, reason="no C compiler")
+@pytest.mark.parametrize("source", C_TESTS, ids=lambda p: p.stem)
+def test_c_header(source, tmp_path):
+    exe = tmp_path / source.stem
+    subprocess.run(
+        [CC, "-O1", "-Wall", "-Werror", "-I", str(ROOT), str(source), "-o", str(exe), "-lm"],
+        check=True,
+    )
+    result = subprocess.run([str(exe)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+import pytest
+
+from carspeed.core.processor import FrameProcessor
+from carspeed.core.scheduler import AdaptiveInterval
+from carspeed.core.tracker_wrapper import create_tracker
+from carspeed.io.capture import StagePipeline, StageQueue, read_frames, run_stream
+from carspeed.pipeline.config import CaptureOptions
+
+
+class FakeCapture:
+    """Stand-in for ``cv2.VideoCapture`` returning frames tagged with their index."""
+
+    def __init__(self, n, shape=(72, 128, 3)):
+        self.frames = [np.full(shape, i % 256, dtype=np.uint8) for i in range(n)]
+        self.pos = 0
+
+    def read(self):
+        if self.pos >= len(self.frames):
+            return False, None
+        self.pos += 1
+        return True, self.frames[self.pos - 1]
+
+
+def fake_model(frame):
+    """One car moving 4 px per frame, derived from the frame content."""
+    x = int(frame[0, 0, 0]) * 4
+    return [(x, 10, x + 20, 30, 0.9, "car")]
+
+
+def _processor():
+    tracker = create_tracker("iou", iou_threshold=0.1, decay_time=1.0)
+    return FrameProcessor(tracker, ppm=4.0, window=3)
+
+
+def _clock():
+    ticks = iter(range(1000))
+    return lambda: next(ticks) * 0.1
+
+
+def test_read_frames_stops_at_end_of_stream():
+    frames = list(read_frames(FakeCapture(3), clock=_clock()))
+    assert [ts for ts, _ in frames] == [0.0, 0.1, 0.2]
+
+
+@pytest.mark.parametrize("staged", [False, True])
+def test_run_stream_writes_rows_in_order(staged):
+    rows = []
+    queues = run_stream(
+        read_frames(FakeCapture(20), clock=_clock()),
+        fake_model,
+        _processor(),
+        rows.extend,
+        staged=staged,
+        queue_size=2,
+    )
+    assert [r[0] for r in rows] == pytest.approx([i * 0.1 for i in range(20)])
+    assert len({r[1] for r in rows}) == 1
+    # 4 px per 0.1 s at 4 px/m
+    assert rows[-1][3] == pytest.approx(10.0)
+    if staged:
+        assert [q.name for q in queues] == ["detect", "track", "sink"]
+        assert all(q.max_depth <= 2 and q.dropped == 0 for q in queues)
+        assert queues[0].items == 20
+    else:
+        assert queues == []
+
+
+def test_run_stream_staged_respects_scheduler():
+    scheduler = AdaptiveInterval(2, 2)
+    rows = []
+    run_stream(
+        read_frames(FakeCapture(10), clock=_clock()),
+        fake_model,
+        _processor(),
+        rows.extend,
+        scheduler=scheduler,
+        staged=True,
+    )
+    assert scheduler.frames == 10
+    assert scheduler.detections == 5
+    assert len(rows) == 5
+
+
+def test_missed_detection_keeps_scheduler_busy():
+    def flaky_model(frame):
+        return [] if int(frame[0, 0, 0]) == 3 else fake_model(frame)
+
+    scheduler = AdaptiveInterval(1, 8)
+    run_stream(
+        read_frames(FakeCapture(8), clock=_clock()), flaky_model, _processor(), list, scheduler
+    )
+    # the car is still tracked through the frame the detector missed
+    assert scheduler.detections == 8
+    assert scheduler.interval == 1
+
+
+def test_stage_queue_drop_policies():
+    oldest = StageQueue("q", maxsize=2, policy="drop-oldest")
+    newest = StageQueue("q", maxsize=2, policy="drop-newest")
+    for i in range(5):
+        oldest.put(i)
+        newest.put(i)
+    oldest.close()
+    newest.close()
+    assert [oldest.get(), oldest.get()] == [3, 4]
+    assert [newest.get(), newest.get()] == [0, 1]
+    assert oldest.dropped == newest.dropped == 3
+    assert oldest.max_depth == 2
+    with pytest.raises(ValueError):
+        StageQueue("q", policy="sometimes")
+
+
+def test_drop_oldest_bounds_live_latency():
+    release = threading.Event()
+    seen = []
+
+    def slow_detect(item):
+        release.wait()
+        return item
+
+    def frames():
+        for i in range(50):
+            yield i
+        release.set()
+
+    pipeline = StagePipeline(
+        frames(),
+        [("detect", slow_detect), ("sink", seen.append)],
+        maxsize=3,
+        policies=("drop-oldest", "block"),
+    )
+    pipeline.run()
+    frame_queue = pipeline.queues[0]
+    assert frame_queue.max_depth == 3
+    assert frame_queue.dropped >= 46
+    assert seen[-1] == 49
+    assert len(seen) == 50 - frame_queue.dropped
+
+
+def test_stage_error_is_raised_and_stops_reader():
+    def boom(item):
+        if item == 3:
+            raise RuntimeError("detector failed")
+        return item
+
+    def endless():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    pipeline = StagePipeline(endless(), [("detect", boom), ("sink", lambda item: None)])
+    with pytest.raises(RuntimeError, match="detector failed"):
+        pipeline.run()
+
+
+def test_sink_error_is_raised():
+    def sink(item):
+        raise ValueError("disk full")
+
+    pipeline = StagePipeline(range(100), [("detect", lambda x: x), ("sink", sink)], maxsize=1)
+    with pytest.raises(ValueError, match="disk full"):
+        pipeline.run()
+
+
+def test_capture_options_defaults():
+    opts = CaptureOptions(ppm=20.0, video="clip.mp4", min_detect_interval=2)
+    assert opts.max_detect_interval == 2
+    assert opts.uris == ["clip.mp4"]
+    assert CaptureOptions(ppm=20.0, sources=["a", "b"]).uris == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "kwargs, match",
+    [
+        ({"video": "a", "rtsp": "b"}, "exactly one"),
+        ({"video": "a", "tracker_options": {"max_distance": 5.0}}, "centroid"),
+        ({"video": "a", "min_detect_interval": 3, "max_detect_interval": 2}, "interval"),
+        ({"rtsp": "a", "replay": True}, "replay"),
+        ({"video": "a", "workers": 2}, "workers"),
+        ({"video": "a", "replay": True, "workers": 2, "staged": True}, "staged"),
+        ({"video": "a", "replay": True, "workers": 2, "rows": "both"}, "rows"),
+        ({"video": "a", "detection_cache": "c"}, "detection_cache"),
+        ({"sources": ["a"], "replay": True, "detection_cache": "c"}, "single video"),
+        ({"video": "a", "frame_policy": "drop"}, "frame_policy"),
+    ],
+)
+def test_capture_options_reject_invalid_combinations(kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        CaptureOptions(ppm=20.0, **kwargs)
@@ -0,0 +1,205 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from carspeed.io.db import (
+    INSERT_SUMMARY,
+    INSERT_VEHICLE,
+    INSERT_VEHICLE_SOURCE,
+    AsyncWriter,
+    BatchWriter,
+    init_db,
+)
+
+BROKEN_INSERT = "INSERT INTO missing VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _row(i):
+    return (float(i), i, "car", 10.0, 0, 0, 10, 10, 0.9)
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_batch_writer_flushes_on_row_threshold(tmp_path):
+    db = tmp_path / "v.db"
+    writer = BatchWriter(init_db(str(db)), flush_rows=3, flush_interval=1e9)
+    writer.write_many(_row(i) for i in range(2))
+    assert _count(db) == 0
+    writer.write(_row(2))
+    assert _count(db) == 3
+    assert writer.flushes == 1
+
+
+def test_batch_writer_flushes_on_time_threshold(tmp_path):
+    db = tmp_path / "v.db"
+    now = [0.0]
+    writer = BatchWriter(
+        init_db(str(db)), flush_rows=100, flush_interval=1.0, clock=lambda: now[0]
+    )
+    writer.write(_row(0))
+    assert _count(db) == 0
+    now[0] = 1.5
+    writer.write(_row(1))
+    assert _count(db) == 2
+
+
+def test_batch_writer_final_flush_on_close(tmp_path):
+    db = tmp_path / "v.db"
+    with BatchWriter(init_db(str(db)), flush_rows=100, close_connection=True) as writer:
+        writer.write(_row(0))
+    assert _count(db) == 1
+    assert writer.rows_written == 1
+
+
+def _summary(i):
+    return (0, i, "car", 0.0, 1.0, 10.0, 10.0, 10.0, 12.0, 5, 0, 0, 10, 10, 0.9)
+
+
+@pytest.mark.parametrize("async_db", [False, True])
+def test_writer_shares_connection_between_statements(tmp_path, async_db):
+    db = tmp_path / "v.db"
+    if async_db:
+        writer = AsyncWriter(str(db), flush_rows=100, flush_interval=0.01)
+    else:
+        writer = BatchWriter(init_db(str(db)), flush_rows=100, close_connection=True)
+    writer.write_many(_row(i) for i in range(3))
+    writer.write_many((_summary(i) for i in range(2)), INSERT_SUMMARY)
+    writer.write(_row(3))
+    writer.close()
+    assert writer.rows_written == 6
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0] == 4
+    assert [r[0] for r in conn.execute("SELECT track_id FROM vehicle_summaries")] == [0, 1]
+
+
+def test_init_db_enables_wal(tmp_path):
+    conn = init_db(str(tmp_path / "v.db"), wal=True, synchronous="normal")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    with pytest.raises(ValueError):
+        init_db(str(tmp_path / "w.db"), synchronous="sometimes")
+
+
+def test_init_db_adds_source_id_to_old_tables(tmp_path):
+    db = tmp_path / "v.db"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE vehicles (id INTEGER PRIMARY KEY, timestamp REAL, track_id INTEGER,"
+        " label TEXT, speed REAL, x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,"
+        " confidence REAL)"
+    )
+    conn.execute("INSERT INTO vehicles(timestamp, track_id) VALUES (1.0, 1)")
+    conn.commit()
+    conn.close()
+    with BatchWriter(
+        init_db(str(db)), sql=INSERT_VEHICLE_SOURCE, close_connection=True
+    ) as w:
+        w.write(_row(2) + (3,))
+    conn = sqlite3.connect(db)
+    rows = conn.execute(
+        "SELECT track_id, source_id FROM vehicles ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert rows == [(1, 0), (2, 3)]
+
+
+def test_async_writer_drains_on_close(tmp_path):
+    db = tmp_path / "v.db"
+    init_db(str(db)).close()
+    writer = AsyncWriter(str(db), flush_rows=10, flush_interval=0.01)
+    writer.write_many(_row(i) for i in range(25))
+    writer.close()
+    assert _count(db) == 25
+    assert writer.rows_written == 25
+    assert writer.dropped == 0
+    with pytest.raises(RuntimeError):
+        writer.write(_row(0))
+
+
+@pytest.mark.parametrize("policy,kept", [("drop-newest", [0, 1]), ("drop-oldest", [3, 4])])
+def test_async_writer_drop_policies(tmp_path, policy, kept):
+    db = tmp_path / "v.db"
+    writer = AsyncWriter(str(db), maxsize=2, policy=policy)
+    # holding the (re-entrant) queue lock keeps the writer thread from draining
+    with writer._cond:
+        writer.write_many(_row(i) for i in range(5))
+        assert writer.depth == 2
+    writer.close()
+    conn = sqlite3.connect(db)
+    ids = [r[0] for r in conn.execute("SELECT track_id FROM vehicles ORDER BY id")]
+    conn.close()
+    assert ids == kept
+    assert writer.dropped == 3
+
+
+@pytest.mark.parametrize("policy,kept", [("drop-newest", [0, 1, 2]), ("drop-oldest", [2, 3, 4])])
+def test_batch_writer_caps_retry_buffer(tmp_path, policy, kept):
+    db = tmp_path / "v.db"
+    conn = init_db(str(db))
+    writer = BatchWriter(conn, sql=BROKEN_INSERT, flush_rows=2, max_rows=3, policy=policy)
+    with pytest.raises(sqlite3.OperationalError):
+        writer.write_many(_row(i) for i in range(5))
+    assert (len(writer), writer.dropped) == (3, 2)
+    writer.sql = INSERT_VEHICLE
+    writer.flush()
+    assert [r[0] for r in conn.execute("SELECT track_id FROM vehicles ORDER BY id")] == kept
+
+
+def test_async_writer_bounds_rows_while_failing(tmp_path):
+    writer = AsyncWriter(
+        str(tmp_path / "v.db"),
+        sql=BROKEN_INSERT,
+        maxsize=4,
+        policy="drop-oldest",
+        flush_rows=2,
+        flush_interval=0.01,
+    )
+    for i in range(20):
+        writer.write(_row(i))
+    deadline = time.monotonic() + 5.0
+    while writer.dropped < 16 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.dropped >= 16  # at most maxsize rows wait for a retry
+    writer.close()
+    assert writer.dropped == 20 and writer.errors > 0
+
+
+def test_async_writer_blocked_producer_stops_on_close(tmp_path):
+    writer = AsyncWriter(
+        str(tmp_path / "v.db"),
+        sql=BROKEN_INSERT,
+        maxsize=2,
+        policy="block",
+        flush_rows=1,
+        flush_interval=0.01,
+    )
+    errors = []
+
+    def produce():
+        try:
+            writer.write_many(_row(i) for i in range(10))
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.2)
+    # two rows wait for a retry, two are queued and the producer is blocked
+    assert producer.is_alive() and writer.depth == 2
+    writer.close()
+    producer.join(5.0)
+    assert len(errors) == 1 and "closed" in str(errors[0])
+    assert writer.dropped == 4
+
+
+def test_async_writer_rejects_unknown_policy(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncWriter(str(tmp_path / "v.db"), policy="sometimes")
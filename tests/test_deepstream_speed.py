@@ -116,3 +116,268 @@ def test_write_engine_config_inserts_missing_property(tmp_path):
     generated = deepstream_speed.write_engine_config(str(config), "custom.trt")
 
     assert "model-engine-file=custom.trt" in open(generated, encoding="utf-8").read()
+
+
+def test_source_config_passed_to_speedtrack(monkeypatch):
+    from carspeed.pipeline.config import PipelineOptions
+
+    captured = {}
+    monkeypatch.setattr(
+        deepstream_graph.Gst,
+        "parse_launch",
+        lambda desc: captured.setdefault("desc", desc),
+        raising=False,
+    )
+    opts = PipelineOptions(
+        uri="v.mp4",
+        config="ds.txt",
+        engine="m.trt",
+        db="v.db",
+        ppm=20.0,
+        is_rtsp=False,
+        source_config="sources.ini",
+        batch_size=4,
+    )
+    deepstream_graph.build_pipeline(opts)
+    assert "batch-size=4" in captured["desc"]
+    assert "window=3 source-config=sources.ini ! fakesink" in captured["desc"]
+
+
+def _manifest(tmp_path):
+    (tmp_path / "h1.json").write_text(json.dumps([[2, 0, 0], [0, 2, 0], [0, 0, 1]]))
+    manifest = tmp_path / "cams.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "sources": [
+                    {"uri": "rtsp://cam0/stream", "ppm": 20, "name": "north"},
+                    {"uri": "rtsp://cam1/stream", "homography": "h1.json"},
+                    "clip.mp4",
+                ]
+            }
+        )
+    )
+    return manifest
+
+
+def test_load_manifest_resolves_sources(tmp_path):
+    from carspeed.pipeline.manifest import load_manifest, write_source_config
+
+    sources = load_manifest(str(_manifest(tmp_path)))
+    assert [s.is_rtsp for s in sources] == [True, True, False]
+    assert sources[0].ppm == 20.0 and sources[0].name == "north"
+    assert sources[1].homography == "2.0,0.0,0.0,0.0,2.0,0.0,0.0,0.0,1.0"
+
+    path = write_source_config(sources)
+    text = open(path, encoding="utf-8").read()
+    os.unlink(path)
+    assert "[source0]\n# north\nppm=20.0\n" in text
+    assert "[source1]\nhomography=2.0,0.0,0.0,0.0,2.0,0.0,0.0,0.0,1.0" in text
+    assert "[source2]" not in text
+
+
+def test_load_manifest_requires_uri(tmp_path):
+    from carspeed.pipeline.manifest import load_manifest
+
+    manifest = tmp_path / "bad.json"
+    manifest.write_text(json.dumps([{"ppm": 20}]))
+    with pytest.raises(ValueError, match="source 0 needs a uri"):
+        load_manifest(str(manifest))
+
+
+def test_describe_multi_source_pipeline(tmp_path):
+    from carspeed.pipeline.config import PipelineOptions
+    from carspeed.pipeline.manifest import load_manifest
+
+    sources = load_manifest(str(_manifest(tmp_path)))
+    opts = PipelineOptions(
+        uri="",
+        config="ds.txt",
+        engine="m.trt",
+        db="v.db",
+        ppm=20.0,
+        is_rtsp=False,
+        source_config="s.ini",
+        sources=sources,
+    )
+    desc = deepstream_graph.describe_pipeline(opts)
+    for idx in range(3):
+        assert f"nvv4l2decoder name=dec_{idx} ! mux.sink_{idx}" in desc
+    assert "rtspsrc name=src_1 location=rtsp://cam1/stream" in desc
+    assert "filesrc name=src_2 location=clip.mp4 ! qtdemux" in desc
+    assert "mux.sink_2 nvstreammux name=mux batch-size=3 " in desc
+    assert "nvinfer name=infer config-file-path=ds.txt batch-size=3 !" in desc
+    assert "source-config=s.ini" in desc
+
+
+def test_manifest_cli_sets_batch(monkeypatch, tmp_path):
+    captured = {}
+    config = tmp_path / "ds_config.txt"
+    config.write_text("[property]\nbatch-size=1\n")
+
+    class DummyGst:
+        class State:
+            PLAYING = 0
+            NULL = 1
+
+        class MessageType:
+            ERROR = 1
+            EOS = 2
+
+        MSECOND = 1
+
+    class DummyPipeline:
+        def get_bus(self):
+            eos = types.SimpleNamespace(type=DummyGst.MessageType.EOS)
+            return types.SimpleNamespace(timed_pop_filtered=lambda *a, **kw: eos)
+
+        def get_by_name(self, name):
+            return None
+
+        def set_state(self, state):
+            pass
+
+    def fake_build_pipeline(opts):
+        captured["opts"] = opts
+        captured["ini"] = open(opts.source_config, encoding="utf-8").read()
+        return DummyPipeline()
+
+    monkeypatch.setattr(deepstream_graph, "build_pipeline", fake_build_pipeline)
+    repo = sys.modules.get("gi.repository")
+    if repo:
+        monkeypatch.setattr(repo, "Gst", DummyGst, raising=False)
+    manifest = _manifest(tmp_path)
+    deepstream_speed.main(
+        ["--manifest", str(manifest), "--ppm", "25", "--config", str(config)]
+    )
+    opts = captured["opts"]
+    assert opts.batch_size == 3
+    assert opts.ppm == 25.0
+    assert len(opts.sources) == 3
+    assert "[source0]" in captured["ini"]
+    assert not os.path.exists(opts.source_config)
+
+
+def test_manifest_cli_needs_ppm_for_every_source(tmp_path):
+    with pytest.raises(SystemExit):
+        deepstream_speed.main(["--manifest", str(_manifest(tmp_path))])
+
+
+def _options(**kwargs):
+    from carspeed.pipeline.config import PipelineOptions
+
+    base = dict(
+        uri="rtsp://cam/stream",
+        config="ds.txt",
+        engine="m.trt",
+        db="v.db",
+        ppm=20.0,
+        is_rtsp=True,
+    )
+    base.update(kwargs)
+    return PipelineOptions(**base)
+
+
+def test_describe_default_source_is_h265():
+    desc = deepstream_graph.describe_pipeline(_options())
+    assert desc.startswith(
+        "rtspsrc name=src_0 location=rtsp://cam/stream latency=100 ! "
+        "rtph265depay name=depay_0 ! h265parse name=parse_0 ! nvv4l2decoder name=dec_0 ! "
+    )
+    assert "nvbuf-memory-type=0 !" in desc
+
+
+def test_describe_tuned_rtsp_source():
+    desc = deepstream_graph.describe_pipeline(
+        _options(
+            codec="h264",
+            transport="tcp",
+            latency=400,
+            drop_on_latency=True,
+            drop_frame_interval=3,
+            nvbuf_memory_type=3,
+        )
+    )
+    assert (
+        "rtspsrc name=src_0 location=rtsp://cam/stream latency=400 protocols=tcp "
+        "drop-on-latency=true ! rtph264depay name=depay_0 ! h264parse name=parse_0 ! "
+        "nvv4l2decoder name=dec_0 drop-frame-interval=3 !"
+    ) in desc
+    assert "nvbuf-memory-type=3 !" in desc
+
+
+def test_describe_auto_codec_uses_parsebin():
+    desc = deepstream_graph.describe_pipeline(_options(codec="auto"))
+    assert "latency=100 ! parsebin name=parse_0 ! nvv4l2decoder name=dec_0 !" in desc
+    desc = deepstream_graph.describe_pipeline(
+        _options(uri="clip.mp4", is_rtsp=False, codec="auto", latency=5)
+    )
+    assert desc.startswith("filesrc name=src_0 location=clip.mp4 ! parsebin name=parse_0 !")
+    assert "latency" not in desc
+
+
+def test_manifest_codec_overrides_default(tmp_path):
+    from carspeed.pipeline.manifest import load_manifest
+
+    manifest = tmp_path / "cams.json"
+    manifest.write_text(
+        json.dumps([{"uri": "rtsp://a/s", "codec": "h264"}, {"uri": "b.mp4"}])
+    )
+    sources = load_manifest(str(manifest))
+    desc = deepstream_graph.describe_pipeline(_options(sources=sources))
+    assert "rtph264depay name=depay_0" in desc
+    assert "qtdemux name=demux_1 ! h265parse name=parse_1" in desc
+
+    manifest.write_text(json.dumps([{"uri": "rtsp://a/s", "codec": "vp9"}]))
+    with pytest.raises(ValueError, match="codec"):
+        load_manifest(str(manifest))
+
+
+def test_pipeline_options_validate_decode_settings():
+    with pytest.raises(ValueError, match="codec"):
+        _options(codec="mjpeg")
+    with pytest.raises(ValueError, match="transport"):
+        _options(transport="http")
+    with pytest.raises(ValueError, match="nvbuf_memory_type"):
+        _options(nvbuf_memory_type=7)
+
+
+def test_describe_infer_interval():
+    assert " interval=" not in deepstream_graph.describe_pipeline(_options())
+    desc = deepstream_graph.describe_pipeline(_options(infer_interval=2))
+    assert "nvinfer name=infer config-file-path=ds.txt interval=2 ! nvtracker" in desc
+    assert "speedtrack name=speed " in desc
+
+
+def test_describe_summary_rows():
+    assert "summaries" not in deepstream_graph.describe_pipeline(_options())
+    desc = deepstream_graph.describe_pipeline(_options(rows="summary"))
+    assert "window=3 summaries=true raw-rows=false ! fakesink" in desc
+    desc = deepstream_graph.describe_pipeline(_options(rows="both"))
+    assert "summaries=true" in desc and "raw-rows" not in desc
+    with pytest.raises(ValueError, match="rows"):
+        _options(rows="all")
+
+
+def test_adapt_infer_interval_follows_tracks():
+    from carspeed.core.scheduler import AdaptiveInterval
+
+    class Element:
+        def __init__(self, **props):
+            self.props = props
+
+        def get_property(self, name):
+            return self.props[name]
+
+        def set_property(self, name, value):
+            self.props[name] = value
+
+    infer = Element(interval=0)
+    speed = Element(tracks=0)
+    throttle = AdaptiveInterval(1, 4)
+    deepstream_speed.adapt_infer_interval(throttle, infer, speed)
+    deepstream_speed.adapt_infer_interval(throttle, infer, speed)
+    assert infer.props["interval"] == 3
+    speed.props["tracks"] = 2
+    deepstream_speed.adapt_infer_interval(throttle, infer, speed)
+    assert infer.props["interval"] == 0
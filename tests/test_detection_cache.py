@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from carspeed.core.processor import FrameProcessor
+from carspeed.core.tracker_wrapper import create_tracker
+from carspeed.io.capture import run_stream
+from carspeed.io.detection_cache import (
+    DetectionCache,
+    DetectionCacheWriter,
+    cache_path,
+    fingerprint,
+)
+
+
+def _frames(n):
+    for i in range(n):
+        x = i * 5
+        dets = [(x, 10, x + 30, 40, 0.5 + i / 100, "car")]
+        if i % 3 == 0:
+            dets.append((400 - x, 100, 440 - x, 130, 0.8, "truck"))
+        yield i / 30.0, dets if i != 7 else []
+
+
+def _processor():
+    tracker = create_tracker("iou", iou_threshold=0.2, decay_time=0.5)
+    return FrameProcessor(tracker, ppm=10.0, decay_time=0.5, window=5)
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "cache" / "key")
+    frames = list(_frames(12))
+    writer = DetectionCacheWriter(path, meta={"model": "m.pt"})
+    for ts, dets in frames:
+        writer.append(ts, dets)
+    assert not DetectionCache.exists(path)
+    writer.close()
+
+    cache = DetectionCache(path)
+    assert isinstance(cache.boxes, np.memmap)
+    assert len(cache) == 12
+    assert cache.detections == sum(len(d) for _, d in frames)
+    assert cache.meta["model"] == "m.pt"
+    assert cache.labels == ["car", "truck"]
+    for (ts, dets), (cts, cdets) in zip(frames, cache):
+        assert cts == ts
+        assert cdets == dets
+
+
+def test_cache_path_follows_content(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x" * 1000)
+    model = tmp_path / "m.pt"
+    model.write_bytes(b"weights")
+    first = cache_path(str(tmp_path), str(video), str(model))
+    assert cache_path(str(tmp_path), str(video), str(model)) == first
+    assert cache_path(str(tmp_path), str(video), str(model), extra="classes") != first
+    model.write_bytes(b"weight2")
+    assert cache_path(str(tmp_path), str(video), str(model)) != first
+    assert fingerprint("yolov8n.pt") != fingerprint("yolov8s.pt")
+
+
+def test_sampled_fingerprint_of_large_file(tmp_path):
+    big = tmp_path / "big.bin"
+    data = bytearray(17 << 20)
+    big.write_bytes(data)
+    before = fingerprint(str(big))
+    data[-1] = 1  # the last block is always sampled
+    big.write_bytes(data)
+    assert fingerprint(str(big)) != before
+
+
+def test_fingerprint_follows_mtime(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(bytes(17 << 20))
+    os.utime(big, ns=(1_000_000_000, 1_000_000_000))
+    before = fingerprint(str(big))
+    assert fingerprint(str(big)) == before
+    os.utime(big, ns=(2_000_000_000, 2_000_000_000))
+    assert fingerprint(str(big)) != before
+
+
+def test_replay_from_cache_matches_live_run(tmp_path):
+    path = str(tmp_path / "key")
+    writer = DetectionCacheWriter(path)
+    live = []
+
+    def detect(frame):
+        return frame
+
+    run_stream(_frames(40), detect, _processor(), live.extend, on_detections=writer.append)
+    writer.close()
+
+    replayed = []
+    run_stream(iter(DetectionCache(path)), detect, _processor(), replayed.extend)
+    assert len(replayed) == len(live)
+    for got, want in zip(replayed, live):
+        assert got[:3] == want[:3]
+        assert got[3] == pytest.approx(want[3])
+        assert got[4:8] == want[4:8]
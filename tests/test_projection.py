@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+
+from carspeed.core.projection import Homography, load_matrix
+
+H = [[0.9, 0.05, 12.0], [0.02, 1.1, -4.0], [0.0001, 0.0002, 1.0]]
+
+
+def _scalar(h, cx, cy):
+    tx = h[0] * cx + h[1] * cy + h[2]
+    ty = h[3] * cx + h[4] * cy + h[5]
+    tz = h[6] * cx + h[7] * cy + h[8]
+    return (tx / tz, ty / tz) if tz != 0 else (cx, cy)
+
+
+def test_project_matches_scalar_formula():
+    flat = [v for row in H for v in row]
+    pts = np.random.default_rng(0).uniform(0, 1000, size=(50, 2))
+    got = Homography(flat).project(pts)
+    expected = [_scalar(flat, x, y) for x, y in pts.tolist()]
+    assert np.allclose(got, expected)
+
+
+def test_zero_scale_points_are_unchanged():
+    h = Homography([1, 0, 0, 0, 1, 0, 1, 0, 0])
+    assert h.project(np.array([[0.0, 7.0]])).tolist() == [[0.0, 7.0]]
+
+
+def test_lut_agrees_with_exact_projection():
+    h = Homography(H)
+    pts = np.array([[10.0, 20.0], [639.0, 479.0], [700.0, 10.0]])
+    exact = h.project(pts)
+    h.build_lut(640, 480)
+    assert np.allclose(h.project(pts), exact, atol=1e-3)
+    h.drop_lut()
+    assert np.array_equal(h.project(pts), exact)
+
+
+def test_footpoints_use_box_bottom():
+    h = Homography(np.eye(3))
+    boxes = np.array([[0, 0, 10, 20]])
+    assert h.project_boxes(boxes).tolist() == [[5.0, 10.0]]
+    assert h.project_boxes(boxes, footpoint=True).tolist() == [[5.0, 20.0]]
+
+
+def test_load_matrix_accepts_mapping(tmp_path):
+    path = tmp_path / "h.json"
+    path.write_text(json.dumps({"homography": H}))
+    assert load_matrix(str(path)).tolist() == H
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from carspeed.core.processor import FrameProcessor
+from carspeed.core.tracker_wrapper import create_tracker
+from carspeed.io.capture import run_stream
+from carspeed.io.replay import (
+    CAP_PROP_FPS,
+    CAP_PROP_POS_FRAMES,
+    CAP_PROP_POS_MSEC,
+    ReplayJob,
+    media_frames,
+    plan_chunks,
+    replay_parallel,
+)
+
+FPS = 10.0
+
+
+class FakeVideo:
+    """``cv2.VideoCapture`` stand-in whose frames carry their index."""
+
+    def __init__(self, n, report_msec=True):
+        self.n = n
+        self.report_msec = report_msec
+        self.pos = 0
+        self.released = False
+
+    def read(self):
+        if self.pos >= self.n:
+            return False, None
+        self.pos += 1
+        return True, np.array([self.pos - 1])
+
+    def get(self, prop):
+        if prop == CAP_PROP_FPS:
+            return FPS
+        if prop == CAP_PROP_POS_MSEC and self.report_msec:
+            return (self.pos - 1) * 1000.0 / FPS
+        return 0.0
+
+    def set(self, prop, value):
+        assert prop == CAP_PROP_POS_FRAMES
+        self.pos = int(value)
+
+    def release(self):
+        self.released = True
+
+
+def open_video(source):
+    return FakeVideo(int(source))
+
+
+def road(frame):
+    """A car every 15 frames, moving 6 px per frame, from the frame index."""
+    index = int(frame[0])
+    boxes = []
+    for car in range(index // 15 + 1):
+        x = (index - car * 15) * 6
+        if x < 300:
+            boxes.append((x, 50 * (car % 3), x + 40, 50 * (car % 3) + 30, 0.9, "car"))
+    return boxes
+
+
+def make_detector():
+    return road
+
+
+def make_processor():
+    tracker = create_tracker("iou", iou_threshold=0.3, decay_time=0.5)
+    return FrameProcessor(tracker, ppm=3.0, decay_time=0.5, window=3)
+
+
+def test_media_frames_uses_pos_msec_or_frame_index():
+    for report in (True, False):
+        frames = list(media_frames(FakeVideo(20, report), start=5, stop=8, epoch=100.0))
+        assert [ts for ts, _ in frames] == pytest.approx([100.5, 100.6, 100.7])
+    with pytest.raises(ValueError):
+        list(media_frames(FakeVideo(1), fps=0))
+
+
+def test_plan_chunks():
+    chunks = plan_chunks(25, 10, overlap=3)
+    assert [(c.warmup, c.start, c.stop) for c in chunks] == [(0, 0, 10), (7, 10, 20), (17, 20, 25)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_replay_parallel_matches_single_pass(workers):
+    n = 120
+    reference = []
+    run_stream(media_frames(FakeVideo(n)), road, make_processor(), reference.extend)
+
+    rows = []
+    job = ReplayJob(str(n), open_video, make_detector, make_processor, FPS)
+    chunks = replay_parallel(job, n, rows.extend, chunk_frames=25, overlap=8, workers=workers)
+    assert chunks == 5
+    assert [r[0] for r in rows] == [r[0] for r in reference]
+    # ids differ in value but must map one to one across chunk boundaries
+    ids = {}
+    for got, want in zip(rows, reference):
+        assert ids.setdefault(want[1], got[1]) == got[1]
+        assert got[3] == pytest.approx(want[3])
+        assert got[4:] == want[4:]
+    assert len(set(ids.values())) == len(ids)
+
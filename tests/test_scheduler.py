@@ -0,0 +1,45 @@
+import pytest
+
+from carspeed.core.scheduler import AdaptiveInterval
+
+
+def _pattern(scheduler, frames, active):
+    ran = []
+    for frame in range(frames):
+        if scheduler.should_detect():
+            ran.append(frame)
+            scheduler.update(active(frame))
+    return ran
+
+
+def test_disabled_runs_every_frame():
+    s = AdaptiveInterval()
+    assert _pattern(s, 10, lambda f: 0) == list(range(10))
+    assert s.skipped == 0
+
+
+def test_backs_off_when_empty_and_recovers():
+    s = AdaptiveInterval(min_interval=1, max_interval=8)
+    # empty scene: intervals 2, 4, 8, 8, ...
+    assert _pattern(s, 40, lambda f: 0) == [0, 2, 6, 14, 22, 30, 38]
+    assert s.interval == 8
+    # a vehicle seen on the next detection restores full rate
+    s.update(1)
+    assert s.interval == 1
+    assert s.should_detect()
+
+
+def test_busy_threshold_and_min_interval():
+    s = AdaptiveInterval(min_interval=2, max_interval=4, busy_tracks=3)
+    assert s.update(2) == 4
+    assert s.update(3) == 2
+    ran = _pattern(s, 10, lambda f: 5)
+    assert ran == [0, 2, 4, 6, 8]
+    assert (s.frames, s.detections, s.skipped) == (10, 5, 5)
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveInterval(min_interval=0)
+    with pytest.raises(ValueError):
+        AdaptiveInterval(min_interval=4, max_interval=2)
@@ -1,7 +1,16 @@
 import json
 from pathlib import Path
 
-from carspeed.core.speed_math import rolling_speed
+import numpy as np
+import pytest
+
+from carspeed.core.speed_math import (
+    RollingSpeed,
+    SpeedHistory,
+    regression_speed,
+    rolling_speed,
+    rolling_speed_array,
+)
 
 
 ASSET = Path(__file__).parent / "assets" / "synthetic_centroids.json"
@@ -16,3 +25,63 @@ def test_mean_speed_kmh():
         raise AssertionError("no speeds computed")
     mean_kmh = sum(speeds) / len(speeds) * 3.6
     assert 54 <= mean_kmh <= 55
+
+
+def _load():
+    data = json.loads(ASSET.read_text())
+    centroids = [tuple(map(float, c)) for c in data["centroids"]]
+    timestamps = [float(t) for t in data["timestamps"]]
+    return centroids, timestamps
+
+
+@pytest.mark.parametrize("window", [1, 3, 20])
+def test_streaming_estimator_matches_rolling_speed(window):
+    centroids, timestamps = _load()
+    expected = rolling_speed(centroids, timestamps, ppm=20, window=window)
+    est = RollingSpeed(ppm=20, window=window)
+    got = [est.update(c, t) for c, t in zip(centroids, timestamps)]
+    assert got[0] is None
+    assert got[1:] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("window", [1, 3, 20])
+def test_array_variant_matches_rolling_speed(window):
+    centroids, timestamps = _load()
+    expected = rolling_speed(centroids, timestamps, ppm=20, window=window)
+    got = rolling_speed_array(np.array(centroids), np.array(timestamps), 20, window)
+    assert got.tolist() == pytest.approx(expected)
+
+
+def test_regression_speed_matches_plugin_smoothing():
+    # same samples as test_speedtrack_smoothing in test_speedtrack.py
+    speed = regression_speed([(5, 5), (5, 26), (5, 44)], [0.0, 1.0, 2.0], ppm=1)
+    assert speed == pytest.approx(19.5)
+
+
+def test_speed_history_vectorised_matches_scalar_fit():
+    rng = np.random.default_rng(0)
+    history = SpeedHistory(window=4, capacity=2)
+    samples = {tid: [] for tid in range(5)}
+    for frame in range(7):
+        ts = frame * 0.1
+        ids = [tid for tid in samples if (tid + frame) % 3]
+        pts = rng.uniform(0, 100, size=(len(ids), 2))
+        slots = history.push(ids, pts, ts)
+        speeds = history.speeds(slots, ppm=10)
+        for tid, pt, got in zip(ids, pts.tolist(), speeds.tolist()):
+            samples[tid].append((tuple(pt), ts))
+            recent = samples[tid][-4:]
+            expected = regression_speed(
+                [p for p, _ in recent], [t for _, t in recent], ppm=10
+            )
+            assert got == pytest.approx(expected)
+
+
+def test_speed_history_expires_and_recycles_rows():
+    history = SpeedHistory(window=3, capacity=1)
+    history.push([1, 2], np.zeros((2, 2)), 0.0)
+    history.push([2], np.ones((1, 2)), 5.0)
+    assert history.expire(5.0, max_age=1.0) == [1]
+    assert len(history) == 1
+    (slot,) = history.push([3], np.zeros((1, 2)), 5.0)
+    assert history.count[slot] == 1
@@ -1,4 +1,10 @@
+import shutil
 import sqlite3
+import struct
+import subprocess
+import time
+from pathlib import Path
+
 import pytest
 
 try:
@@ -14,6 +20,8 @@ try:
 except Exception:  # pragma: no cover - skip if pyds missing
     pyds = None
 
+ROOT = Path(__file__).resolve().parent.parent
+
 
 @pytest.mark.skipif(
     Gst is None or pyds is None, reason="GStreamer or DeepStream not available"
@@ -117,3 +125,243 @@ def test_speedtrack_smoothing(tmp_path):
         conn.close()
     assert len(rows) == 2
     assert rows[1] == pytest.approx(19.5, rel=0.1)
+
+
+@pytest.mark.skipif(
+    Gst is None or pyds is None, reason="GStreamer or DeepStream not available"
+)
+def test_speedtrack_per_source_state(tmp_path):
+    Gst.init(None)
+    db_path = tmp_path / "vehicles.db"
+    config = tmp_path / "sources.ini"
+    config.write_text("[source1]\nppm=2\n")
+    pipe_desc = (
+        f"appsrc name=src ! speedtrack ppm=1 window=2 db={db_path} "
+        f"source-config={config} ! fakesink sync=false"
+    )
+    pipeline = Gst.parse_launch(pipe_desc)
+    appsrc = pipeline.get_by_name("src")
+    pipeline.set_state(Gst.State.PLAYING)
+
+    def _push(ts_ns, y):
+        buf = Gst.Buffer.new()
+        batch_meta = pyds.gst_buffer_add_nvds_batch_meta(buf, 2)
+        for source_id in (0, 1):
+            frame_meta = pyds.nvds_add_frame_meta_to_batch(
+                batch_meta, pyds.alloc_nvds_frame_meta()
+            )
+            frame_meta.source_id = source_id
+            frame_meta.ntp_timestamp = ts_ns
+            # the same object id on both cameras must be two tracks
+            obj_meta = pyds.nvds_acquire_obj_meta_from_pool(batch_meta)
+            obj_meta.object_id = 1
+            obj_meta.rect_params.left = 0
+            obj_meta.rect_params.top = y
+            obj_meta.rect_params.width = 10
+            obj_meta.rect_params.height = 10
+            pyds.nvds_add_obj_meta_to_frame(frame_meta, obj_meta, None)
+        appsrc.emit("push-buffer", buf)
+
+    _push(0, 0)
+    _push(int(1e9), 20)
+    appsrc.emit("end-of-stream")
+    pipeline.get_bus().timed_pop_filtered(
+        5 * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR
+    )
+    pipeline.set_state(Gst.State.NULL)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = dict(
+            conn.execute("SELECT source_id, speed FROM vehicles").fetchall()
+        )
+    finally:
+        conn.close()
+    assert rows[0] == pytest.approx(20.0)
+    assert rows[1] == pytest.approx(10.0)
+
+
+@pytest.fixture(scope="module")
+def stub_speedtrack(tmp_path_factory):
+    """Build and register a speedtrack that reads objects from the payload."""
+    if Gst is None:
+        pytest.skip("GStreamer not available")
+    if shutil.which("make") is None:
+        pytest.skip("make not available")
+    plugin = tmp_path_factory.mktemp("speedtrack") / "libspeedtrack.so"
+    build = subprocess.run(
+        ["make", "-C", str(ROOT), f"PLUGIN={plugin}", "STUB_PAYLOAD=1"],
+        capture_output=True,
+        text=True,
+    )
+    if build.returncode != 0:
+        pytest.skip(f"cannot build speedtrack: {build.stderr.strip()}")
+    Gst.init(None)
+    Gst.Plugin.load_file(str(plugin))
+    factory = Gst.ElementFactory.find("speedtrack")
+    if factory is None or factory.get_plugin().get_filename() != str(plugin):
+        pytest.skip("another speedtrack plug-in is already registered")
+
+
+# NvDsStubObject of nvds_stub.h: ntp_timestamp, object_id, source_id, box, confidence
+STUB_OBJECT = struct.Struct("=QQIfffff")
+
+
+def _stub_frame(index, cars=range(5), ntp_base=(0,)):
+    """Buffer read by the stub build: ``cars`` moving 10 px per 0.1 s frame.
+
+    The buffer holds one frame per entry of ``ntp_base``, for source ``i`` with
+    its NTP clock starting at ``ntp_base[i]`` ns; its PTS is ``index`` * 0.1 s.
+    """
+    ntp = index * 100_000_000
+    data = b"".join(
+        STUB_OBJECT.pack(base + ntp, car, source, 100 * car + 10 * index, 50, 40, 20, 0.9)
+        for source, base in enumerate(ntp_base)
+        for car in cars
+    )
+    buf = Gst.Buffer.new_wrapped(data)
+    buf.pts = ntp
+    return buf
+
+
+def _committed(db_path):
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _poll(condition, timeout=30.0):
+    """Wait for ``condition()``; the deadline only bounds a failing test."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _wait_written(speed, rows):
+    # the writer commits, if due, before it publishes written-records
+    _poll(lambda: speed.get_property("written-records") >= rows)
+    assert speed.get_property("written-records") == rows
+
+
+def _stub_pipeline(db_path, options):
+    pipeline = Gst.parse_launch(
+        f"appsrc name=src format=time ! speedtrack name=speed db={db_path} {options} "
+        "! fakesink sync=false"
+    )
+    pipeline.set_state(Gst.State.PLAYING)
+    return pipeline, pipeline.get_by_name("src"), pipeline.get_by_name("speed")
+
+
+def _wait_eos(pipeline, appsrc):
+    """End the stream; once EOS reaches the bus every buffer has been processed."""
+    appsrc.emit("end-of-stream")
+    msg = pipeline.get_bus().timed_pop_filtered(
+        30 * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR
+    )
+    assert msg is not None and msg.type == Gst.MessageType.EOS
+
+
+def _finish(pipeline, appsrc):
+    _wait_eos(pipeline, appsrc)
+    # stop() drains the writer thread, commits and closes the database
+    pipeline.set_state(Gst.State.NULL)
+
+
+def test_speedtrack_flush_rows_and_final_flush(stub_speedtrack, tmp_path):
+    db_path = tmp_path / "vehicles.db"
+    pipeline, appsrc, speed = _stub_pipeline(
+        db_path,
+        "flush-interval=3600 flush-rows=10 queue-size=64 track-timeout=2.0 max-tracks=128",
+    )
+    assert speed.get_property("flush-interval") == pytest.approx(3600)
+    assert speed.get_property("flush-rows") == 10
+    assert speed.get_property("queue-size") == 64
+    assert speed.get_property("track-timeout") == pytest.approx(2.0)
+    assert speed.get_property("max-tracks") == 128
+    # a track's first frame has no speed, every later frame queues 5 rows at once
+    for i in range(2):
+        appsrc.emit("push-buffer", _stub_frame(i))
+    _wait_written(speed, 5)
+    assert _committed(db_path) == 0  # below flush-rows, the transaction stays open
+    appsrc.emit("push-buffer", _stub_frame(2))
+    _wait_written(speed, 10)
+    assert _committed(db_path) == 10
+    appsrc.emit("push-buffer", _stub_frame(3))
+    _wait_written(speed, 15)
+    assert _committed(db_path) == 10
+    _finish(pipeline, appsrc)
+    assert _committed(db_path) == 15  # the final flush on stop
+    assert speed.get_property("written-records") == 15
+    assert speed.get_property("dropped-records") == 0
+    assert speed.get_property("queued-records") == 0
+    assert speed.get_property("tracks") == 0
+
+
+def test_speedtrack_flush_interval(stub_speedtrack, tmp_path):
+    db_path = tmp_path / "vehicles.db"
+    pipeline, appsrc, speed = _stub_pipeline(db_path, "flush-interval=0.2 flush-rows=1000")
+    for i in range(3):
+        appsrc.emit("push-buffer", _stub_frame(i))
+    _wait_written(speed, 10)
+    # far below flush-rows, so only the interval can commit these rows
+    assert _poll(lambda: _committed(db_path) == 10)
+    _finish(pipeline, appsrc)
+    assert _committed(db_path) == 10
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT timestamp, source_id, track_id FROM vehicles ORDER BY 1, 2, 3"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(round(ts, 3), source, tid) for ts, source, tid in rows]
+
+
+def test_speedtrack_track_timeout(stub_speedtrack, tmp_path):
+    db_path = tmp_path / "vehicles.db"
+    pipeline, appsrc, speed = _stub_pipeline(db_path, "track-timeout=0.5")
+    # car 0 leaves after frame 1 and is gone for 0.9 s; car 1 stays in view
+    for i in range(10):
+        appsrc.emit("push-buffer", _stub_frame(i, cars=(0, 1) if i < 2 else (1,)))
+    _wait_written(speed, 10)
+    assert _poll(lambda: speed.get_property("tracks") == 1)
+    appsrc.emit("push-buffer", _stub_frame(10, cars=(0, 1)))
+    _wait_eos(pipeline, appsrc)
+    assert speed.get_property("tracks") == 2
+    pipeline.set_state(Gst.State.NULL)
+    # car 0 came back as a new track, so it has no speed at frame 10
+    assert [ts for ts, _, tid in _rows(db_path) if tid == 0] == [0.1]
+    assert len(_rows(db_path)) == 11
+
+
+def test_speedtrack_max_tracks_evicts_least_recently_seen(stub_speedtrack, tmp_path):
+    db_path = tmp_path / "vehicles.db"
+    pipeline, appsrc, speed = _stub_pipeline(db_path, "max-tracks=3")
+    appsrc.emit("push-buffer", _stub_frame(0, cars=(0, 1, 2)))
+    appsrc.emit("push-buffer", _stub_frame(1, cars=(0,)))  # car 1 is now the oldest
+    appsrc.emit("push-buffer", _stub_frame(2, cars=(3,)))  # evicts car 1, not car 0
+    appsrc.emit("push-buffer", _stub_frame(3, cars=(0, 2)))
+    appsrc.emit("push-buffer", _stub_frame(4, cars=(1,)))  # a new track again, evicts car 3
+    _wait_eos(pipeline, appsrc)
+    assert speed.get_property("tracks") == 3
+    pipeline.set_state(Gst.State.NULL)
+    assert _rows(db_path) == [(0.1, 0, 0), (0.3, 0, 0), (0.3, 0, 2)]
+
+
+def test_speedtrack_timeout_ignores_other_sources_clocks(stub_speedtrack, tmp_path):
+    db_path = tmp_path / "vehicles.db"
+    pipeline, appsrc, speed = _stub_pipeline(db_path, "track-timeout=1.0")
+    # the two cameras' NTP clocks are 1000 s apart, the running time is shared
+    for i in range(5):
+        appsrc.emit("push-buffer", _stub_frame(i, cars=(0,), ntp_base=(1000 * 10**9, 0)))
+    _wait_eos(pipeline, appsrc)
+    assert speed.get_property("tracks") == 2
+    pipeline.set_state(Gst.State.NULL)
+    assert [source for _, source, _ in _rows(db_path)].count(1) == 4
+    assert len(_rows(db_path)) == 8
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from carspeed.core.processor import FrameProcessor
+from carspeed.core.summary import TrackSummaries
+from carspeed.core.tracker_wrapper import create_tracker
+from carspeed.io.capture import run_stream
+from carspeed.io.db import INSERT_SUMMARY, init_db
+
+
+def _car(i, y=0, step=5):
+    x = i * step
+    return (x, y, x + 30, y + 20, 0.5 + i / 100, "car")
+
+
+def _processor(**kwargs):
+    tracker = create_tracker("iou", iou_threshold=0.2, decay_time=0.5)
+    return FrameProcessor(tracker, ppm=5.0, decay_time=0.5, window=3, summaries=True, **kwargs)
+
+
+def test_summaries_of_one_track():
+    summaries = TrackSummaries(ppm=2.0, source_id=3)
+    for i, speed in enumerate([None, 4.0, 2.0, 9.0]):
+        summaries.add(7, i * 0.5, (i * 3.0, i * 4.0), speed, "car", (i, i, i + 9, i + 9), 0.5)
+    summaries.add(8, 1.0, (0.0, 0.0), None, "truck", (0, 0, 5, 5), 0.9)
+    assert len(summaries) == 2
+    (row,) = summaries.finish([7, 99])
+    src, tid, label, entry, exit_, distance, mean, median, top, n, *box, conf = row
+    assert (src, tid, label, entry, exit_, n) == (3, 7, "car", 0.0, 1.5, 4)
+    assert distance == pytest.approx(15.0 / 2.0)
+    assert (mean, median, top) == pytest.approx((5.0, 4.0, 9.0))
+    assert (box, conf) == ([0, 0, 9, 9], 0.5)  # first of equally confident boxes
+    assert summaries.finish_all() == []  # a single sample has no speed
+    assert len(summaries) == 0
+
+
+def test_processor_summarises_expired_tracks():
+    processor = _processor(source_id=2)
+    rows = []
+    for i in range(10):
+        rows += processor.process([_car(i)], i / 10.0)
+    assert processor.pop_summaries() == []
+    processor.process([], 2.0)
+    (summary,) = processor.pop_summaries()
+    assert summary[:5] == (2, rows[0][1], "car", 0.0, pytest.approx(0.9))
+    assert summary[5] == pytest.approx(45 / 5.0)
+    assert summary[6:9] == pytest.approx((10.0, 10.0, 10.0))
+    assert summary[9:] == (10, 45, 0, 75, 20, pytest.approx(0.59))
+    assert processor.finish() == []
+
+
+def test_run_stream_writes_summaries(tmp_path):
+    frames = [(i / 10.0, [_car(i), _car(i, y=200, step=10)]) for i in range(20)]
+    frames += [(5.0 + i / 10.0, [_car(i, y=400)]) for i in range(5)]
+    raw = []
+    summaries = []
+    run_stream(
+        frames,
+        lambda dets: dets,
+        _processor(),
+        raw.extend,
+        staged=True,
+        summary_sink=summaries.extend,
+    )
+    assert len(raw) == 45
+    assert sorted(s[7] for s in summaries) == pytest.approx([10.0, 10.0, 20.0])
+    # the last vehicle is still tracked when the stream ends
+    assert [s[9] for s in summaries] == [20, 20, 5]
+    with init_db(str(tmp_path / "s.db")) as conn:
+        conn.executemany(INSERT_SUMMARY, summaries)
+    conn = sqlite3.connect(tmp_path / "s.db")
+    assert conn.execute("SELECT COUNT(*), MAX(max_speed) FROM vehicle_summaries").fetchone() == (
+        3,
+        pytest.approx(20.0),
+    )
@@ -0,0 +1,244 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+if "gi" not in sys.modules:
+    gi_stub = types.ModuleType("gi")
+    repo = types.ModuleType("gi.repository")
+    repo.Gst = types.SimpleNamespace(init=lambda *a, **kw: None, Pipeline=object)
+    repo.GLib = types.SimpleNamespace()
+    gi_stub.require_version = lambda *a, **kw: None
+    gi_stub.repository = repo
+    sys.modules["gi"] = gi_stub
+    sys.modules["gi.repository"] = repo
+
+from carspeed.pipeline import supervisor as sup
+from carspeed.pipeline.manifest import SourceSpec
+
+
+OK = "ok"
+
+
+class FakePad:
+    def __init__(self, name):
+        self.name = name
+        self.peer = None
+
+    def link(self, other):
+        self.peer = other
+        other.peer = self
+        return OK
+
+
+class FakeElement:
+    def __init__(self, name):
+        self.name = name
+        self.parent = None
+        self.state = "playing"
+        self.pads = {"src": FakePad("src")}
+
+    def get_name(self):
+        return self.name
+
+    def set_name(self, name):
+        self.name = name
+
+    def get_parent(self):
+        return self.parent
+
+    def set_state(self, state):
+        self.state = state
+
+    def sync_state_with_parent(self):
+        self.state = self.parent.state
+
+    def get_static_pad(self, name):
+        return self.pads.get(name)
+
+    def get_request_pad(self, name):
+        return self.pads.setdefault(name, FakePad(name))
+
+
+class FakeBin(FakeElement):
+    def __init__(self, name, children=()):
+        super().__init__(name)
+        self.children = []
+        for child in children:
+            self.add(child)
+
+    def add(self, element):
+        element.parent = self
+        self.children.append(element)
+
+    def remove(self, element):
+        self.children.remove(element)
+        element.parent = None
+
+    def get_by_name(self, name):
+        for child in self.children:
+            if child.name == name:
+                return child
+            if isinstance(child, FakeBin):
+                found = child.get_by_name(name)
+                if found is not None:
+                    return found
+        return None
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _message(element, text="connection lost"):
+    return types.SimpleNamespace(
+        src=element, parse_error=lambda: (types.SimpleNamespace(message=text), None)
+    )
+
+
+@pytest.fixture
+def fake_gst(monkeypatch):
+    gst = types.SimpleNamespace(
+        State=types.SimpleNamespace(NULL="null"),
+        PadLinkReturn=types.SimpleNamespace(OK=OK),
+    )
+    monkeypatch.setattr(sup, "Gst", gst)
+    return gst
+
+
+def _pipeline():
+    mux = FakeElement("mux")
+    mux.get_request_pad("sink_0")
+    mux.get_request_pad("sink_1")
+    chains = [
+        FakeElement(f"{role}_{idx}")
+        for idx in range(2)
+        for role in ("src", "depay", "parse", "dec")
+    ]
+    pipeline = FakeBin("pipeline", chains + [mux, FakeElement("infer")])
+    sources = [
+        SourceSpec("rtsp://cam0/stream", True),
+        SourceSpec("rtsp://cam1/stream", True),
+    ]
+    return pipeline, mux, sources
+
+
+class CameraFactory:
+    """Builds source bins, failing while ``down`` is set."""
+
+    def __init__(self):
+        self.down = False
+        self.built = []
+
+    def __call__(self, uri, index):
+        if self.down:
+            raise RuntimeError("camera unreachable")
+        bin_ = FakeBin("bin0", [FakeElement(f"src_{index}")])
+        self.built.append(uri)
+        return bin_
+
+
+def test_source_index_walks_parents():
+    inner = FakeElement("src_3")
+    FakeBin("source_3", [inner])
+    assert sup.source_index(inner) == 3
+    assert sup.source_index(FakeElement("nvinfer0")) is None
+
+
+def test_error_reconnects_only_failed_source(fake_gst):
+    pipeline, mux, sources = _pipeline()
+    clock = Clock()
+    cameras = CameraFactory()
+    s = sup.SourceSupervisor(pipeline, sources, make_source=cameras, clock=clock)
+
+    assert s.handle_error(_message(pipeline.get_by_name("depay_1")))
+    names = [c.name for c in pipeline.children]
+    assert not any(n.endswith("_1") for n in names)
+    assert {"src_0", "dec_0", "mux", "infer"} <= set(names)
+
+    s.poll()
+    assert cameras.built == []  # still waiting for the first backoff delay
+    clock.now = 1.0
+    s.poll()
+    assert cameras.built == ["rtsp://cam1/stream"]
+    source = pipeline.get_by_name("source_1")
+    assert source.state == "playing"
+    assert source.get_static_pad("src").peer is mux.get_static_pad("sink_1")
+    assert s.reconnects == 1
+
+    # the next failure comes from inside the reconnected bin
+    assert s.handle_error(_message(source.get_by_name("src_1")))
+    assert pipeline.get_by_name("source_1") is None
+    assert source.state == "null"
+
+
+def test_stale_error_from_replaced_chain_is_ignored(fake_gst):
+    pipeline, mux, sources = _pipeline()
+    clock = Clock()
+    s = sup.SourceSupervisor(pipeline, sources, make_source=CameraFactory(), clock=clock)
+    old_src, old_dec = pipeline.get_by_name("src_1"), pipeline.get_by_name("dec_1")
+    assert s.handle_error(_message(old_src))
+    clock.now = 1.0
+    s.poll()
+    source = pipeline.get_by_name("source_1")
+    assert s.reconnects == 1
+
+    # an error the old decoder posted before teardown is only read now
+    assert s.handle_error(_message(old_dec, "stale"))
+    assert pipeline.get_by_name("source_1") is source
+    assert source.state == "playing"
+    assert s._pending == {}
+    assert s._backoff[1].attempts == 1
+
+    assert s.handle_error(_message(source.get_by_name("src_1")))
+    assert pipeline.get_by_name("source_1") is None
+    assert s._backoff[1].attempts == 2
+
+
+def test_backoff_grows_until_stable(fake_gst):
+    pipeline, _, sources = _pipeline()
+    clock = Clock()
+    cameras = CameraFactory()
+    s = sup.SourceSupervisor(
+        pipeline, sources, make_source=cameras, clock=clock, stable_after=10.0
+    )
+    cameras.down = True
+    s.handle_error(_message(pipeline.get_by_name("src_0")))
+    retries = []
+    for _ in range(4):
+        clock.now = s._pending[0]
+        s.poll()
+        retries.append(s._pending[0] - clock.now)
+    assert retries == [2.0, 4.0, 8.0, 16.0]
+
+    cameras.down = False
+    clock.now = s._pending[0]
+    s.poll()
+    assert s.reconnects == 1
+    clock.now += 10.0
+    s.poll()
+    assert s._backoff[0].attempts == 0
+
+
+def test_non_rtsp_errors_are_fatal(fake_gst):
+    pipeline, _, sources = _pipeline()
+    sources[1] = SourceSpec("clip.mp4", False)
+    s = sup.SourceSupervisor(pipeline, sources, make_source=CameraFactory())
+    assert not s.handle_error(_message(pipeline.get_by_name("infer")))
+    assert not s.handle_error(_message(pipeline.get_by_name("dec_1")))
+    assert pipeline.get_by_name("dec_1") is not None
+
+
+def test_backoff_is_capped():
+    backoff = sup.Backoff(initial=0.5, maximum=3.0)
+    assert [backoff.next() for _ in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+    backoff.reset()
+    assert backoff.next() == 0.5
+    with pytest.raises(ValueError):
+        sup.Backoff(initial=0)
@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from tracker import ByteTracker
 
@@ -22,3 +24,44 @@ def test_bytracker_expiry():
     tracker.update([], 1.0)
     second = tracker.update([(0, 0, 10, 10)], 1.1)
     assert list(second.keys())[0] != tid
+
+
+def test_bytracker_recycles_expired_slots():
+    tracker = ByteTracker(iou_threshold=0.1, decay_time=0.5)
+    for i in range(200):
+        x = (i % 2) * 100
+        tracker.update([(x, 0, x + 10, 10)], float(i))
+    assert len(tracker.store) == 1
+    assert tracker.store.capacity == 64
+    assert [t.id for t in tracker.tracks] == [199]
+
+
+def test_registry_creates_named_trackers():
+    from carspeed.core.tracker_wrapper import available_trackers, create_tracker
+
+    assert {"bytetrack", "iou", "centroid"} <= set(available_trackers())
+    for name in ("bytetrack", "iou", "centroid"):
+        tracker = create_tracker(name, decay_time=0.5)
+        assert tracker.name == name
+        first = tracker.update([(0, 0, 20, 20), (100, 100, 120, 120)], 0.0, [0.9, 0.9])
+        second = tracker.update([(2, 2, 22, 22)], 0.1, [0.9])
+        assert tracker.matches == [list(first)[0]]
+        assert list(second) == tracker.matches
+
+
+def test_registry_rejects_unknown_name():
+    from carspeed.core.tracker_wrapper import create_tracker
+
+    with pytest.raises(ValueError, match="unknown tracker"):
+        create_tracker("nope")
+
+
+def test_timing_hook_reports_each_update():
+    from carspeed.core.tracker_wrapper import create_tracker
+
+    calls = []
+    tracker = create_tracker("centroid")
+    tracker.timing_hook = lambda name, seconds, count: calls.append((name, count))
+    tracker.track([(0, 0, 10, 10)], 0.0)
+    tracker.track([], 0.1)
+    assert calls == [("centroid", 1), ("centroid", 0)]
@@ -0,0 +1,107 @@
+/* Per-vehicle statistics for the speedtrack summaries property.
+ *
+ * A TrackSummary accumulates the entry and exit time, the path length, every
+ * speed estimate and the most confident box of one track, so a single
+ * vehicle_summaries row can be written when the track is evicted. The speeds
+ * array is kept when a summary is reset, so summaries embedded in recycled
+ * slab tracks stop allocating once they have seen a long track.
+ *
+ * Plain C with no GLib dependency so it can be tested without GStreamer.
+ */
+#ifndef TRACK_SUMMARY_H
+#define TRACK_SUMMARY_H
+
+#include <math.h>
+#include <stdint.h>
+#include <stdlib.h>
+
+typedef struct {
+  double entry_ts;
+  double exit_ts;
+  double last_x;
+  double last_y;
+  double distance; /* path length in position units; divide by ppm */
+  uint32_t samples;
+  float *speeds; /* every estimate, for the median; owned, reused on reset */
+  uint32_t n_speeds;
+  uint32_t cap_speeds;
+  double speed_sum;
+  double speed_max;
+  float confidence; /* best detector confidence, -1 before the first sample */
+  float box[4]; /* left, top, right, bottom of the most confident detection */
+} TrackSummary;
+
+/* Start a new vehicle, keeping the speeds buffer for reuse. */
+static inline void track_summary_reset(TrackSummary *s) {
+  float *speeds = s->speeds;
+  uint32_t cap = s->cap_speeds;
+  *s = (TrackSummary){0};
+  s->speeds = speeds;
+  s->cap_speeds = cap;
+  s->confidence = -1.0f;
+}
+
+static inline void track_summary_free(TrackSummary *s) {
+  free(s->speeds);
+  s->speeds = NULL;
+  s->cap_speeds = 0;
+  track_summary_reset(s);
+}
+
+/* Record one detection at position (x, y). */
+static inline void track_summary_add(TrackSummary *s, double ts, double x, double y,
+                                     const float box[4], float confidence) {
+  if (s->samples == 0)
+    s->entry_ts = ts;
+  else
+    s->distance += hypot(x - s->last_x, y - s->last_y);
+  s->exit_ts = ts;
+  s->last_x = x;
+  s->last_y = y;
+  s->samples++;
+  if (confidence > s->confidence) {
+    s->confidence = confidence;
+    for (int i = 0; i < 4; i++)
+      s->box[i] = box[i];
+  }
+}
+
+/* Record one speed estimate. Returns 0 when the array cannot grow. */
+static inline int track_summary_add_speed(TrackSummary *s, double speed) {
+  if (s->n_speeds == s->cap_speeds) {
+    uint32_t cap = s->cap_speeds ? s->cap_speeds * 2 : 32;
+    float *grown = (float *)realloc(s->speeds, cap * sizeof(float));
+    if (!grown)
+      return 0;
+    s->speeds = grown;
+    s->cap_speeds = cap;
+  }
+  s->speeds[s->n_speeds++] = (float)speed;
+  s->speed_sum += speed;
+  if (speed > s->speed_max)
+    s->speed_max = speed;
+  return 1;
+}
+
+static inline double track_summary_mean(const TrackSummary *s) {
+  return s->n_speeds ? s->speed_sum / s->n_speeds : 0.0;
+}
+
+static inline int track_summary_cmp(const void *a, const void *b) {
+  float x = *(const float *)a, y = *(const float *)b;
+  return (x > y) - (x < y);
+}
+
+/* Median of the speed estimates; sorts them in place, so call it once the
+ * track has ended. */
+static inline double track_summary_median(TrackSummary *s) {
+  uint32_t n = s->n_speeds;
+  if (n == 0)
+    return 0.0;
+  qsort(s->speeds, n, sizeof(float), track_summary_cmp);
+  if (n % 2)
+    return s->speeds[n / 2];
+  return 0.5 * ((double)s->speeds[n / 2 - 1] + s->speeds[n / 2]);
+}
+
+#endif /* TRACK_SUMMARY_H */
@@ -0,0 +1,144 @@
+/* Open-addressing hash table from 64-bit track ids to pointers.
+ *
+ * Keys are DeepStream object ids stored inline, so a lookup is one hash and
+ * a short linear probe through a flat array with no pointer chasing.
+ * Deletion shifts the following entries of the probe run back instead of
+ * leaving tombstones, so heavy track churn never degrades lookups and the
+ * table never needs rehashing to clean up.
+ *
+ * Plain C with no GLib dependency so it can be tested without GStreamer.
+ */
+#ifndef TRACK_TABLE_H
+#define TRACK_TABLE_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+
+typedef struct {
+  uint64_t key;
+  void *value; /* NULL marks an empty slot */
+} TrackTableEntry;
+
+typedef struct {
+  TrackTableEntry *slots;
+  size_t mask; /* capacity - 1, capacity is a power of two */
+  size_t size;
+} TrackTable;
+
+/* splitmix64 finaliser: sequential ids spread over the whole table */
+static inline size_t track_table_hash(uint64_t key) {
+  key ^= key >> 30;
+  key *= 0xbf58476d1ce4e5b9ULL;
+  key ^= key >> 27;
+  key *= 0x94d049bb133111ebULL;
+  key ^= key >> 31;
+  return (size_t)key;
+}
+
+/* Returns 0 on allocation failure. */
+static inline int track_table_init(TrackTable *t, size_t capacity) {
+  size_t cap = 16;
+  while (cap < capacity)
+    cap <<= 1;
+  t->slots = (TrackTableEntry *)calloc(cap, sizeof(TrackTableEntry));
+  t->mask = cap - 1;
+  t->size = 0;
+  return t->slots != NULL;
+}
+
+static inline void track_table_clear(TrackTable *t) {
+  free(t->slots);
+  t->slots = NULL;
+  t->mask = 0;
+  t->size = 0;
+}
+
+static inline size_t track_table_size(const TrackTable *t) { return t->size; }
+
+static inline void *track_table_lookup(const TrackTable *t, uint64_t key) {
+  if (!t->slots)
+    return NULL;
+  for (size_t i = track_table_hash(key) & t->mask;; i = (i + 1) & t->mask) {
+    TrackTableEntry *e = &t->slots[i];
+    if (!e->value)
+      return NULL;
+    if (e->key == key)
+      return e->value;
+  }
+}
+
+static inline void track_table_place(TrackTableEntry *slots, size_t mask,
+                                     uint64_t key, void *value) {
+  size_t i = track_table_hash(key) & mask;
+  while (slots[i].value)
+    i = (i + 1) & mask;
+  slots[i].key = key;
+  slots[i].value = value;
+}
+
+static inline int track_table_grow(TrackTable *t) {
+  size_t cap = (t->mask + 1) << 1;
+  TrackTableEntry *slots = (TrackTableEntry *)calloc(cap, sizeof(TrackTableEntry));
+  if (!slots)
+    return 0;
+  for (size_t i = 0; i <= t->mask; i++)
+    if (t->slots[i].value)
+      track_table_place(slots, cap - 1, t->slots[i].key, t->slots[i].value);
+  free(t->slots);
+  t->slots = slots;
+  t->mask = cap - 1;
+  return 1;
+}
+
+/* Insert or replace the value for key. value must not be NULL. Keeps the
+ * load factor at or below one half. Returns 0 on allocation failure. */
+static inline int track_table_insert(TrackTable *t, uint64_t key, void *value) {
+  if (!t->slots && !track_table_init(t, 16))
+    return 0;
+  size_t i = track_table_hash(key) & t->mask;
+  for (; t->slots[i].value; i = (i + 1) & t->mask) {
+    if (t->slots[i].key == key) {
+      t->slots[i].value = value;
+      return 1;
+    }
+  }
+  if ((t->size + 1) * 2 > t->mask + 1) {
+    if (!track_table_grow(t))
+      return 0;
+    track_table_place(t->slots, t->mask, key, value);
+  } else {
+    t->slots[i].key = key;
+    t->slots[i].value = value;
+  }
+  t->size++;
+  return 1;
+}
+
+/* Remove key and return its value, or NULL if it was not present. */
+static inline void *track_table_remove(TrackTable *t, uint64_t key) {
+  if (!t->slots)
+    return NULL;
+  size_t i = track_table_hash(key) & t->mask;
+  for (;; i = (i + 1) & t->mask) {
+    if (!t->slots[i].value)
+      return NULL;
+    if (t->slots[i].key == key)
+      break;
+  }
+  void *value = t->slots[i].value;
+  /* backward-shift: pull later entries of the run into the hole unless that
+   * would move them in front of their home slot */
+  for (size_t j = (i + 1) & t->mask; t->slots[j].value; j = (j + 1) & t->mask) {
+    size_t home = track_table_hash(t->slots[j].key) & t->mask;
+    if (((j - home) & t->mask) >= ((j - i) & t->mask)) {
+      t->slots[i] = t->slots[j];
+      i = j;
+    }
+  }
+  t->slots[i].value = NULL;
+  t->size--;
+  return value;
+}
+
+#endif /* TRACK_TABLE_H */